@@ -0,0 +1,78 @@
+"""
+Benchmark: language detection in RepositoryAnalyzer
+
+Builds a synthetic tree (100k files by default, see synthetic_repo.py) in a
+temporary directory and times the old detection loop (every
+LANGUAGE_EXTENSIONS entry tested for every file) against the suffix index,
+then a full analyze() against sampled mode, each with a fresh inventory so
+the walk is included.
+
+Usage:
+    python benchmarks/bench_analyzer.py [--files 100000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from src.analyzers.repo_analyzer import RepositoryAnalyzer  # noqa: E402
+from src.inventory.file_inventory import FileInventory  # noqa: E402
+from synthetic_repo import generate_repo  # noqa: E402
+
+
+def per_language_loop(entries):
+    """The detection loop as it was before the suffix index"""
+    language_extensions = {lang: sorted(exts) for lang, exts in RepositoryAnalyzer.LANGUAGE_EXTENSIONS.items()}
+    languages = set()
+    for entry in entries:
+        for lang, extensions in language_extensions.items():
+            if entry.suffix in extensions:
+                languages.add(lang)
+    return sorted(languages)
+
+
+def suffix_index(analyzer, entries):
+    return sorted(analyzer._language_stats(entries))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        # small files: this is about the walk and detection, not reading
+        build_time, _ = timed(generate_repo, root, args.files, file_size=(0, 64), secret_density=0)
+        print(f"{args.files} files (built in {build_time:.1f}s)")
+
+        inventory = FileInventory(root)
+        entries = inventory.files()
+        analyzer = RepositoryAnalyzer(root, inventory=inventory)
+        loop_time, loop_langs = timed(per_language_loop, entries)
+        index_time, index_langs = timed(suffix_index, analyzer, entries)
+        assert loop_langs == index_langs, (loop_langs, index_langs)
+
+        full_time, full = timed(RepositoryAnalyzer(root).analyze)
+        sample_time, sampled = timed(RepositoryAnalyzer(root).analyze, sample=True)
+        assert sampled['languages'] == full['languages'], (sampled['languages'], full['languages'])
+
+    print(f"{'stage':<28} {'time (s)':>9}")
+    print(f"{'detect: per-language loop':<28} {loop_time:>9.3f}")
+    print(f"{'detect: suffix index':<28} {index_time:>9.3f}  ({loop_time / index_time:.1f}x)")
+    print(f"{'analyze (walk + stats)':<28} {full_time:>9.3f}")
+    print(f"{'analyze --sample':<28} {sample_time:>9.3f}  ({full_time / sample_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: dashboard report downloads
+
+Writes a synthetic SAST report and measures requests per second through the
+Flask test client for the old handler (json.load + jsonify on every request)
+and the current one: the stored bytes streamed as is, the precompressed gzip
+sibling, and a conditional request answered with 304.
+
+Usage:
+    python benchmarks/bench_dashboard.py [--issues 20000] [--requests 200]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import jsonify  # noqa: E402
+
+from src import dashboard  # noqa: E402
+from src.reports.compressed import write_compressed_siblings  # noqa: E402
+
+
+def make_report(path, issues):
+    report = {'issues': [{
+        'file': f'src/module_{i % 500}.py',
+        'line': i % 900 + 1,
+        'column': 5,
+        'span': [i * 40, i * 40 + 22],
+        'rule': 'hardcoded-password',
+        'category': 'hardcoded_secrets',
+        'description': 'Potential hardcoded password',
+        'code': f'password = "secret{i}"',
+    } for i in range(issues)]}
+    path.write_text(json.dumps(report, indent=2))
+
+
+def legacy_get_report(filename):
+    """The handler as it was: parse the report and re-serialize it every time"""
+    with open(dashboard.REPORTS_DIR / filename, 'r') as f:
+        data = json.load(f)
+    return jsonify(data)
+
+
+def requests_per_second(client, url, count, headers=None, expect=200):
+    start = time.perf_counter()
+    size = 0
+    for _ in range(count):
+        response = client.get(url, headers=headers or {})
+        assert response.status_code == expect, response.status_code
+        size = len(response.data)
+    return count / (time.perf_counter() - start), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--issues', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        report = Path(tmpdir) / 'sast-report.json'
+        make_report(report, args.issues)
+        write_compressed_siblings(str(report))
+        dashboard.REPORTS_DIR = Path(tmpdir)
+        dashboard.app.add_url_rule('/legacy/<filename>', 'legacy_get_report', legacy_get_report)
+        client = dashboard.app.test_client()
+
+        etag = client.get('/api/reports/sast-report.json').headers['ETag']
+        cases = [
+            ('json.load + jsonify (old)', '/legacy/sast-report.json', {}, 200),
+            ('stream stored bytes', '/api/reports/sast-report.json', {}, 200),
+            ('stream gzip sibling', '/api/reports/sast-report.json', {'Accept-Encoding': 'gzip'}, 200),
+            ('If-None-Match -> 304', '/api/reports/sast-report.json', {'If-None-Match': etag}, 304),
+        ]
+
+        print(f"report: {args.issues} issues, {report.stat().st_size / 1e6:.1f} MB")
+        print(f"{'handler':<28} {'req/s':>9} {'body (KB)':>10} {'speedup':>8}")
+        baseline = None
+        for label, url, headers, expect in cases:
+            rps, size = requests_per_second(client, url, args.requests, headers, expect)
+            baseline = baseline or rps
+            print(f"{label:<28} {rps:>9.1f} {size / 1024:>10.1f} {rps / baseline:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
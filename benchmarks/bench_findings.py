@@ -0,0 +1,95 @@
+"""
+Benchmark: holding and writing many SAST findings
+
+Builds synthetic findings (500k by default, spread over a few thousand files
+like a noisy legacy repository) and compares a list of dicts written with
+json.dump(indent=2), the old way, against FindingTable written as JSON Lines
+and gzipped JSON Lines: peak memory (tracemalloc), write time and report size.
+
+Usage:
+    python benchmarks/bench_findings.py [--findings 500000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.scanners.findings import FindingTable, FindingWriter  # noqa: E402
+from src.scanners.sast_rules import DEFAULT_RULES  # noqa: E402
+
+
+def make_findings(count):
+    rules = DEFAULT_RULES
+    for i in range(count):
+        rule = rules[i % len(rules)]
+        # fresh strings per finding, as the scanner produces them
+        yield {
+            'file': ''.join(('src/legacy/module_', str(i % 4000), '.py')),
+            'line': i % 900 + 1,
+            'column': 5,
+            'span': [i * 40, i * 40 + 22],
+            'rule': rule.id,
+            'category': rule.category,
+            'description': ''.join((rule.description, '')),
+            'code': f'password = "secret{i % 5000}"',
+        }
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--findings', type=int, default=500000)
+    args = parser.parse_args()
+
+    def as_dicts():
+        return list(make_findings(args.findings))
+
+    def as_table():
+        table = FindingTable()
+        table.extend(make_findings(args.findings))
+        return table
+
+    findings, dict_time, dict_peak = measure(as_dicts)
+    table, table_time, table_peak = measure(as_table)
+    print(f"{args.findings} findings in memory (peak, tracemalloc)")
+    print(f"  list of dicts   {dict_peak / 1e6:>8.1f} MB  {dict_time:>6.2f}s")
+    print(f"  FindingTable    {table_peak / 1e6:>8.1f} MB  {table_time:>6.2f}s  "
+          f"{dict_peak / table_peak:.1f}x smaller")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        print(f"{'report':<28} {'write (s)':>9} {'size (MB)':>10}")
+        path = os.path.join(tmpdir, 'legacy.json')
+        start = time.perf_counter()
+        with open(path, 'w') as f:
+            json.dump({'issues': findings}, f, indent=2)
+        print(f"{'json.dump(indent=2) (old)':<28} {time.perf_counter() - start:>9.2f} "
+              f"{os.path.getsize(path) / 1e6:>10.1f}")
+        del findings
+
+        for report_format in ('json', 'jsonl', 'jsonl.gz'):
+            path = os.path.join(tmpdir, 'sast-report.' + report_format)
+            start = time.perf_counter()
+            writer = FindingWriter(path, report_format)
+            writer.close(table)
+            print(f"{'FindingWriter ' + report_format:<28} {time.perf_counter() - start:>9.2f} "
+                  f"{os.path.getsize(path) / 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
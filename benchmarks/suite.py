@@ -0,0 +1,218 @@
+"""
+Benchmark suite: analyzer, SAST, config parsing and pipeline generation
+
+Generates synthetic repositories (benchmarks/synthetic_repo.py) at each
+requested size and times every stage on them, each run in a fresh process so
+imports, caches and peak RSS don't leak from one stage into the next. SAST
+runs without its cache and the analyzer without the analysis cache, so the
+numbers are for a cold run. Reports throughput (files/s and MB/s for the
+stages that walk or read the tree, operations/s for the others) and peak
+RSS, and writes everything as JSON.
+
+With --baseline, each stage is compared with the same size and stage in an
+earlier results file; the exit status is 1 if any got slower or bigger than
+--tolerance allows, so CI can catch a regression.
+
+Usage:
+    python benchmarks/suite.py [--sizes 1k,10k] [--output results.json]
+    python benchmarks/suite.py --sizes 1k,10k,100k --baseline baseline.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic_repo import DEFAULT_MIX, generate_repo, parse_size  # noqa: E402
+
+
+STAGES = ('analyze', 'sast', 'config', 'generate')
+
+RESULTS_VERSION = 1
+
+# A config parse takes well under a millisecond; time this many and report per call
+CONFIG_CALLS = 200
+
+# Differences below these are noise, whatever the tolerance says
+NOISE_FLOOR = {'seconds': 0.005, 'peak_rss_mb': 2.0}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_stage(stage: str, root: str, repo: dict) -> dict:
+    """Time one stage in this (fresh) process"""
+    from src.analyzers.repo_analyzer import RepositoryAnalyzer
+    from src.config.config_parser import ConfigParser
+    from src.generators.pipeline_generator import PipelineGenerator
+    from src.scanners.security_scanner import SecurityScanner
+
+    with tempfile.TemporaryDirectory() as outdir:
+        if stage == 'analyze':
+            start = time.perf_counter()
+            RepositoryAnalyzer(root).analyze()
+            seconds = time.perf_counter() - start
+            work = {'files': repo['files'], 'bytes': repo['bytes']}
+        elif stage == 'sast':
+            scanner = SecurityScanner(root)
+            scanner.inventory.files()  # the walk is the analyzer's cost, not the scan's
+            start = time.perf_counter()
+            result = scanner._run_sast(Path(outdir), use_cache=False, history=False)
+            seconds = time.perf_counter() - start
+            if result['issues_found'] != repo['secrets']:
+                raise AssertionError(f"SAST found {result['issues_found']} issues, {repo['secrets']} were planted")
+            work = {'files': repo['sast_files'], 'bytes': repo['sast_bytes']}
+        elif stage == 'config':
+            start = time.perf_counter()
+            for _ in range(CONFIG_CALLS):
+                ConfigParser(root).parse()
+            seconds = time.perf_counter() - start
+            work = {'ops': CONFIG_CALLS}
+        elif stage == 'generate':
+            analysis = RepositoryAnalyzer(root).analyze()
+            config = ConfigParser(root).parse()
+            # the first call in a new process, as a CLI run makes it (templates
+            # still come from the on-disk bytecode cache after the first run)
+            start = time.perf_counter()
+            PipelineGenerator().generate(analysis, config, outdir)
+            seconds = time.perf_counter() - start
+            work = {'ops': 1}
+        else:
+            raise ValueError(f"Unknown stage: {stage}")
+
+    record = {'seconds': round(seconds, 4), **work, 'peak_rss_mb': round(_peak_rss_mb(), 1)}
+    if 'files' in work:
+        record['files_per_s'] = round(work['files'] / seconds, 1)
+        record['mb_per_s'] = round(work['bytes'] / 1e6 / seconds, 2)
+    else:
+        record['ops_per_s'] = round(work['ops'] / seconds, 1)
+    return record
+
+
+def measure(stage: str, root: str, repo: dict, repeat: int) -> dict:
+    """Best of repeat runs, each in a new process; peak RSS is the highest seen"""
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            runs.append(pool.submit(run_stage, stage, root, repo).result())
+    best = min(runs, key=lambda record: record['seconds'])
+    return dict(best, peak_rss_mb=max(record['peak_rss_mb'] for record in runs))
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """Stages that got slower or used more memory than tolerance allows"""
+    previous = {(r['size'], r['stage']): r for r in baseline.get('results', [])}
+    regressions = []
+    for record in results:
+        base = previous.get((record['size'], record['stage']))
+        if base is None:
+            continue
+        record['baseline_seconds'] = base['seconds']
+        record['time_ratio'] = round(record['seconds'] / base['seconds'], 3) if base['seconds'] else None
+        for metric in ('seconds', 'peak_rss_mb'):
+            if base[metric] and record[metric] > base[metric] * (1 + tolerance) + NOISE_FLOOR[metric]:
+                regressions.append(f"{record['stage']} @ {record['size']} files: {metric} "
+                                   f"{base[metric]} -> {record[metric]} (+{record[metric] / base[metric] - 1:.0%})")
+    return regressions
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ''
+
+
+def _format_row(record: dict) -> str:
+    rate = (f"{record['files_per_s']:>10.0f} files/s {record['mb_per_s']:>7.1f} MB/s"
+            if 'files_per_s' in record else f"{record['ops_per_s']:>10.0f} ops/s")
+    ratio = f"  {record['time_ratio']:.2f}x baseline" if record.get('time_ratio') else ''
+    return (f"{record['size']:>7} {record['stage']:<9} {record['seconds']:>9.3f}s {rate:<33} "
+            f"{record['peak_rss_mb']:>7.1f} MB{ratio}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1k,10k', help='Comma-separated file counts, e.g. 1k,10k,100k')
+    parser.add_argument('--stages', default=','.join(STAGES), help='Comma-separated stages to time')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Language weights, e.g. python=60,go=40')
+    parser.add_argument('--min-size', type=int, default=200, help='Smallest source file, in bytes')
+    parser.add_argument('--max-size', type=int, default=4000, help='Largest source file, in bytes')
+    parser.add_argument('--secret-density', type=float, default=0.01,
+                        help='Chance that a line of a Python file is a SAST finding')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage; the fastest is kept')
+    parser.add_argument('--output', default='benchmark-results.json', help='Where to write the results')
+    parser.add_argument('--baseline', default=None, help='Earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown/growth, 0.25 = 25%%')
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage: {', '.join(sorted(unknown))}")
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+    params = {'mix': args.mix, 'file_size': [args.min_size, args.max_size],
+              'secret_density': args.secret_density, 'seed': args.seed, 'repeat': args.repeat}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('params') != params:
+            print("warning: baseline was run with different parameters", file=sys.stderr)
+
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            start = time.perf_counter()
+            repo = generate_repo(root, size, args.mix, (args.min_size, args.max_size), args.secret_density,
+                                 seed=args.seed)
+            print(f"# {size} files, {repo['bytes'] / 1e6:.1f} MB, {repo['secrets']} planted findings "
+                  f"(generated in {time.perf_counter() - start:.1f}s)", file=sys.stderr)
+            for stage in stages:
+                record = {'size': size, 'stage': stage, **measure(stage, root, repo, args.repeat)}
+                results.append(record)
+                print(_format_row(record), file=sys.stderr)
+
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+    output = {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'params': params,
+        'results': results,
+        'regressions': regressions,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"results written to {args.output}", file=sys.stderr)
+
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Deterministic synthetic repositories for the benchmarks
+
+generate_repo() writes a tree of source files with a given language mix,
+file size range and density of planted secrets, plus the files the analyzer
+and generator look at (Dockerfile, requirements.txt, pipeline-config.yml).
+The same arguments and seed always produce byte-for-byte the same tree, so
+timings from different runs and machines compare like for like.
+
+Usage (to keep a tree around for profiling):
+    python benchmarks/synthetic_repo.py /tmp/repo --files 10000 --mix python=60,javascript=30,other=10
+"""
+
+import argparse
+import os
+import random
+from typing import Dict, Tuple
+
+
+# Per language: file suffixes and lines to build files from
+LANGUAGES = {
+    'python': (('.py',), (
+        'def handler(request):',
+        '    value = request.args.get("id")',
+        '    return render(template, value=value)',
+        'class Service(object):',
+        '    # TODO: tidy this up',
+        '    logger.info("processing %s", item)',
+        'for item in items: total += item.price * item.qty',
+    )),
+    'javascript': (('.js', '.jsx'), (
+        'function handler(req, res) {',
+        '  const value = req.query.id;',
+        '  return res.render("page", { value });',
+        '}',
+        'export default class Service {}',
+        '// TODO: tidy this up',
+    )),
+    'typescript': (('.ts',), (
+        'export function handler(req: Request): Response {',
+        '  const value: string = req.query.id;',
+        '  return render(value);',
+        '}',
+    )),
+    'go': (('.go',), (
+        'func Handler(w http.ResponseWriter, r *http.Request) {',
+        '\tvalue := r.URL.Query().Get("id")',
+        '\tfmt.Fprintf(w, "%s", value)',
+        '}',
+    )),
+    'other': (('.md', '.json', '.yml', '.txt'), (
+        'Some documentation text describing the service.',
+        '  key: value',
+        '- item',
+    )),
+}
+
+# Lines that each trigger exactly one SAST rule; only planted in Python
+# files (SAST also scans the other source languages, never the 'other' files)
+SECRETS = (
+    'password = "hunter2"',
+    'api_key = "sk_live_0123456789abcdef"',
+    'os.system(cmd)',
+    'subprocess.call(cmd, shell=True)',
+)
+
+DEFAULT_MIX = 'python=40,javascript=25,typescript=10,go=5,other=20'
+
+CONFIG = """pipeline:
+  name: Synthetic Pipeline
+  triggers: [push, pull_request]
+security:
+  trivy_enabled: true
+  sast_enabled: true
+runtime:
+  python_version: '3.11'
+"""
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """'python=60,go=40' -> {'python': 0.6, 'go': 0.4}"""
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in LANGUAGES:
+            raise ValueError(f"Unknown language in mix: {name} (known: {', '.join(LANGUAGES)})")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError(f"Language mix has no weight: {spec}")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def parse_size(text: str) -> int:
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = text.strip().lower()
+    scale = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+
+def _file_body(rng: random.Random, lines, size: int, secret_density: float, secrets: bool) -> Tuple[str, int]:
+    out, length, planted = [], 0, 0
+    while length < size:
+        if secrets and rng.random() < secret_density:
+            line = rng.choice(SECRETS)
+            planted += 1
+        else:
+            line = rng.choice(lines)
+        out.append(line)
+        length += len(line) + 1
+    return '\n'.join(out) + '\n', planted
+
+
+def generate_repo(root: str, files: int = 1000, mix: str = DEFAULT_MIX, file_size: Tuple[int, int] = (200, 4000),
+                  secret_density: float = 0.01, per_dir: int = 50, seed: int = 42) -> Dict:
+    """Write a synthetic repository under root and describe what was written
+
+    file_size is the (min, max) size of each source file in bytes;
+    secret_density is the chance that a line of a Python file is one the
+    SAST rules flag.
+    """
+    rng = random.Random(seed)
+    weights = parse_mix(mix)
+    names, cumulative = list(weights), []
+    running = 0.0
+    for name in names:
+        running += weights[name]
+        cumulative.append(running)
+
+    stats = {'files': 0, 'bytes': 0, 'sast_files': 0, 'sast_bytes': 0, 'secrets': 0,
+             'by_language': {name: 0 for name in names}}
+    for i in range(files):
+        directory = os.path.join(root, 'src', f'pkg{i // (per_dir * 20)}', f'mod{(i // per_dir) % 20}')
+        if i % per_dir == 0:
+            os.makedirs(directory, exist_ok=True)
+        language = rng.choices(names, cum_weights=cumulative)[0]
+        suffixes, lines = LANGUAGES[language]
+        body, planted = _file_body(rng, lines, rng.randint(*file_size), secret_density, language == 'python')
+        data = body.encode('utf-8')
+        with open(os.path.join(directory, f'file{i}{rng.choice(suffixes)}'), 'wb') as f:
+            f.write(data)
+        stats['files'] += 1
+        stats['bytes'] += len(data)
+        stats['secrets'] += planted
+        stats['by_language'][language] += 1
+        if language != 'other':
+            stats['sast_files'] += 1
+            stats['sast_bytes'] += len(data)
+
+    extras = {
+        'Dockerfile': 'FROM python:3.11-slim\nCOPY . /app\nRUN pip install -r /app/requirements.txt\n',
+        'requirements.txt': 'flask==2.3.0\nrequests==2.31.0\n',
+        'pipeline-config.yml': CONFIG,
+    }
+    for name, text in extras.items():
+        with open(os.path.join(root, name), 'w') as f:
+            f.write(text)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('root')
+    parser.add_argument('--files', default='1k', help='Number of files, e.g. 1000, 10k, 100k')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Language weights, e.g. python=60,go=40')
+    parser.add_argument('--min-size', type=int, default=200)
+    parser.add_argument('--max-size', type=int, default=4000)
+    parser.add_argument('--secret-density', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    stats = generate_repo(args.root, parse_size(args.files), args.mix, (args.min_size, args.max_size),
+                          args.secret_density, seed=args.seed)
+    print(f"{stats['files']} files, {stats['bytes'] / 1e6:.1f} MB, {stats['secrets']} planted findings")
+
+
+if __name__ == '__main__':
+    main()
@@ -43,6 +43,12 @@ setup(
             "flask>=2.0.0",
             "flask-cors>=3.0.10",
         ],
+        "watch": [
+            "inotify_simple>=1.3",
+        ],
+        "entropy": [
+            "numpy>=1.21",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,251 @@
+"""
+Analysis cache - remembers analyze() results between runs
+
+Results are stored as one small JSON file per repository in a user cache
+directory. The key is the repository state, split by top-level directory:
+
+- in a git checkout, the tree hash of each top-level entry from
+  ``git ls-tree HEAD`` plus whatever ``git status`` reports as changed or
+  untracked under it (with the file's size and mtime);
+- otherwise, the mtimes of the directories under each top-level entry.
+  Directory mtimes change when files are added, removed or renamed, but not
+  when a file is edited in place, so outside git an edit that changes a
+  file's size only shows up after ``--refresh``.
+
+An unchanged repository is answered straight from the stored result. When
+only some top-level directories changed, only those are walked again and
+the stored per-directory partial results are reused for the rest. The
+cache directory is kept under a size limit by dropping the least recently
+used entries.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from ..inventory.file_inventory import IgnorePolicy, top_level_dir
+
+
+CACHE_DIR_ENV = 'PIPELINE_GEN_CACHE_DIR'
+
+# Bump when the layout of a cache file changes
+CACHE_VERSION = 1
+
+
+def default_cache_dir() -> Path:
+    """$PIPELINE_GEN_CACHE_DIR, else ~/.cache/pipeline-generator/analysis"""
+    override = os.getenv(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'pipeline-generator' / 'analysis'
+
+
+def _digest(*parts) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(str(part).encode('utf-8', errors='surrogateescape'))
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+
+class RepoState(NamedTuple):
+    """Fingerprint of a repository: one key per top-level directory"""
+    source: str                 # 'git' or 'mtime'
+    key: str                    # covers everything below
+    subtrees: Dict[str, str]    # top-level name ('' for root files) -> key
+
+
+def _git(repo_path: Path, *args: str) -> bytes:
+    return subprocess.run(
+        ['git', *args], cwd=str(repo_path), capture_output=True, check=True, timeout=30
+    ).stdout
+
+
+def _file_stamp(path: Path) -> str:
+    try:
+        st = os.lstat(path)
+        return f'{st.st_size}:{st.st_mtime_ns}'
+    except OSError:
+        return 'missing'
+
+
+def _git_subtrees(repo_path: Path) -> Optional[Dict[str, str]]:
+    """Per-subtree keys from git, or None if this isn't a usable checkout"""
+    try:
+        prefix = _git(repo_path, 'rev-parse', '--show-prefix').decode().strip()
+        listing = _git(repo_path, 'ls-tree', '-z', f'HEAD:{prefix}')
+        status = _git(repo_path, 'status', '--porcelain=v1', '-z', '--untracked-files=all', '--', '.')
+    except (OSError, subprocess.SubprocessError, UnicodeDecodeError):
+        return None
+
+    parts: Dict[str, List[str]] = {}
+    for record in listing.split(b'\0'):
+        if not record:
+            continue
+        meta, name = record.split(b'\t', 1)
+        name = os.fsdecode(name)
+        obj_type, obj_hash = meta.split()[1:3]
+        if obj_type == b'tree':
+            parts.setdefault(name, []).append(obj_hash.decode())
+        else:
+            parts.setdefault('', []).append(f'{name}={obj_hash.decode()}')
+
+    # Changes that aren't committed yet; paths are relative to the git root
+    records = iter(status.split(b'\0'))
+    for record in records:
+        if not record:
+            continue
+        code, path = record[:2].decode(), os.fsdecode(record[3:])
+        paths = [path]
+        if 'R' in code or 'C' in code:
+            paths.append(os.fsdecode(next(records, b'')))  # the old name
+        for path in paths:
+            if not path.startswith(prefix):
+                continue
+            rel = path[len(prefix):]
+            parts.setdefault(top_level_dir(rel), []).append(f'{code}:{rel}:{_file_stamp(repo_path / rel)}')
+
+    return {name: _digest(*sorted(values)) for name, values in parts.items()}
+
+
+def _mtime_subtrees(repo_path: Path, policy: IgnorePolicy) -> Dict[str, str]:
+    """Per-subtree keys from directory mtimes (and root file stamps)"""
+    parts: Dict[str, List[str]] = {'': []}
+    try:
+        with os.scandir(repo_path) as it:
+            top_entries = sorted(it, key=lambda e: e.name)
+    except OSError:
+        return {}
+
+    for top in top_entries:
+        try:
+            if not top.is_dir(follow_symlinks=False):
+                if top.is_file():
+                    parts[''].append(f'{top.name}:{_file_stamp(Path(top.path))}')
+                continue
+        except OSError:
+            continue
+        if top.name in policy.ignored_dirs:
+            continue
+        stamps = []
+        stack = [(top.name, top.path)]
+        while stack:
+            rel_dir, abs_dir = stack.pop()
+            stamps.append(f'{rel_dir}:{_file_stamp(Path(abs_dir))}')
+            try:
+                with os.scandir(abs_dir) as it:
+                    for e in it:
+                        if e.name not in policy.ignored_dirs and e.is_dir(follow_symlinks=False):
+                            stack.append((f'{rel_dir}/{e.name}', e.path))
+            except OSError:
+                continue
+        parts[top.name] = sorted(stamps)
+
+    return {name: _digest(*values) for name, values in parts.items()}
+
+
+def repo_state(repo_path: Path, policy: IgnorePolicy, salt: str = '') -> RepoState:
+    """Fingerprint the repository, preferring git over directory mtimes
+
+    salt is mixed into every key; callers pass whatever else their result
+    depends on (analyzer version, ignore settings).
+    """
+    repo_path = Path(repo_path)
+    # .gitignore at the root can hide or reveal files anywhere below it
+    salt = _digest(salt, _file_stamp(repo_path / '.gitignore'))
+
+    subtrees = _git_subtrees(repo_path)
+    source = 'git'
+    if subtrees is None:
+        subtrees = _mtime_subtrees(repo_path, policy)
+        source = 'mtime'
+    subtrees = {name: _digest(salt, key) for name, key in subtrees.items()}
+    key = _digest(source, *sorted(f'{name}={key}' for name, key in subtrees.items()))
+    return RepoState(source, key, subtrees)
+
+
+class AnalysisCache:
+    """Persistent analyze() results, one JSON file per repository"""
+
+    # Least recently used entries go once the directory is over this size
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'partial_hits': 0, 'misses': 0,
+                      'subtrees_reused': 0, 'subtrees_scanned': 0, 'evicted': 0}
+
+    def _entry_path(self, repo_path: Path) -> Path:
+        name = _digest(os.path.realpath(repo_path))
+        return self.cache_dir / f'{name}.json'
+
+    def load(self, repo_path: Path) -> Optional[Dict]:
+        """The stored entry for a repository, or None"""
+        path = self._entry_path(repo_path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION:
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return entry
+
+    def store(self, repo_path: Path, state: RepoState, result: Dict, partials: Dict[str, Dict]) -> None:
+        """Save a result; failures to write only cost the next run a rescan"""
+        entry = {
+            'version': CACHE_VERSION,
+            'repo': os.path.realpath(repo_path),
+            'source': state.source,
+            'state': state.key,
+            'result': result,
+            'subtrees': {name: {'key': state.subtrees[name], 'partial': partial}
+                         for name, partial in partials.items()},
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # write-then-rename so a concurrent reader never sees half a file
+            fd, tmp = tempfile.mkstemp(dir=str(self.cache_dir), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._entry_path(repo_path))
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop least recently used entries until the directory fits max_bytes"""
+        try:
+            files = []
+            for e in os.scandir(self.cache_dir):
+                if e.name.endswith('.json') and e.is_file():
+                    st = e.stat()
+                    files.append((st.st_mtime_ns, st.st_size, e.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            self.stats['evicted'] += 1
+
+    def clear(self, repo_path: Path) -> None:
+        try:
+            self._entry_path(repo_path).unlink()
+        except OSError:
+            pass
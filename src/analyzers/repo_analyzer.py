@@ -1,43 +1,152 @@
 # Repository analyzer - figures out what tech a repo uses
 # TODO: add more framework detection
 
-import os
 import json
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterable, Optional, Set
+
+from ..instrumentation import metrics
+from ..inventory.file_inventory import FileEntry, FileInventory
+from ..languages import LANGUAGE_EXTENSIONS
+from .analysis_cache import AnalysisCache, repo_state
+
+# Bump when the shape of analyze() results changes so cached ones are dropped
+ANALYSIS_VERSION = 2
 
 class RepositoryAnalyzer:
     # file extensions for different languages
-    LANGUAGE_EXTENSIONS = {
-        'python': ['.py'],
-        'javascript': ['.js', '.jsx'],
-        'typescript': ['.ts', '.tsx'],
-        'java': ['.java'],
-        'go': ['.go'],
-        'ruby': ['.rb'],
-        'php': ['.php'],
-    }
-    
-    def __init__(self, repo_path: str):
+    LANGUAGE_EXTENSIONS = LANGUAGE_EXTENSIONS
+    
+    # sampled mode stops after this many files...
+    SAMPLE_MAX_FILES = 10000
+    # ...or once this many files in a row turned up no new language
+    SAMPLE_STABLE_FILES = 2000
+    
+    def __init__(self, repo_path: str, inventory: Optional[FileInventory] = None,
+                 cache: Optional[AnalysisCache] = None):
         self.repo_path = Path(repo_path)
+        # pass the same inventory to the scanner to walk the repo only once
+        self.inventory = inventory or FileInventory(repo_path)
+        self.cache = cache
+        # suffix -> language, so each file costs one dict lookup
+        self._suffix_languages = {
+            suffix: lang for lang, suffixes in self.LANGUAGE_EXTENSIONS.items() for suffix in suffixes
+        }
+    
+    def analyze(self, refresh: bool = False, sample: bool = False) -> Dict:
+        """Analyze the repository, reusing cached results when a cache is set
+
+        refresh ignores whatever is cached and stores a fresh result. sample
+        trades exact language_stats for speed on huge trees: it looks at no
+        more than SAMPLE_MAX_FILES files and stops early once detection is
+        stable. Sampled results are never cached.
+        """
+        with metrics.span('analyze'):
+            return self._analyze(refresh, sample)
+    
+    def _analyze(self, refresh: bool, sample: bool) -> Dict:
+        if sample:
+            result = self._combine([self._summarize(self.inventory, sample=True)])
+            result['sampled'] = True
+            return result
+        if self.cache is None:
+            return self._combine([self._summarize(self.inventory)])
+        
+        policy = self.inventory.ignore_policy
+        salt = repr((ANALYSIS_VERSION, sorted(policy.ignored_dirs), policy.use_gitignore,
+                     [rule.regex.pattern for rule in policy.extra_rules]))
+        state = repo_state(self.repo_path, policy, salt)
+        stored = None if refresh else self.cache.load(self.repo_path)
+        if stored and stored['state'] == state.key:
+            self.cache.stats['hits'] += 1
+            metrics.count('analysis_cache.hits')
+            return stored['result']
+        
+        # Only walk the top-level directories whose key changed
+        previous = stored['subtrees'] if stored else {}
+        partials = {}
+        reused = 0
+        for name, key in state.subtrees.items():
+            old = previous.get(name)
+            if old and old['key'] == key:
+                partials[name] = old['partial']
+                reused += 1
+            else:
+                partials[name] = self._summarize(self.inventory.subtree(name))
+        self.cache.stats['subtrees_reused'] += reused
+        self.cache.stats['subtrees_scanned'] += len(partials) - reused
+        self.cache.stats['partial_hits' if reused else 'misses'] += 1
+        metrics.count('analysis_cache.partial_hits' if reused else 'analysis_cache.misses')
+        metrics.count('analysis_cache.subtrees_reused', reused)
+        
+        result = self._combine(partials.values())
+        self.cache.store(self.repo_path, state, result, partials)
+        return result
+    
+    def summarize(self, entries: Iterable[FileEntry]) -> Dict:
+        """Partial result for some of the files, e.g. one top-level directory
+        
+        For callers that keep the files in memory themselves (the watch
+        daemon) and only re-summarize the part that changed.
+        """
+        return self._summarize(entries)
+    
+    def combine(self, partials: Iterable[Dict]) -> Dict:
+        """The analyze() result from summarize() partials covering every file"""
+        return self._combine(partials)
+    
+    def _summarize(self, entries: Iterable[FileEntry], sample: bool = False) -> Dict:
+        """Partial result for some of the files; _combine merges them"""
+        return {'language_stats': self._language_stats(entries, sample)}
     
-    def analyze(self) -> Dict:
+    def _combine(self, partials: Iterable[Dict]) -> Dict:
+        stats: Dict[str, Dict[str, int]] = {}
+        for partial in partials:
+            for lang, counts in partial['language_stats'].items():
+                total = stats.setdefault(lang, {'files': 0, 'bytes': 0})
+                total['files'] += counts['files']
+                total['bytes'] += counts['bytes']
         return {
-            'languages': self._detect_languages(),
+            'languages': sorted(stats),
+            'language_stats': {lang: stats[lang] for lang in sorted(stats)},
             'frameworks': [],
             'has_docker': self._has_dockerfile(),
             'has_tests': False,
+            'sampled': False,
         }
     
-    def _detect_languages(self) -> List[str]:
+    def _language_stats(self, entries: Iterable[FileEntry], sample: bool = False) -> Dict[str, Dict[str, int]]:
+        """File count and total size per detected language"""
+        suffix_languages = self._suffix_languages
+        files: Dict[str, int] = {}
+        sizes: Dict[str, int] = {}
         languages = set()
-        for root, dirs, files in os.walk(self.repo_path):
-            for file in files:
-                ext = Path(file).suffix
-                for lang, extensions in self.LANGUAGE_EXTENSIONS.items():
-                    if ext in extensions:
-                        languages.add(lang)
-        return sorted(list(languages))
+        all_languages = len(self.LANGUAGE_EXTENSIONS)
+        seen = 0
+        last_new = 0
+        for entry in entries:
+            seen += 1
+            suffix = entry.suffix
+            if suffix in suffix_languages:
+                if suffix in files:
+                    files[suffix] += 1
+                    sizes[suffix] += entry.size
+                else:
+                    files[suffix] = 1
+                    sizes[suffix] = entry.size
+                    if suffix_languages[suffix] not in languages:
+                        languages.add(suffix_languages[suffix])
+                        last_new = seen
+            if sample and (seen >= self.SAMPLE_MAX_FILES or seen - last_new >= self.SAMPLE_STABLE_FILES
+                           or len(languages) == all_languages):
+                break
+        
+        stats: Dict[str, Dict[str, int]] = {}
+        for suffix, count in files.items():
+            lang = stats.setdefault(suffix_languages[suffix], {'files': 0, 'bytes': 0})
+            lang['files'] += count
+            lang['bytes'] += sizes[suffix]
+        return stats
     
     def _has_dockerfile(self) -> bool:
         dockerfile = self.repo_path / 'Dockerfile'
@@ -0,0 +1,183 @@
+"""
+Batch mode - analyze, scan and generate for many repositories at once
+
+Running one CLI process per repository pays interpreter startup, imports,
+rule compilation and template parsing every time. run_batch instead feeds
+repositories to a bounded pool of long-lived worker processes. Each worker
+sets up the SAST rule engine, the template engine and the analysis cache
+once and reuses them for every repository it is given.
+
+Results are yielded (and written by the CLI as JSON Lines) as soon as each
+repository finishes. A failing repository produces an error record instead
+of stopping the batch; if a worker process dies outright, the repositories
+it may have been working on are retried one at a time in a fresh pool, and
+only the one that kills its worker again is reported as an error.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from hashlib import blake2b
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .analyzers.analysis_cache import AnalysisCache
+from .analyzers.repo_analyzer import RepositoryAnalyzer
+from .config.config_parser import ConfigParser
+from .generators.pipeline_generator import PLATFORM_TEMPLATE_DIRS, PipelineGenerator, template_engine
+from .inventory.file_inventory import FileInventory
+from .scanners.sast_rules import compiled_engine
+from .scanners.security_scanner import SecurityScanner
+
+
+STAGES = ('analyze', 'scan', 'generate')
+
+# A repository in flight when a worker died gets this many more tries
+CRASH_RETRIES = 1
+
+
+class BatchOptions(NamedTuple):
+    """What to run for every repository in a batch"""
+    stages: Tuple[str, ...] = STAGES        # analyze always runs; the others are optional
+    scanners: Tuple[str, ...] = ('sast',)
+    output_dir: str = 'batch_output'        # one subdirectory per repository
+    platform: str = 'github'
+    use_cache: bool = True
+    scan_deadline: Optional[float] = None   # seconds per repository
+    org_config: Optional[str] = None        # config layered under every repository's own
+
+
+# Per-process state, set up once by init_worker
+_options: Optional[BatchOptions] = None
+_analysis_cache: Optional[AnalysisCache] = None
+
+
+def read_manifest(path: str) -> List[str]:
+    """Repository paths from a manifest: one per line, '#' starts a comment
+
+    Relative paths are taken relative to the manifest's directory.
+    """
+    base = Path(path).resolve().parent
+    repos = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                repos.append(str(base / line))
+    return repos
+
+
+def repo_output_dir(output_dir: str, repo_path: str) -> Path:
+    """Per-repository output directory; the hash keeps same-named repos apart"""
+    resolved = os.path.realpath(repo_path)
+    suffix = blake2b(resolved.encode('utf-8', errors='surrogateescape'), digest_size=4).hexdigest()
+    return Path(output_dir) / f'{Path(resolved).name}-{suffix}'
+
+
+def init_worker(options: BatchOptions) -> None:
+    """Build everything that can be shared between repositories"""
+    global _options, _analysis_cache
+    _options = options
+    _analysis_cache = AnalysisCache() if options.use_cache else None
+    if 'scan' in options.stages and 'sast' in options.scanners:
+        compiled_engine(tuple(SecurityScanner.SAST_RULES))
+    if 'generate' in options.stages:
+        engine = template_engine(options.platform)
+        for name in engine.env.list_templates():
+            engine.env.get_template(name)
+
+
+def process_repo(index: int, repo_path: str) -> Dict:
+    """Run the batch stages for one repository; never raises"""
+    options = _options
+    start = time.monotonic()
+    record: Dict = {'index': index, 'repo': repo_path, 'status': 'success'}
+    stage = 'analyze'
+    try:
+        if not os.path.isdir(repo_path):
+            raise ValueError(f"Repository path does not exist: {repo_path}")
+        output_path = repo_output_dir(options.output_dir, repo_path)
+        inventory = FileInventory(repo_path)
+        analysis = RepositoryAnalyzer(repo_path, inventory, cache=_analysis_cache).analyze()
+        record['analysis'] = analysis
+
+        if 'scan' in options.stages:
+            stage = 'scan'
+            scanner = SecurityScanner(repo_path, inventory=inventory)
+            record['scans'] = scanner.run_scans(list(options.scanners), str(output_path / 'security_reports'),
+                                                use_cache=options.use_cache, deadline=options.scan_deadline)
+
+        if 'generate' in options.stages:
+            stage = 'generate'
+            config = ConfigParser(repo_path, org_config=options.org_config).parse()
+            record['pipeline'] = PipelineGenerator(options.platform).generate(analysis, config, str(output_path))
+    except Exception as e:  # one broken repository must not stop the batch
+        record.update(status='error', stage=stage, error=f'{type(e).__name__}: {e}')
+    record['duration'] = round(time.monotonic() - start, 3)
+    return record
+
+
+def _crash_record(index: int, repo_path: str) -> Dict:
+    return {'index': index, 'repo': repo_path, 'status': 'error', 'stage': None,
+            'error': 'Worker process died while processing this repository', 'duration': None}
+
+
+def run_batch(repos: Iterable[str], options: BatchOptions = BatchOptions(), jobs: int = 1) -> Iterator[Dict]:
+    """Yield one result per repository, in the order they finish
+
+    jobs worker processes run at a time (0 means one per CPU); with jobs=1
+    everything runs in this process. Each result carries the repository's
+    position in repos as 'index'.
+    """
+    unknown = set(options.stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown batch stage: {', '.join(sorted(unknown))}")
+    if 'generate' in options.stages and options.platform not in PLATFORM_TEMPLATE_DIRS:
+        raise ValueError(f"Unsupported platform: {options.platform}")
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    if jobs == 1:
+        init_worker(options)
+        for index, repo_path in enumerate(repos):
+            yield process_repo(index, repo_path)
+        return
+
+    queue = deque(enumerate(repos))
+    attempts: Dict[int, int] = {}
+    while queue:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(options,))
+        in_flight = {}
+        crashed = []
+        try:
+            while (queue or in_flight) and not crashed:
+                # keep the pool busy without queueing the whole manifest;
+                # a retry runs alone so a second crash is surely its own
+                solo = any(index in attempts for index, _ in in_flight.values())
+                while queue and len(in_flight) < jobs * 2 and not solo:
+                    solo = queue[0][0] in attempts
+                    if solo and in_flight:
+                        break
+                    index, repo_path = queue.popleft()
+                    in_flight[pool.submit(process_repo, index, repo_path)] = (index, repo_path)
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, repo_path = in_flight.pop(future)
+                    try:
+                        record = future.result()
+                    except BrokenProcessPool:
+                        crashed.append((index, repo_path))
+                        continue
+                    yield record
+        finally:
+            pool.shutdown(wait=not crashed, cancel_futures=True)
+
+        # A dead worker breaks the whole pool: retry what was in flight
+        for index, repo_path in sorted(crashed + list(in_flight.values()), reverse=True):
+            attempts[index] = attempts.get(index, 0) + 1
+            if attempts[index] > CRASH_RETRIES:
+                yield _crash_record(index, repo_path)
+            else:
+                queue.appendleft((index, repo_path))
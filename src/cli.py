@@ -1,14 +1,367 @@
 # CLI interface for the pipeline generator
 # Added more commands and better error handling
+#
+# Each command imports its subsystem when it runs, so `version` or `analyze`
+# don't pay for jinja2, PyYAML or the scanners. Keep module-level imports
+# to click and the standard library; option values are validated by the
+# subsystems themselves (they raise ValueError) rather than click.Choice,
+# which would need their constants at import time.
 
 import click
+import json
 import sys
-from pathlib import Path
+
+
+# Functions listed by --profile
+PROFILE_TOP = 25
+
 
 @click.group()
-def cli():
-    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automati.e    """CI/CD Pipeline Generator - Automatically creates p    """CI/ja    """CI/CD Pipeline Generator - Autrk    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipeline Generator - Automatically creates p    """CI/CD Pipelinerat    """CI/CD Pipeline Generator - li    """CI/CD Pipeline Generator - Automati: implement actual generation
-    click.echo("✅ Pipeline generated")
+@click.option('--profile', is_flag=True, help='Run the command under cProfile and print the slowest functions')
+@click.option('--profile-out', default='pipeline-gen.prof', help='Where --profile saves the full stats')
+@click.option('--metrics', 'metrics_out', default=None, metavar='FILE',
+              help='Write per-stage timings and counters as JSON to FILE (- for stderr)')
+@click.pass_context
+def cli(ctx, profile, profile_out, metrics_out):
+    """CI/CD Pipeline Generator - Automatically creates pipelines for your repos"""
+    # both run when the command is done, even if it exits with an error
+    if profile:
+        _start_profiling(ctx, profile_out)
+    if metrics_out:
+        ctx.call_on_close(lambda: _write_metrics(metrics_out))
+
+
+def _start_profiling(ctx, output):
+    import cProfile
+    
+    profiler = cProfile.Profile()
+    
+    def finish():
+        import pstats
+        
+        profiler.disable()
+        profiler.dump_stats(output)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(PROFILE_TOP)
+        click.echo(f"Profile saved to {output} (python -m pstats {output})", err=True)
+    
+    ctx.call_on_close(finish)
+    profiler.enable()
+
+
+def _write_metrics(output):
+    from .instrumentation import metrics
+    
+    data = json.dumps(metrics.snapshot(), indent=2)
+    if output == '-':
+        click.echo(data, err=True)
+    else:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(data + '\n')
+
+
+@cli.command()
+@click.option('--repo-path', default='.', help='Path to the repository')
+@click.option('--refresh', is_flag=True, help='Re-analyze everything and update the cached result')
+@click.option('--no-cache', is_flag=True, help='Neither read nor write the analysis cache')
+@click.option('--sample', is_flag=True, help='Look at a sample of the files only (faster, approximate counts)')
+def analyze(repo_path, refresh, no_cache, sample):
+    """Analyze a repository and show detected technologies"""
+    from .analyzers.analysis_cache import AnalysisCache
+    from .analyzers.repo_analyzer import RepositoryAnalyzer
+    
+    cache = None if no_cache else AnalysisCache()
+    try:
+        results = RepositoryAnalyzer(repo_path, cache=cache).analyze(refresh=refresh, sample=sample)
+    except (OSError, ValueError) as e:
+        click.echo(f"❌ Analysis failed: {e}", err=True)
+        sys.exit(1)
+    click.echo(json.dumps(results, indent=2))
+
+
+def _print_scan_result(name, result):
+    status = result.get('status')
+    icon = '✅' if status == 'success' else '⚠️ '
+    duration = f", {result['duration']:.1f}s" if 'duration' in result else ''
+    click.echo(f"{icon} {name}: {status} ({result.get('issues_found', 0)} issues{duration})")
+    if result.get('message'):
+        click.echo(f"   {result['message']}")
+    counts = result.get('severity_counts') or result.get('category_counts')
+    if counts:
+        click.echo("   " + ", ".join(f"{key}: {n}" for key, n in sorted(counts.items())))
+    cache = result.get('cache')
+    if cache and cache.get('enabled'):
+        click.echo(f"   cache: {cache['hits'] + cache['rehash_hits']} hits, {cache['misses']} misses")
+    scope = result.get('since')
+    if scope and scope['mode'] == 'changed':
+        click.echo(f"   only files changed since {scope['ref']}: {scope['changed_files']}")
+    elif scope:
+        click.echo(f"   scanned everything, not just changes since {scope['ref']}: {scope['reason']}")
+    history = result.get('history')
+    if history and 'run_id' in history:
+        click.echo(f"   history: run {history['run_id']}, {history['new']} new, {history['fixed']} fixed, "
+                   f"{history['unchanged']} unchanged")
+    elif history:
+        click.echo(f"   history not recorded: {history['error']}")
+
+
+@cli.command()
+@click.option('--repo-path', default='.', help='Path to the repository')
+@click.option('--scanners', default='trivy,snyk,sast', help='Comma-separated list of scanners')
+@click.option('--output', default='security_reports', help='Directory for the reports')
+@click.option('--no-cache', is_flag=True, help='Rescan every file instead of reusing cached SAST findings')
+@click.option('--jobs', '-j', default=1, type=int, help='Worker processes for SAST (0 = one per CPU)')
+@click.option('--max-file-size', default=10, type=int, help='SAST size limit per file, in MB')
+@click.option('--large-files', default='chunk',
+              help='What SAST does with files over --max-file-size: chunk, sample or skip')
+@click.option('--parallel', is_flag=True, help='Run the scanners at the same time')
+@click.option('--deadline', default=None, type=float, help='Give up on scanners still running after this many seconds')
+@click.option('--no-history', is_flag=True, help="Don't add this scan to the scan history")
+@click.option('--report-format', default='jsonl',
+              help='SAST report format: jsonl, jsonl.gz or json (the old indented {"issues": [...]})')
+@click.option('--since', default=None, metavar='REF',
+              help='SAST only the files changed since this git ref (e.g. origin/main)')
+@click.option('--include-comments', is_flag=True, help='Also report SAST matches in comments and docstrings')
+@click.option('--entropy/--no-entropy', default=True, help='Report quoted strings random enough to be keys')
+@click.option('--hex-entropy', default=None, type=float,
+              help='Bits per character above which a hex string is reported (default 3.0)')
+@click.option('--base64-entropy', default=None, type=float,
+              help='Bits per character above which a base64 string is reported (default 4.5)')
+def scan(repo_path, scanners, output, no_cache, jobs, max_file_size, large_files, parallel, deadline, no_history,
+         report_format, since, include_comments, entropy, hex_entropy, base64_entropy):
+    """Run security scans on a repository"""
+    from .events import SocketPublisher, events_socket_path
+    from .scanners.entropy import EntropyThresholds
+    from .scanners.sast import ScanLimits
+    from .scanners.security_scanner import SecurityScanner
+    
+    thresholds = None
+    if entropy:
+        given = {'hex': hex_entropy, 'base64': base64_entropy}
+        thresholds = EntropyThresholds(**{charset: bits for charset, bits in given.items() if bits is not None})
+    limits = ScanLimits(max_file_size=max_file_size * 1024 * 1024, large_file_action=large_files,
+                        skip_comments=not include_comments, entropy=thresholds)
+    try:
+        # progress goes to a dashboard serving these reports, if one is running
+        publisher = SocketPublisher(events_socket_path(output))
+    except ValueError:
+        publisher = None
+    try:
+        scanner = SecurityScanner(repo_path, sast_limits=limits, report_format=report_format, events=publisher)
+    except ValueError as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+
+    names = [s.strip() for s in scanners.split(',') if s.strip()]
+    # results are printed as each scanner finishes
+    try:
+        scanner.run_scans(names, output, use_cache=not no_cache, jobs=jobs,
+                          parallel=parallel, deadline=deadline, on_result=_print_scan_result,
+                          history=not no_history, since=since)
+    finally:
+        if publisher is not None:
+            publisher.close()
+
+
+@cli.command()
+@click.option('--repo-path', default='.', help='Path to the repository')
+@click.option('--config', default=None, help='Path to pipeline config file')
+@click.option('--output', default='.github/workflows', help='Output directory for the workflow')
+@click.option('--platform', default='github', help='CI/CD platform to generate for')
+@click.option('--org-config', default=None,
+              help='Organization-wide config under the repository\'s (default: $PIPELINE_GEN_ORG_CONFIG)')
+@click.option('--set', 'overrides', multiple=True, metavar='KEY=VALUE',
+              help='Override one setting, e.g. security.snyk_enabled=true (repeatable)')
+def generate(repo_path, config, output, platform, org_config, overrides):
+    """Generate a CI/CD pipeline for a repository"""
+    from jinja2 import TemplateError
+    from .analyzers.analysis_cache import AnalysisCache
+    from .analyzers.repo_analyzer import RepositoryAnalyzer
+    from .config.config_parser import ConfigParser, parse_overrides
+    from .generators.pipeline_generator import PipelineGenerator
+    
+    try:
+        settings = parse_overrides(overrides)
+        analysis = RepositoryAnalyzer(repo_path, cache=AnalysisCache()).analyze()
+        pipeline_config = ConfigParser(repo_path, config, org_config, settings).parse()
+        output_file = PipelineGenerator(platform).generate(analysis, pipeline_config, output)
+    except (OSError, ValueError, TemplateError) as e:
+        click.echo(f"❌ Generation failed: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"✅ Pipeline generated: {output_file}")
+
+
+@cli.command()
+@click.option('--manifest', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='File listing repository paths, one per line')
+@click.option('--output', default='batch_output', help='Directory for per-repository reports and pipelines')
+@click.option('--results', default='-', help='Where to write JSON Lines results (- for stdout)')
+@click.option('--jobs', '-j', default=0, type=int, help='Repositories processed at once (0 = one per CPU)')
+@click.option('--stages', default='analyze,scan,generate', help='Comma-separated stages to run')
+@click.option('--scanners', default='sast', help='Comma-separated list of scanners for the scan stage')
+@click.option('--platform', default='github', help='CI/CD platform to generate for')
+@click.option('--no-cache', is_flag=True, help='Disable the analysis and SAST caches')
+@click.option('--deadline', default=None, type=float, help='Per-repository scan deadline in seconds')
+@click.option('--org-config', default=None,
+              help='Organization-wide config under each repository\'s (default: $PIPELINE_GEN_ORG_CONFIG)')
+def batch(manifest, output, results, jobs, stages, scanners, platform, no_cache, deadline, org_config):
+    """Analyze, scan and generate for every repository in a manifest"""
+    from .batch import BatchOptions, read_manifest, run_batch
+    
+    options = BatchOptions(
+        stages=tuple(s.strip() for s in stages.split(',') if s.strip()),
+        scanners=tuple(s.strip() for s in scanners.split(',') if s.strip()),
+        output_dir=output,
+        platform=platform,
+        use_cache=not no_cache,
+        scan_deadline=deadline,
+        org_config=org_config,
+    )
+    failed = total = 0
+    out = sys.stdout if results == '-' else open(results, 'w', encoding='utf-8')
+    try:
+        for record in run_batch(read_manifest(manifest), options, jobs=jobs):
+            total += 1
+            failed += record['status'] != 'success'
+            out.write(json.dumps(record, default=str) + '\n')
+            out.flush()  # stream: each line is usable as soon as it's written
+    except (OSError, ValueError) as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    click.echo(f"{total - failed} of {total} repositories succeeded", err=True)
+    if failed:
+        sys.exit(1)
+
+
+@cli.group()
+def history():
+    """Browse and compare past scans"""
+    pass
+
+
+def _open_history(reports):
+    from pathlib import Path
+    from .reports.scan_history import HISTORY_FILENAME, ScanHistory
+    
+    path = Path(reports) / HISTORY_FILENAME
+    if not path.exists():
+        click.echo(f"❌ No scan history in {reports}", err=True)
+        sys.exit(1)
+    return ScanHistory(str(path))
+
+
+@history.command('runs')
+@click.option('--reports', default='security_reports', help='Directory the scans wrote their reports to')
+@click.option('--repo-path', default=None, help='Only runs of this repository')
+@click.option('--scanner', default=None, help='Only runs of this scanner')
+@click.option('--limit', default=20, type=int, help='How many runs to show')
+def history_runs(reports, repo_path, scanner, limit):
+    """List past scan runs, newest first"""
+    import os
+    from datetime import datetime
+    
+    repo = os.path.realpath(repo_path) if repo_path else None
+    with _open_history(reports) as store:
+        total, runs = store.runs(repo=repo, scanner=scanner, limit=limit)
+    for run in runs:
+        started = datetime.fromtimestamp(run['started']).isoformat(sep=' ', timespec='seconds')
+        click.echo(f"{run['id']:>6}  {started}  {run['scanner']:<6} {run['issues']:>6} issues  {run['repo']}")
+    click.echo(f"{len(runs)} of {total} runs", err=True)
+
+
+@history.command('diff')
+@click.argument('head', required=False, type=int)
+@click.option('--base', default=None, type=int, help='Run to compare against (default: the one before HEAD)')
+@click.option('--reports', default='security_reports', help='Directory the scans wrote their reports to')
+@click.option('--show', default='new,fixed', help='Comma-separated findings to list: new, fixed, unchanged')
+@click.option('--json', 'as_json', is_flag=True, help='Print the comparison as JSON')
+def history_diff(head, base, reports, show, as_json):
+    """Compare a run (default: the latest) with an earlier one"""
+    kinds = [k.strip() for k in show.split(',') if k.strip()]
+    with _open_history(reports) as store:
+        if head is None:
+            _, latest = store.runs(limit=1)
+            head = latest[0]['id'] if latest else None
+        if base is None and head is not None:
+            base = store.previous_run(head)
+        if head is None or base is None:
+            click.echo("❌ Need two runs to compare", err=True)
+            sys.exit(1)
+        try:
+            counts = store.compare(base, head)
+            findings = {kind: store.delta(base, head, kind) for kind in kinds}
+        except ValueError as e:
+            click.echo(f"❌ {e}", err=True)
+            sys.exit(1)
+    
+    if as_json:
+        click.echo(json.dumps({'base': base, 'head': head, 'counts': counts, **findings}, indent=2))
+        return
+    click.echo(f"run {base} -> {head}: {counts['new']} new, {counts['fixed']} fixed, "
+               f"{counts['unchanged']} unchanged")
+    for kind, items in findings.items():
+        for finding in items:
+            click.echo(f"  {kind:<9} {finding['file']}:{finding['line']}  {finding['rule']}  {finding['code']}")
+
+
+@cli.group()
+def daemon():
+    """Keep a repository analyzed and scanned in memory"""
+    pass
+
+
+@daemon.command('serve')
+@click.option('--repo-path', default='.', help='Path to the repository')
+@click.option('--socket', 'socket_path', default=None, help='Unix socket to listen on (default: one per repository)')
+@click.option('--poll-interval', default=2.0, type=float, help='Seconds between checks when inotify is unavailable')
+def daemon_serve(repo_path, socket_path, poll_interval):
+    """Watch a repository and answer analyze/scan requests over a Unix socket"""
+    import os
+    import signal
+    from .daemon import WatchDaemon, make_watcher
+    from .inventory.file_inventory import IgnorePolicy
+    
+    try:
+        server = WatchDaemon(repo_path, socket_path,
+                             watcher=make_watcher(os.path.realpath(repo_path), IgnorePolicy(), poll_interval))
+        server.start()
+    except (OSError, ValueError) as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+    status = server.repo.status()
+    click.echo(f"watching {status['repo']} ({status['files']} files, {server.watcher.name}) "
+               f"on {server.socket_path}", err=True)
+    # stopped by a service manager: still remove the socket on the way out
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+@daemon.command('query')
+@click.argument('command')
+@click.option('--repo-path', default='.', help='Repository the daemon watches')
+@click.option('--socket', 'socket_path', default=None, help='Unix socket the daemon listens on')
+@click.option('--fresh', is_flag=True, help='Have the daemon pick up changes it may not have seen yet first')
+def daemon_query(command, repo_path, socket_path, fresh):
+    """Ask a running daemon: status, analyze, scan or refresh
+    
+    scan exits with status 1 when there are findings, for use in hooks.
+    """
+    from .daemon import default_socket_path, request
+    
+    try:
+        result = request(socket_path or default_socket_path(repo_path), command, fresh=fresh)
+    except ValueError as e:
+        click.echo(f"❌ {e}", err=True)
+        sys.exit(1)
+    click.echo(json.dumps(result, indent=2))
+    if command == 'scan' and result['issues_found']:
+        sys.exit(1)
+
 
 @cli.command()
 def version():
@@ -16,5 +369,10 @@ def version():
     click.echo("CI/CD Pipeline Generator v0.1.0")
     click.echo("Author: Mario Perez")
 
-if __name__ == '__main__':
+
+def main():
     cli()
+
+
+if __name__ == '__main__':
+    main()
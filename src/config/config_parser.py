@@ -1,11 +1,166 @@
 """
 Configuration parser - reads and validates pipeline configuration
+
+A configuration is built from layers, each overriding the one before:
+the built-in defaults, an organization-wide file (--org-config or
+$PIPELINE_GEN_ORG_CONFIG), the repository's own file and --set overrides.
+Layers are parsed once and never modified; merging builds new dicts, and
+parse() hands out a copy the caller is free to change.
+
+Batch runs parse the same org file, and often identical repo files, for
+thousands of repositories. Files are cached on (path, mtime, size) and
+their parsed content on a hash of the bytes, and merges are cached on the
+layers involved, so the defaults+org merge happens once per process.
 """
 
+import hashlib
+import json
 import os
-import yaml
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+import yaml
+
+from ..instrumentation import metrics
+
+# libyaml's loader is several times faster; fall back to the pure-Python one
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Environment variable naming an org-wide config applied under every repo's
+ORG_CONFIG_ENV = 'PIPELINE_GEN_ORG_CONFIG'
+
+# How many parsed files and merged configurations each process keeps
+LAYER_CACHE_SIZE = 4096
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _canonical(value: Any) -> Any:
+    """value with every key a string, so json can sort them
+
+    YAML keys needn't be strings (`on:` loads as True); the type is kept in
+    the key so True and 'True' still differ.
+    """
+    if isinstance(value, Mapping):
+        return {f'{type(key).__name__}:{key}': _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class Layer:
+    """One immutable configuration layer
+
+    Layers compare equal when their content does, wherever it came from,
+    so identical org files in different places share merge results.
+    """
+
+    __slots__ = ('data', 'digest')
+
+    def __init__(self, data: Dict):
+        canonical = json.dumps(_canonical(data), sort_keys=True, default=str).encode('utf-8')
+        self.digest = hashlib.blake2b(canonical, digest_size=16).hexdigest()
+        self.data: Mapping = _freeze(data)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Layer) and self.digest == other.digest
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f'Layer({self.digest[:12]})'
+
+
+def load_layer(path: str) -> Layer:
+    """The layer in a YAML file; raises OSError, or ValueError for bad content"""
+    st = os.stat(path)
+    return _file_layer(os.path.realpath(path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def _file_layer(path: str, mtime_ns: int, size: int) -> Layer:
+    with open(path, 'rb') as f:
+        data = f.read()
+    metrics.count('config.files_read')
+    return _content_layer(data)
+
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def _content_layer(data: bytes) -> Layer:
+    """Parsed once per distinct content, however many files have it"""
+    try:
+        config = yaml.load(data, Loader=SafeLoader)
+    except yaml.YAMLError as e:
+        raise ValueError(str(e)) from e
+    if config is None:
+        config = {}
+    if not isinstance(config, dict):
+        raise ValueError(f"expected a mapping at the top level, got {type(config).__name__}")
+    return Layer(config)
+
+
+def _merge(base: Mapping, override: Mapping) -> Dict:
+    """A new dict: override deep-merged over base, neither of them changed"""
+    merged = dict(base)
+    for key, value in override.items():
+        if key in merged and isinstance(merged[key], Mapping) and isinstance(value, Mapping):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+@lru_cache(maxsize=LAYER_CACHE_SIZE)
+def merge_layers(layers: Tuple[Layer, ...]) -> Mapping:
+    """The frozen deep merge of layers, later ones winning
+
+    Each prefix is cached too, so repos sharing defaults and an org layer
+    only pay for merging their own file.
+    """
+    if not layers:
+        return MappingProxyType({})
+    if len(layers) == 1:
+        return layers[0].data
+    metrics.count('config.merges')
+    # whatever _merge didn't rebuild is already frozen
+    return _freeze(_merge(merge_layers(layers[:-1]), layers[-1].data))
+
+
+def parse_overrides(settings: Iterable[str]) -> Dict:
+    """['security.snyk_enabled=true'] -> {'security': {'snyk_enabled': True}}
+
+    Values are read as YAML, so numbers, booleans and [lists] work.
+    """
+    overrides: Dict = {}
+    for text in settings:
+        key, sep, value = text.partition('=')
+        if not sep or not key.strip():
+            raise ValueError(f"Expected KEY=VALUE, got: {text}")
+        try:
+            result: Any = yaml.load(value, Loader=SafeLoader) if value.strip() else ''
+        except yaml.YAMLError as e:
+            raise ValueError(f"Bad value in {text}: {e}") from e
+        for part in reversed(key.strip().split('.')):
+            result = {part: result}
+        overrides = _merge(overrides, result)
+    return overrides
 
 
 class ConfigParser:
@@ -28,21 +183,39 @@ class ConfigParser:
         'notifications': {},
     }
     
-    def __init__(self, repo_path: str, config_file: Optional[str] = None):
+    def __init__(self, repo_path: str, config_file: Optional[str] = None, org_config: Optional[str] = None,
+                 overrides: Optional[Dict] = None):
         self.repo_path = Path(repo_path)
         self.config_file = config_file
+        self.org_config = org_config if org_config is not None else os.getenv(ORG_CONFIG_ENV) or None
+        self.overrides = overrides
     
     def parse(self) -> Dict:
         """Parse configuration file or use defaults"""
         
+        with metrics.span('config.parse'):
+            return _thaw(merge_layers(self.layers()))
+    
+    def layers(self) -> Tuple[Layer, ...]:
+        """Defaults, org config, repo config and overrides, the ones that exist"""
+        layers = [Layer(self.DEFAULT_CONFIG)]
+        if self.org_config:
+            # unlike a broken repo file, a broken org file fails loudly
+            try:
+                layers.append(load_layer(self.org_config))
+            except (OSError, ValueError) as e:
+                raise ValueError(f"Could not read org config {self.org_config}: {e}") from e
+        
         # Try to find config file
         config_path = self._find_config_file()
-        
         if config_path and config_path.exists():
-            return self._load_config(config_path)
-        else:
-            # Use defaults
-            return self.DEFAULT_CONFIG.copy()
+            layer = self._load_config(config_path)
+            if layer is not None:
+                layers.append(layer)
+        
+        if self.overrides:
+            layers.append(Layer(self.overrides))
+        return tuple(layers)
     
     def _find_config_file(self) -> Optional[Path]:
         """Find configuration file in repository"""
@@ -66,27 +239,11 @@ class ConfigParser:
         
         return None
     
-    def _load_config(self, config_path: Path) -> Dict:
+    def _load_config(self, config_path: Path) -> Optional[Layer]:
         """Load and parse YAML configuration file"""
         try:
-            with open(config_path, 'r') as f:
-                config = yaml.safe_load(f)
-            
-            # Merge with defaults (for missing keys)
-            merged_config = self.DEFAULT_CONFIG.copy()
-            if config:
-                self._deep_merge(merged_config, config)
-            
-            return merged_config
-        except Exception as e:
-            # If config file is invalid, use defaults
+            return load_layer(str(config_path))
+        except (OSError, ValueError) as e:
+            # If config file is invalid, fall back to the layers under it
             print(f"Warning: Could not parse config file: {e}")
-            return self.DEFAULT_CONFIG.copy()
-    
-    def _deep_merge(self, base: Dict, override: Dict) -> None:
-        """Deep merge override dict into base dict"""
-        for key, value in override.items():
-            if key in base and isinstance(base[key], dict) and isinstance(value, dict):
-                self._deep_merge(base[key], value)
-            else:
-                base[key] = value
+            return None
@@ -0,0 +1,463 @@
+"""
+Watch daemon - keeps a repository analyzed and scanned in memory
+
+Every `analyze` or `scan` run starts cold: walk the tree, compile the rules,
+read every file. The daemon does that once, then keeps the file list, the
+per-directory analysis and the per-file SAST findings in memory and applies
+changes as the filesystem reports them. With the optional `inotify_simple`
+package on Linux, changed paths come from inotify; otherwise the tree is
+re-walked every few seconds and compared with the previous listing. Only
+changed files are scanned again and only the top-level directories they are
+in are re-summarized for the analysis.
+
+Clients talk to it over a Unix socket, one JSON object per line each way:
+
+    {"command": "analyze"}                -> {"ok": true, "result": {...}}
+    {"command": "scan", "fresh": true}    -> {"ok": true, "result": {"issues_found": ..., "findings": [...]}}
+    {"command": "status"} / {"command": "refresh"}
+    {"command": "subscribe"}              -> one line per change event until the client hangs up
+
+"fresh" applies changes the watcher hasn't delivered yet before answering,
+for callers (pre-receive hooks) that just wrote the files they ask about.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from .analyzers.repo_analyzer import RepositoryAnalyzer
+from .events import EventBus, socket_dir
+from .instrumentation import metrics
+from .inventory.file_inventory import FileEntry, FileInventory, IgnorePolicy, top_level_dir
+from .scanners.code_mask import SAST_SUFFIXES
+from .scanners.sast import ScanLimits, scan_file
+from .scanners.sast_rules import DEFAULT_RULES, compiled_engine
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = flags = None
+
+
+# Seconds between two walks when there is no inotify
+POLL_INTERVAL = 2.0
+
+# Wait this long after the first inotify event for the rest of a save
+INOTIFY_SETTLE_MS = 50
+
+COMMANDS = ('status', 'analyze', 'scan', 'refresh', 'subscribe')
+
+
+def default_socket_path(repo_path: str) -> str:
+    """Where the daemon for a repository listens unless told otherwise
+
+    The socket goes in a directory only the current user can enter, so no
+    one else can bind the name first and answer in the daemon's place.
+    """
+    resolved = os.path.realpath(repo_path)
+    digest = hashlib.blake2b(resolved.encode('utf-8', errors='surrogateescape'), digest_size=6).hexdigest()
+    return os.path.join(socket_dir(), f'{digest}.sock')
+
+
+class WatchedRepo:
+    """In-memory file list, analysis and SAST findings of one repository"""
+
+    def __init__(self, repo_path: str, ignore_policy: Optional[IgnorePolicy] = None,
+                 sast_limits: Optional[ScanLimits] = None, events: Optional[EventBus] = None):
+        self.repo_path = os.path.realpath(repo_path)
+        if not os.path.isdir(self.repo_path):
+            raise ValueError(f"Repository path does not exist: {repo_path}")
+        self.ignore_policy = ignore_policy or IgnorePolicy()
+        self.sast_limits = sast_limits or ScanLimits()
+        self.events = events
+        self.analyzer = RepositoryAnalyzer(self.repo_path)
+        self.engine = compiled_engine(tuple(DEFAULT_RULES))
+        self.generation = 0  # bumped by every update that changed something
+        self.updated: Optional[float] = None
+        self._lock = threading.RLock()  # guards the state below; held only briefly
+        self._update_lock = threading.Lock()  # one update at a time
+        self._entries: Dict[str, FileEntry] = {}
+        self._hashes: Dict[str, str] = {}
+        self._findings: Dict[str, List[Dict]] = {}
+        self._partials: Dict[str, Dict] = {}  # top-level directory -> analyzer partial
+        self._dirty: Set[str] = set()  # top-level directories whose partial is stale
+        self._analysis: Optional[Dict] = None
+
+    def update(self, paths: Optional[Iterable[str]] = None) -> Dict:
+        """Apply what changed on disk; paths limits the check to those files
+
+        Without paths the whole tree is walked and compared with what is
+        held. Returns the number of files changed and removed.
+        """
+        with self._update_lock, metrics.span('watch.update'):
+            if paths is None:
+                current = {entry.path: entry for entry in FileInventory(self.repo_path, self.ignore_policy)}
+                with self._lock:
+                    candidates = set(current) | set(self._entries)
+            else:
+                candidates = set(paths)
+                current = {entry.path: entry
+                           for entry in FileInventory.for_paths(self.repo_path, candidates, self.ignore_policy)}
+
+            with self._lock:
+                changed = []
+                removed = []
+                for path in candidates:
+                    new, old = current.get(path), self._entries.get(path)
+                    if new is None:
+                        if old is not None:
+                            removed.append(path)
+                    elif old is None or (new.size, new.mtime_ns) != (old.size, old.mtime_ns):
+                        changed.append(new)
+                known_hashes = {entry.path: self._hashes.get(entry.path) for entry in changed}
+
+            # Scanned without the state lock so queries keep being answered meanwhile
+            scanned = {}
+            for entry in changed:
+                if entry.suffix in SAST_SUFFIXES:
+                    full_path = os.path.join(self.repo_path, entry.path)
+                    scanned[entry.path] = scan_file(entry.path, full_path, self.engine,
+                                                    known_hashes[entry.path], self.sast_limits)[:2]
+
+            with self._lock:
+                for entry in changed:
+                    self._entries[entry.path] = entry
+                    self._dirty.add(top_level_dir(entry.path))
+                    if entry.path in scanned:
+                        digest, issues = scanned[entry.path]
+                        if digest is None:
+                            # unreadable now; forget it rather than keep stale findings
+                            self._hashes.pop(entry.path, None)
+                            self._findings.pop(entry.path, None)
+                        elif issues is not None:
+                            self._hashes[entry.path] = digest
+                            self._findings[entry.path] = issues
+                for path in removed:
+                    del self._entries[path]
+                    self._hashes.pop(path, None)
+                    self._findings.pop(path, None)
+                    self._dirty.add(top_level_dir(path))
+                if changed or removed:
+                    self.generation += 1
+                    self._analysis = None
+                self.updated = time.time()
+                generation = self.generation
+
+        if (changed or removed) and self.events is not None:
+            self.events.publish('watch.changed', repo=self.repo_path, generation=generation,
+                                changed=len(changed), removed=len(removed))
+        return {'changed': len(changed), 'removed': len(removed)}
+
+    def analysis(self) -> Dict:
+        """The analyze result for the files held, re-summarizing changed directories only"""
+        with self._lock:
+            if self._analysis is None:
+                if self._dirty:
+                    by_top: Dict[str, List[FileEntry]] = {top: [] for top in self._dirty}
+                    for entry in self._entries.values():
+                        top = top_level_dir(entry.path)
+                        if top in by_top:
+                            by_top[top].append(entry)
+                    for top, entries in by_top.items():
+                        if entries:
+                            self._partials[top] = self.analyzer.summarize(entries)
+                        else:
+                            self._partials.pop(top, None)
+                    self._dirty.clear()
+                self._analysis = self.analyzer.combine(self._partials.values())
+            return self._analysis
+
+    def findings(self, limit: Optional[int] = None) -> Dict:
+        """SAST findings for the files held, in path order"""
+        with self._lock:
+            categories: Dict[str, int] = {}
+            issues: List[Dict] = []
+            for path in sorted(self._findings):
+                for issue in self._findings[path]:
+                    categories[issue['category']] = categories.get(issue['category'], 0) + 1
+                    if limit is None or len(issues) < limit:
+                        issues.append(issue)
+            return {'issues_found': sum(categories.values()), 'category_counts': categories, 'findings': issues}
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {'repo': self.repo_path, 'files': len(self._entries), 'generation': self.generation,
+                    'updated': self.updated}
+
+
+class PollingWatcher:
+    """Reports 'look at everything' every interval seconds"""
+
+    name = 'polling'
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+
+    def changes(self, stop: threading.Event) -> Iterator[Optional[Set[str]]]:
+        while not stop.wait(self.interval):
+            yield None
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Reports the paths inotify says changed (needs inotify_simple, Linux only)
+
+    Yields None, meaning "walk everything", when a directory appears,
+    disappears or moves, or when the kernel's event queue overflowed.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, repo_path: str, ignore_policy: IgnorePolicy):
+        self.repo_path = repo_path
+        self.ignore_policy = ignore_policy
+        self._inotify = INotify()
+        self._file_mask = flags.CLOSE_WRITE | flags.MODIFY | flags.CREATE | flags.DELETE | flags.MOVED_FROM | \
+            flags.MOVED_TO | flags.ATTRIB
+        self._dirs: Dict[int, str] = {}  # watch descriptor -> repo-relative directory
+        self._watch_tree('')
+
+    def _watch_tree(self, rel_dir: str) -> None:
+        top = os.path.join(self.repo_path, rel_dir)
+        for abs_dir, subdirs, _ in os.walk(top):
+            subdirs[:] = [d for d in subdirs if d not in self.ignore_policy.ignored_dirs]
+            rel = os.path.relpath(abs_dir, self.repo_path).replace(os.sep, '/')
+            try:
+                wd = self._inotify.add_watch(abs_dir, self._file_mask)
+            except OSError:
+                continue  # gone already, or out of watches (the caller can still poll)
+            self._dirs[wd] = '' if rel == '.' else rel
+
+    def changes(self, stop: threading.Event) -> Iterator[Optional[Set[str]]]:
+        while not stop.is_set():
+            events = self._inotify.read(timeout=500, read_delay=INOTIFY_SETTLE_MS)
+            if not events:
+                continue
+            paths: Set[str] = set()
+            rewalk = False
+            for event in events:
+                if event.mask & flags.Q_OVERFLOW:
+                    rewalk = True
+                    continue
+                if event.mask & flags.IGNORED:
+                    self._dirs.pop(event.wd, None)
+                    continue
+                rel_dir = self._dirs.get(event.wd)
+                if rel_dir is None or not event.name:
+                    continue
+                rel = f'{rel_dir}/{event.name}' if rel_dir else event.name
+                if event.mask & flags.ISDIR:
+                    if event.mask & (flags.CREATE | flags.MOVED_TO):
+                        self._watch_tree(rel)
+                    rewalk = True
+                else:
+                    paths.add(rel)
+            yield None if rewalk else paths
+
+    def close(self) -> None:
+        self._inotify.close()
+
+
+def make_watcher(repo_path: str, ignore_policy: IgnorePolicy, poll_interval: float = POLL_INTERVAL):
+    """inotify when it is available, polling otherwise"""
+    if INotify is not None:
+        try:
+            return InotifyWatcher(repo_path, ignore_policy)
+        except OSError:
+            pass  # e.g. inotify instance limit reached
+    return PollingWatcher(poll_interval)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon: 'WatchDaemon' = self.server.watch_daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Expected a JSON object")
+                command = request.get('command')
+                if command == 'subscribe':
+                    self._stream(daemon)
+                    return
+                reply = {'ok': True, 'result': daemon.handle(command, request)}
+            except (ValueError, TypeError, AttributeError, OSError) as e:
+                # OSError: e.g. a directory removed while a refresh walked it
+                reply = {'ok': False, 'error': str(e)}
+            self._send(reply)
+
+    def _send(self, message: Dict) -> None:
+        self.wfile.write(json.dumps(message, default=str).encode('utf-8') + b'\n')
+        self.wfile.flush()
+
+    def _stream(self, daemon: 'WatchDaemon') -> None:
+        with daemon.bus.subscribe() as subscription:
+            self._send({'ok': True, 'result': {'subscribed': True}})
+            while not daemon.stopping.is_set():
+                event = subscription.get(timeout=1.0)
+                if event is not None:
+                    try:
+                        self._send({'id': event.id, 'type': event.type, 'data': event.data})
+                    except OSError:
+                        return  # the client went away
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class WatchDaemon:
+    """Serves a WatchedRepo over a Unix socket while a watcher keeps it current"""
+
+    def __init__(self, repo_path: str, socket_path: Optional[str] = None, watcher=None,
+                 ignore_policy: Optional[IgnorePolicy] = None, sast_limits: Optional[ScanLimits] = None):
+        self.bus = EventBus()
+        self.repo = WatchedRepo(repo_path, ignore_policy, sast_limits, events=self.bus)
+        self.socket_path = socket_path or default_socket_path(repo_path)
+        self.watcher = watcher or make_watcher(self.repo.repo_path, self.repo.ignore_policy)
+        self.stopping = threading.Event()
+        self._server: Optional[_Server] = None
+        self._watch_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Load the repository, bind the socket and start watching"""
+        self.repo.update()
+        if os.path.exists(self.socket_path):
+            if _is_listening(self.socket_path):
+                raise ValueError(f"A daemon is already listening on {self.socket_path}")
+            os.unlink(self.socket_path)  # left over from one that crashed
+        old_umask = os.umask(0o177)  # only the owner may connect
+        try:
+            self._server = _Server(self.socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.watch_daemon = self
+        self._watch_thread = threading.Thread(target=self._watch, name='watcher', daemon=True)
+        self._watch_thread.start()
+
+    def serve_forever(self) -> None:
+        if self._server is None:
+            self.start()
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self.stopping.set()
+        self.watcher.close()
+        if self._server is not None:
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    def shutdown(self) -> None:
+        """Stop serve_forever from another thread"""
+        if self._server is not None:
+            self._server.shutdown()
+
+    def handle(self, command: str, request: Dict) -> Dict:
+        if command not in COMMANDS:
+            raise ValueError(f"Unknown command: {command} (expected one of {', '.join(COMMANDS)})")
+        fresh = request.get('fresh', False)
+        if not isinstance(fresh, bool):
+            raise ValueError(f"fresh must be true or false, got {fresh!r}")
+        if command == 'refresh' or fresh:
+            changes = self.repo.update()
+            if command == 'refresh':
+                return changes
+        if command == 'analyze':
+            return self.repo.analysis()
+        if command == 'scan':
+            limit = request.get('limit')
+            if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 0):
+                raise ValueError(f"limit must be a non-negative integer, got {limit!r}")
+            return self.repo.findings(limit)
+        return dict(self.repo.status(), watcher=self.watcher.name)
+
+    def _watch(self) -> None:
+        for paths in self.watcher.changes(self.stopping):
+            try:
+                self.repo.update(paths)
+            except OSError:
+                pass  # the next round sees the tree as it is by then
+
+
+def _is_listening(socket_path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+
+def _connect(socket_path: str, timeout: Optional[float]) -> socket.socket:
+    try:
+        owner = os.stat(socket_path).st_uid
+    except OSError as e:
+        raise ValueError(f"No daemon listening on {socket_path}: {e}") from e
+    if owner != os.getuid():
+        # someone else's socket would get to answer our scans
+        raise ValueError(f"Refusing to connect to {socket_path}: it belongs to another user")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError as e:
+        sock.close()
+        raise ValueError(f"No daemon listening on {socket_path}: {e}") from e
+    return sock
+
+
+def request(socket_path: str, command: str, timeout: Optional[float] = 60.0, **params) -> Dict:
+    """Send one command to a running daemon and return its result
+
+    Raises ValueError if nothing is listening or the daemon reports an error.
+    """
+    with _connect(socket_path, timeout) as sock, sock.makefile('rwb') as stream:
+        stream.write(json.dumps({'command': command, **params}).encode('utf-8') + b'\n')
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise ValueError("The daemon closed the connection without answering")
+    reply = json.loads(line)
+    if not reply.get('ok'):
+        raise ValueError(reply.get('error', 'request failed'))
+    return reply['result']
+
+
+def subscribe(socket_path: str) -> Iterator[Dict]:
+    """Change events from a running daemon, as they happen
+
+    Subscribes before returning, so no event after the call is missed.
+    """
+    sock = _connect(socket_path, None)
+    stream = sock.makefile('rwb')
+    try:
+        stream.write(b'{"command": "subscribe"}\n')
+        stream.flush()
+        stream.readline()  # the acknowledgement
+    except OSError:
+        stream.close()
+        sock.close()
+        raise
+    return _read_events(sock, stream)
+
+
+def _read_events(sock: socket.socket, stream) -> Iterator[Dict]:
+    with sock, stream:
+        for line in stream:
+            yield json.loads(line)
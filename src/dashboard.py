@@ -1,15 +1,27 @@
 """
 Optional web dashboard for viewing pipeline configurations and security reports
 
-This is pretty basic right now - just serves static reports
-TODO: Make it more interactive with real-time updates
+Serves the stored reports plus a live feed of scan progress (/api/events),
+including scans other processes run with their reports in REPORTS_DIR.
 """
 
-from flask import Flask, render_template, jsonify, send_from_directory
+from flask import (
+    Flask, Response, g, render_template, jsonify, request, send_file, send_from_directory, stream_with_context,
+)
 from flask_cors import CORS
+import gzip
 import json
 import os
+import time
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, Optional
+
+from .events import EventRelay, default_bus, events_socket_path
+from .instrumentation import metrics
+from .reports.compressed import ENCODING_SUFFIXES, fresh_sibling
+from .reports.report_index import REPORT_SUFFIXES, ReportIndex
+from .reports.scan_history import DELTA_KINDS, HISTORY_FILENAME, ScanHistory
 
 app = Flask(__name__)
 CORS(app)
@@ -29,63 +41,332 @@ def index():
             body { font-family: Arial; margin: 40px; }
             h1 { color: #333; }
             .report { margin: 20px 0; padding: 20px; border: 1px solid #ddd; }
+            #events { font-family: monospace; font-size: 12px; color: #555; }
         </style>
     </head>
     <body>
         <h1>CI/CD Pipeline Dashboard</h1>
         <p>Security Reports:</p>
         <div id="reports"></div>
+        <p>Live scan progress:</p>
+        <div id="events"></div>
         
         <script>
-            // TODO: fetch actual reports and display them
-            document.getElementById('reports').innerHTML = 
-                '<p>No reports available. Run security scans first.</p>';
+            function showReports() {
+                fetch('/api/reports').then(r => r.json()).then(body => {
+                    const el = document.getElementById('reports');
+                    if (!body.reports.length) {
+                        el.innerHTML = '<p>No reports available. Run security scans first.</p>';
+                        return;
+                    }
+                    el.innerHTML = '';
+                    body.reports.forEach(report => {
+                        const div = document.createElement('div');
+                        div.className = 'report';
+                        div.textContent = report.name + ': ' + report.issues + ' issues';
+                        el.appendChild(div);
+                    });
+                });
+            }
+            showReports();
+            
+            const log = document.getElementById('events');
+            const source = new EventSource('/api/events');
+            ['scan.started', 'scanner.state', 'sast.progress', 'scan.finished'].forEach(type => {
+                source.addEventListener(type, e => {
+                    const line = document.createElement('div');
+                    line.textContent = type + ' ' + e.data;
+                    log.prepend(line);
+                    if (type === 'scan.finished') showReports();
+                });
+            });
         </script>
     </body>
     </html>
     '''
 
 
+# Largest page /api/reports hands out
+MAX_PER_PAGE = 200
+
+_indexes: Dict[str, ReportIndex] = {}
+
+
+def get_index() -> ReportIndex:
+    """The report index for REPORTS_DIR, built on first use"""
+    key = str(REPORTS_DIR)
+    if key not in _indexes:
+        _indexes[key] = ReportIndex(key)
+    return _indexes[key]
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds or an ISO 8601 date/time"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _page_args():
+    """(page, per_page) from the query string"""
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = min(MAX_PER_PAGE, max(1, request.args.get('per_page', 50, type=int)))
+    return page, per_page
+
+
 @app.route('/api/reports')
 def get_reports():
-    """Get list of available security reports"""
-    if not REPORTS_DIR.exists():
-        return jsonify({'reports': []})
+    """List report summaries, newest first
     
-    reports = []
-    for report_file in REPORTS_DIR.glob('*.json'):
-        try:
-            with open(report_file, 'r') as f:
-                data = json.load(f)
-                reports.append({
-                    'name': report_file.stem,
-                    'file': report_file.name,
-                    'data': data
-                })
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass  # skip invalid files
+    Query parameters: page, per_page, scanner, since, until (epoch seconds
+    or ISO dates), min_issues and name (substring). Full reports are served
+    by /api/reports/<filename>.
+    """
+    args = request.args
+    page, per_page = _page_args()
+    try:
+        since = _parse_time(args.get('since'))
+        until = _parse_time(args.get('until'))
+        min_issues = args.get('min_issues', None, type=int)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
     
-    return jsonify({'reports': reports})
+    total, summaries = get_index().query(
+        scanner=args.get('scanner'), since=since, until=until, min_issues=min_issues,
+        name=args.get('name'), offset=(page - 1) * per_page, limit=per_page,
+    )
+    return jsonify({
+        'reports': [summary.to_dict() for summary in summaries],
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+    })
+
+
+def open_history() -> Optional[ScanHistory]:
+    """The scan history in REPORTS_DIR, or None before the first scan"""
+    path = REPORTS_DIR / HISTORY_FILENAME
+    # SQLite connections can't be shared between request threads; opening one is cheap
+    return ScanHistory(str(path)) if path.exists() else None
+
+
+@app.route('/api/history/runs')
+def get_history_runs():
+    """List recorded scan runs, newest first (filters: repo, scanner)"""
+    page, per_page = _page_args()
+    history = open_history()
+    total, runs = 0, []
+    if history:
+        with history:
+            total, runs = history.runs(repo=request.args.get('repo'), scanner=request.args.get('scanner'),
+                                       offset=(page - 1) * per_page, limit=per_page)
+    return jsonify({'runs': runs, 'total': total, 'page': page, 'per_page': per_page})
+
+
+@app.route('/api/history/runs/<int:run_id>')
+def get_history_run(run_id):
+    """One run and a page of its findings (filters: rule, file)"""
+    page, per_page = _page_args()
+    history = open_history()
+    if history is None:
+        return jsonify({'error': 'Run not found'}), 404
+    with history:
+        run = history.run(run_id)
+        if run is None:
+            return jsonify({'error': 'Run not found'}), 404
+        findings = history.findings(run_id, rule=request.args.get('rule'), file=request.args.get('file'),
+                                    offset=(page - 1) * per_page, limit=per_page)
+    return jsonify({'run': run, 'findings': findings, 'page': page, 'per_page': per_page})
+
+
+@app.route('/api/history/compare')
+def compare_runs():
+    """New, fixed and unchanged findings between two runs
+    
+    Query parameters: head (run id), base (default: the run before head for
+    the same repository and scanner), kind (new, fixed or unchanged; which
+    findings to list), page and per_page.
+    """
+    head = request.args.get('head', type=int)
+    base = request.args.get('base', type=int)
+    kind = request.args.get('kind', 'new')
+    if head is None or kind not in DELTA_KINDS:
+        return jsonify({'error': f"Invalid query: need head and a kind of {', '.join(DELTA_KINDS)}"}), 400
+    page, per_page = _page_args()
+    history = open_history()
+    if history is None:
+        return jsonify({'error': 'Run not found'}), 404
+    with history:
+        if base is None:
+            base = history.previous_run(head)
+        if base is None:
+            return jsonify({'error': 'No earlier run to compare with'}), 404
+        try:
+            counts = history.compare(base, head)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 404
+        findings = history.delta(base, head, kind, offset=(page - 1) * per_page, limit=per_page)
+    return jsonify({'base': base, 'head': head, 'counts': counts, 'kind': kind,
+                    'findings': findings, 'total': counts[kind], 'page': page, 'per_page': per_page})
+
+
+def _pick_encoding(report_path: Path, st: os.stat_result) -> Optional[str]:
+    """Best precompressed encoding the client accepts, or None for identity"""
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in ENCODING_SUFFIXES:
+        quality = accepted[encoding]
+        if quality > best_quality and fresh_sibling(str(report_path), encoding, st):
+            best, best_quality = encoding, quality
+    return best
+
+
+def _is_report_name(filename: str) -> bool:
+    """A report (or a precompressed copy of one), not the caches, history or temp files beside them"""
+    if filename.startswith('.'):
+        return False
+    for suffix in ENCODING_SUFFIXES.values():
+        if filename.endswith(suffix) and filename[:-len(suffix)].endswith(REPORT_SUFFIXES):
+            return True
+    return filename.endswith(REPORT_SUFFIXES)
 
 
 @app.route('/api/reports/<filename>')
 def get_report(filename):
-    """Get specific security report"""
+    """Get specific security report
+    
+    The stored file is streamed as is (or its precompressed sibling when the
+    client accepts gzip/br), with ETag and Last-Modified so clients can
+    revalidate with a 304 instead of downloading it again.
+    """
     # Validate filename to prevent path traversal
     if '..' in filename or '/' in filename or '\\' in filename:
         return jsonify({'error': 'Invalid filename'}), 400
+    if not _is_report_name(filename):
+        return jsonify({'error': 'Report not found'}), 404
     
     report_path = REPORTS_DIR / filename
     
-    if not report_path.exists():
+    try:
+        st = os.stat(report_path)
+    except OSError:
         return jsonify({'error': 'Report not found'}), 404
     
+    mimetype = 'application/x-ndjson' if '.jsonl' in filename else 'application/json'
+    if filename.endswith('.br'):
+        # a precompressed sibling asked for by name; nothing here can inflate it
+        if request.accept_encodings['br'] <= 0:
+            return jsonify({'error': 'This report is brotli-compressed (Accept-Encoding: br)'}), 406
+        encoding = 'br'
+        body = os.path.abspath(report_path)
+    elif filename.endswith('.gz'):
+        # stored gzipped (scan --report-format jsonl.gz): send it as is, or
+        # inflate it on the way out for the odd client that can't take gzip
+        accepts_gzip = request.accept_encodings['gzip'] > 0
+        encoding = 'gzip' if accepts_gzip else None
+        body = os.path.abspath(report_path) if accepts_gzip else gzip.open(report_path, 'rb')
+    else:
+        encoding = _pick_encoding(report_path, st)
+        body = os.path.abspath(str(report_path) + ENCODING_SUFFIXES[encoding] if encoding else str(report_path))
+    # one ETag per representation, changing whenever the report does
+    etag = f'{st.st_size:x}-{st.st_mtime_ns:x}' + (f'-{encoding}' if encoding else '')
+    
     try:
-        with open(report_path, 'r') as f:
-            data = json.load(f)
-        return jsonify(data)
-    except (FileNotFoundError, json.JSONDecodeError):
+        response = send_file(
+            body,
+            mimetype=mimetype,
+            etag=etag,
+            last_modified=st.st_mtime,
+            conditional=True,
+        )
+    except OSError:
         return jsonify({'error': 'Could not read report'}), 500
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.no_cache = True  # always revalidate; it's a cheap 304
+    return response
+
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_HEARTBEAT = 15
+
+
+def _sse_stream(subscription, heartbeat: float = SSE_HEARTBEAT):
+    """Format bus events as Server-Sent Events until the client goes away"""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            event = subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ': keepalive\n\n'  # also how we notice a closed connection
+                continue
+            yield f'id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n'
+    finally:
+        subscription.close()
+
+
+@app.route('/api/events')
+def events():
+    """Live scan events as Server-Sent Events
+    
+    Scans in this process publish their progress on the bus, and the event
+    relay publishes there what `scan` commands writing to REPORTS_DIR send.
+    Each client gets its own bounded queue on the event bus, so a slow
+    client only loses its own oldest events and never slows a scan down.
+    """
+    _start_event_relay()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscription = default_bus.subscribe(last_event_id=last_event_id)
+    response = Response(stream_with_context(_sse_stream(subscription)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
+
+
+# Takes events from scans run in other processes (see src/events.py)
+event_relay = EventRelay(default_bus)
+
+
+def _start_event_relay() -> None:
+    try:
+        event_relay.start(events_socket_path(str(REPORTS_DIR)))
+    except (OSError, ValueError) as e:
+        # the stream still carries this process's events
+        app.logger.warning("Not relaying events from other processes: %s", e)
+
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None and request.endpoint:
+        # streams (/api/events) are timed until their headers go out
+        metrics.observe(f'dashboard.{request.endpoint}', time.perf_counter() - start)
+    return response
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Timings and counters from this process, in the Prometheus text format
+    
+    Covers the dashboard's own request handling; scans report their timings
+    with `--metrics` in the process that runs them.
+    """
+    return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/metrics')
+def json_metrics():
+    """The same as /metrics, as JSON"""
+    return jsonify(metrics.snapshot())
 
 
 @app.route('/health')
@@ -0,0 +1,261 @@
+"""
+Event bus - fans progress events out to any number of listeners
+
+Publishing never blocks and never waits on a listener: every subscriber
+gets its own bounded queue, and when a slow subscriber (say, a browser on a
+bad connection) falls behind, its oldest events are dropped rather than
+holding up the scan that publishes them. The bus also keeps the last few
+events so a reconnecting client can pick up where it left off.
+
+A scan in another process reaches a dashboard's bus through a Unix
+datagram socket: SocketPublisher sends each event as one datagram, without
+waiting, and the dashboard's EventRelay publishes what arrives.
+"""
+
+import errno
+import hashlib
+import itertools
+import json
+import os
+import socket
+import stat
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+
+# Largest event sent between processes; bigger ones are dropped
+MAX_EVENT_BYTES = 64 * 1024
+
+
+class Event(NamedTuple):
+    id: int
+    type: str
+    data: Dict
+    time: float
+
+
+class Subscription:
+    """One listener's queue; read it with get() and close() it when done"""
+
+    def __init__(self, bus: 'EventBus', maxsize: int):
+        self._bus = bus
+        self._queue: Deque[Event] = deque(maxlen=maxsize)
+        self._ready = threading.Condition(threading.Lock())
+        self.dropped = 0
+        self.closed = False
+
+    def _put(self, event: Event) -> None:
+        with self._ready:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1  # the deque drops the oldest for us
+            self._queue.append(event)
+            self._ready.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Next event, waiting up to timeout seconds; None if none arrived"""
+        with self._ready:
+            if not self._queue and not self.closed:
+                self._ready.wait(timeout)
+            return self._queue.popleft() if self._queue else None
+
+    def close(self) -> None:
+        self._bus._unsubscribe(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def __enter__(self) -> 'Subscription':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class EventBus:
+    """In-process publish/subscribe with bounded, drop-oldest queues"""
+
+    def __init__(self, history: int = 100):
+        self._subscribers: List[Subscription] = []
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, **data) -> Event:
+        with self._lock:
+            event = Event(next(self._ids), event_type, data, time.time())
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber._put(event)
+        return event
+
+    def subscribe(self, maxsize: int = 256, last_event_id: Optional[int] = None) -> Subscription:
+        """New listener; with last_event_id, replay the newer events still kept"""
+        subscription = Subscription(self, maxsize)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event.id > last_event_id:
+                        subscription._put(event)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+# Shared by the dashboard, its event relay and any scan run in its process
+default_bus = EventBus()
+
+
+def socket_dir() -> str:
+    """$XDG_RUNTIME_DIR/pipeline-gen, or a per-user directory in the temp dir
+
+    Raises ValueError if the directory exists but belongs to someone else
+    or others can get into it.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        path = os.path.join(runtime_dir, 'pipeline-gen')
+    else:
+        path = os.path.join(tempfile.gettempdir(), f'pipeline-gen-{os.getuid()}')
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise ValueError(f"Refusing to use {path} for sockets: it must be a directory "
+                         f"owned by the current user and closed to others (mode 0700)")
+    return path
+
+
+def events_socket_path(reports_dir: str) -> str:
+    """Where a dashboard serving reports_dir takes events from other processes"""
+    resolved = os.path.realpath(reports_dir)
+    digest = hashlib.blake2b(resolved.encode('utf-8', errors='surrogateescape'), digest_size=6).hexdigest()
+    return os.path.join(socket_dir(), f'events-{digest}.sock')
+
+
+class SocketPublisher:
+    """Sends events to the EventRelay on socket_path, if one is listening
+
+    Has the publish() of an EventBus, so a scan can be given one as its
+    events. Sending never blocks: with no relay listening, or one that has
+    fallen behind and has a full socket buffer, the event is dropped.
+    """
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.sent = 0
+        self.dropped = 0
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._lock = threading.Lock()  # scanners publish from threads with --parallel
+
+    def publish(self, event_type: str, **data) -> None:
+        message = json.dumps({'type': event_type, 'data': data}, default=str).encode('utf-8')
+        with self._lock:
+            if len(message) > MAX_EVENT_BYTES:
+                self.dropped += 1
+                return
+            try:
+                self._sock.sendto(message, self.socket_path)
+                self.sent += 1
+            except OSError:
+                self.dropped += 1
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self) -> 'SocketPublisher':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class EventRelay:
+    """Publishes on a bus the events SocketPublishers in other processes send"""
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self.socket_path: Optional[str] = None
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def start(self, socket_path: str) -> None:
+        """Bind socket_path and relay from a background thread; a no-op once started
+
+        Raises OSError if another process is already relaying on socket_path.
+        """
+        with self._lock:
+            if self._sock is not None:
+                return
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                _bind(sock, socket_path)
+            except OSError:
+                sock.close()
+                raise
+            sock.settimeout(1.0)  # so the thread notices close()
+            self._sock, self.socket_path = sock, socket_path
+        threading.Thread(target=self._run, args=(sock,), name='event-relay', daemon=True).start()
+
+    def relay(self, message: bytes) -> bool:
+        """Publish one received datagram; False if it wasn't an event"""
+        try:
+            event = json.loads(message)
+            if not isinstance(event.get('type'), str) or not isinstance(event.get('data'), dict):
+                return False
+            self.bus.publish(event['type'], **event['data'])
+        except (ValueError, TypeError, AttributeError):
+            return False
+        return True
+
+    def _run(self, sock: socket.socket) -> None:
+        while self._sock is sock:
+            try:
+                message = sock.recv(MAX_EVENT_BYTES)
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # closed
+            self.relay(message)
+
+    def close(self) -> None:
+        with self._lock:
+            sock, self._sock = self._sock, None
+            if sock is not None:
+                sock.close()
+                try:
+                    os.unlink(self.socket_path)
+                except OSError:
+                    pass
+
+
+def _bind(sock: socket.socket, socket_path: str) -> None:
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)  # left over from a relay that crashed
+        else:
+            raise OSError(errno.EADDRINUSE, "Another process is relaying events on", socket_path)
+        finally:
+            probe.close()
+    old_umask = os.umask(0o177)  # only the owner may send
+    try:
+        sock.bind(socket_path)
+    finally:
+        os.umask(old_umask)
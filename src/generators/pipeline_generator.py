@@ -1,9 +1,147 @@
-# Pipeline generator - creates CI/CD pipelines
-# TODO: implement template selection
+"""
+Pipeline generator - renders CI/CD workflows from the repository analysis
+
+Every PipelineGenerator for a platform shares one TemplateEngine per
+process. The engine owns a single long-lived Jinja2 Environment: templates
+are loaded and compiled on first use, kept compiled in memory, and their
+bytecode is cached on disk so a fresh process skips the parse as well.
+Rendered workflows are kept in an LRU keyed on a fingerprint of the
+template file, the analysis and the config, so regenerating an unchanged
+repository costs one stat and a dict lookup.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined
+
+from ..config.config_parser import ConfigParser
+from ..instrumentation import metrics
+
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent.parent / 'templates'
+
+# platform name -> directory under TEMPLATES_DIR
+PLATFORM_TEMPLATE_DIRS = {
+    'github': 'github_actions',
+}
+
+OUTPUT_FILENAME = 'ci-cd-pipeline.yml'
+
+# Jinja keys cached bytecode on the template alone, not on Environment
+# options; bump when the options change so stale bytecode isn't loaded
+BYTECODE_PATTERN = 'pipeline-gen-v1-%s.cache'
+
+# language -> template; languages without one get the generic template
+LANGUAGE_TEMPLATES = {
+    'python': 'python-pipeline.yml.j2',
+    'javascript': 'node-pipeline.yml.j2',
+    'typescript': 'node-pipeline.yml.j2',
+}
+
+
+class TemplateEngine:
+    """Long-lived Jinja2 environment with an LRU of rendered output"""
+
+    def __init__(self, template_dir: Path, bytecode_dir: Optional[str] = None, max_rendered: int = 512):
+        self.template_dir = Path(template_dir)
+        self.env = Environment(
+            loader=FileSystemLoader(str(self.template_dir)),
+            # None lets Jinja pick a per-user directory under the system temp dir
+            bytecode_cache=FileSystemBytecodeCache(bytecode_dir, BYTECODE_PATTERN),
+            auto_reload=True,   # an edited template is recompiled on next use
+            keep_trailing_newline=True,
+            undefined=StrictUndefined,
+        )
+        self.max_rendered = max_rendered
+        self._rendered: 'OrderedDict[str, str]' = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def fingerprint(self, template_name: str, context: Dict) -> str:
+        """Key for a rendered output; changes with the template file too"""
+        st = os.stat(self.template_dir / template_name)
+        payload = json.dumps([template_name, st.st_mtime_ns, st.st_size, context], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def render(self, template_name: str, context: Dict) -> str:
+        key = self.fingerprint(template_name, context)
+        cached = self._rendered.get(key)
+        if cached is not None:
+            self._rendered.move_to_end(key)
+            self.stats['hits'] += 1
+            metrics.count('generate.render_cache.hits')
+            return cached
+
+        self.stats['misses'] += 1
+        metrics.count('generate.render_cache.misses')
+        with metrics.span('generate.render'):
+            output = self.env.get_template(template_name).render(**context)
+        self._rendered[key] = output
+        if len(self._rendered) > self.max_rendered:
+            self._rendered.popitem(last=False)
+        return output
+
+
+@lru_cache(maxsize=None)
+def template_engine(platform: str) -> TemplateEngine:
+    """The shared engine for a platform, created on first use"""
+    return TemplateEngine(TEMPLATES_DIR / PLATFORM_TEMPLATE_DIRS[platform])
+
 
 class PipelineGenerator:
-    def __init__(self, analysis_results):
-        self.analysis = analysis_results
-    
-    def generate(self, output_path):
-        return "# Generated pipeline"
+    """Generates a CI/CD workflow file for one platform"""
+
+    def __init__(self, platform: str = 'github', engine: Optional[TemplateEngine] = None):
+        if platform not in PLATFORM_TEMPLATE_DIRS:
+            supported = ', '.join(sorted(PLATFORM_TEMPLATE_DIRS))
+            raise ValueError(f"Unsupported platform: {platform} (supported: {supported})")
+        self.platform = platform
+        self.engine = engine or template_engine(platform)
+
+    def generate(self, analysis: Dict, config: Dict, output_dir: str) -> str:
+        """Render the workflow into output_dir and return the file's path"""
+        with metrics.span('generate'):
+            output = self.render(analysis, config)
+            output_path = Path(output_dir)
+            output_path.mkdir(parents=True, exist_ok=True)
+            output_file = output_path / OUTPUT_FILENAME
+            output_file.write_text(output, encoding='utf-8')
+        return str(output_file)
+
+    def render(self, analysis: Dict, config: Dict) -> str:
+        """The workflow as a string, without writing it anywhere"""
+        return self.engine.render(self._select_template(analysis), self._context(analysis, config))
+
+    def _select_template(self, analysis: Dict) -> str:
+        if analysis.get('has_docker'):
+            return 'docker-pipeline.yml.j2'
+        language = self._primary_language(analysis)
+        return LANGUAGE_TEMPLATES.get(language, 'generic-pipeline.yml.j2')
+
+    def _primary_language(self, analysis: Dict) -> Optional[str]:
+        """The templated language with the most code, by bytes when known"""
+        stats = analysis.get('language_stats') or {}
+        candidates = [lang for lang in analysis.get('languages', []) if lang in LANGUAGE_TEMPLATES]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda lang: stats.get(lang, {}).get('bytes', 0)) if stats else candidates[0]
+
+    def _context(self, analysis: Dict, config: Dict) -> Dict:
+        defaults = ConfigParser.DEFAULT_CONFIG
+        pipeline = {**defaults['pipeline'], **config.get('pipeline', {})}
+        runtime = {**defaults['runtime'], **config.get('runtime', {})}
+        return {
+            'workflow_name': pipeline['name'],
+            'triggers': pipeline['triggers'],
+            'security': {**defaults['security'], **config.get('security', {})},
+            'languages': analysis.get('languages', []),
+            'has_tests': analysis.get('has_tests', False),
+            'package_manager': analysis.get('package_manager') or 'npm',
+            'python_version': runtime['python_version'],
+            'node_version': runtime['node_version'],
+        }
@@ -0,0 +1,123 @@
+"""
+Instrumentation - where the time goes, stage by stage
+
+Spans time a piece of work with the monotonic clock and add it up per name
+(call count, total and longest duration); counters add up files, bytes,
+matches and cache hits. Everything lands in one process-wide registry,
+`metrics`, which can be exported as JSON (`pipeline-gen --metrics FILE`) or
+in the Prometheus text format (the dashboard's /metrics).
+
+Recording is cheap (a clock read and a dict update under a lock), so the
+analyzer, scanners, config parser and generator record all the time. Code on
+a per-file path should call observe() with its own perf_counter() readings
+rather than open a span for every file.
+
+Span names are dotted, component first: inventory.walk, sast.read,
+sast.match, scan.trivy.subprocess, generate.render, ...
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+
+class Metrics:
+    """Thread-safe registry of span timings and counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: Dict[str, List[float]] = {}  # name -> [calls, seconds, max seconds]
+        self._counters: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the body of a with block under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Add a duration measured by the caller"""
+        with self._lock:
+            span = self._spans.get(name)
+            if span is None:
+                self._spans[name] = [calls, seconds, seconds]
+            else:
+                span[0] += calls
+                span[1] += seconds
+                if seconds > span[2]:
+                    span[2] = seconds
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict:
+        """Everything recorded so far, JSON-ready"""
+        with self._lock:
+            spans = {name: {'calls': calls, 'seconds': round(seconds, 6), 'max_seconds': round(longest, 6)}
+                     for name, (calls, seconds, longest) in sorted(self._spans.items())}
+            counters = dict(sorted(self._counters.items()))
+        return {'spans': spans, 'counters': counters}
+
+    def take(self) -> Dict:
+        """snapshot() and reset, for handing a worker process's numbers to its parent"""
+        with self._lock:
+            spans, counters = self._spans, self._counters
+            self._spans, self._counters = {}, {}
+        return {'spans': {name: {'calls': c, 'seconds': s, 'max_seconds': m} for name, (c, s, m) in spans.items()},
+                'counters': counters}
+
+    def merge(self, snapshot: Dict) -> None:
+        """Add another registry's snapshot() or take() into this one"""
+        with self._lock:
+            for name, span in snapshot.get('spans', {}).items():
+                mine = self._spans.setdefault(name, [0, 0.0, 0.0])
+                mine[0] += span['calls']
+                mine[1] += span['seconds']
+                mine[2] = max(mine[2], span['max_seconds'])
+            for name, value in snapshot.get('counters', {}).items():
+                self._counters[name] = self._counters.get(name, 0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def to_prometheus(self, prefix: str = 'pipeline') -> str:
+        """The Prometheus text exposition format (version 0.0.4)"""
+        snapshot = self.snapshot()
+        lines = []
+        families = (
+            ('span_seconds_total', 'Total seconds spent in each span', 'counter', 'seconds'),
+            ('span_calls_total', 'Number of times each span ran', 'counter', 'calls'),
+            ('span_max_seconds', 'Longest single run of each span', 'gauge', 'max_seconds'),
+        )
+        for suffix, help_text, kind, field in families:
+            if not snapshot['spans']:
+                break
+            lines.append(f'# HELP {prefix}_{suffix} {help_text}')
+            lines.append(f'# TYPE {prefix}_{suffix} {kind}')
+            for name, span in snapshot['spans'].items():
+                lines.append(f'{prefix}_{suffix}{{span="{_label(name)}"}} {span[field]}')
+        for name, value in snapshot['counters'].items():
+            metric = f'{prefix}_{_metric_name(name)}_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# The registry everything records into
+metrics = Metrics()
@@ -0,0 +1 @@
+"""Shared repository file inventory"""
@@ -0,0 +1,315 @@
+"""
+File inventory - walks a repository once and shares the file list
+
+The analyzer and the scanners used to run their own os.walk over the repo.
+A FileInventory does a single os.scandir pass, applies one ignore policy
+(default directory names plus .gitignore files) and caches the result so
+every stage can reuse it.
+"""
+
+import os
+import re
+import stat
+import time
+from pathlib import Path
+from typing import FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from ..instrumentation import metrics
+
+
+# Directories that are never worth walking into
+DEFAULT_IGNORED_DIRS = frozenset({
+    '.git', '.hg', '.svn', 'node_modules', 'venv', '.venv', '__pycache__', '.tox', '.mypy_cache',
+})
+
+
+class FileEntry(NamedTuple):
+    """A file found in the repository"""
+    path: str       # posix path relative to the repo root
+    size: int
+    mtime_ns: int
+    suffix: str
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1e9
+
+
+class _GitIgnoreRule(NamedTuple):
+    regex: re.Pattern
+    negate: bool
+    dir_only: bool
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob into a regex (without anchors)"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            j = pattern.find(']', i + 2)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = j
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+def compile_gitignore_line(line: str) -> Optional[_GitIgnoreRule]:
+    """Compile one .gitignore line, or return None for blanks and comments"""
+    line = line.rstrip('\n').rstrip()
+    if not line or line.startswith('#'):
+        return None
+
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # A slash anywhere but the end anchors the pattern to the .gitignore dir
+    anchored = '/' in line
+    line = line.lstrip('/')
+    prefix = '^' if anchored else '(?:^|/)'
+    regex = re.compile(prefix + _translate_glob(line) + '$')
+    return _GitIgnoreRule(regex, negate, dir_only)
+
+
+def parse_gitignore(text: str) -> List[_GitIgnoreRule]:
+    rules = []
+    for line in text.splitlines():
+        rule = compile_gitignore_line(line)
+        if rule is not None:
+            rules.append(rule)
+    return rules
+
+
+class IgnorePolicy:
+    """Decides which files and directories the inventory skips"""
+
+    def __init__(self, ignored_dirs: Iterable[str] = DEFAULT_IGNORED_DIRS,
+                 use_gitignore: bool = True, extra_patterns: Iterable[str] = ()):
+        self.ignored_dirs: FrozenSet[str] = frozenset(ignored_dirs)
+        self.use_gitignore = use_gitignore
+        self.extra_rules = parse_gitignore('\n'.join(extra_patterns))
+
+    def is_ignored(self, rel_path: str, is_dir: bool, scopes: Tuple) -> bool:
+        """Check a path against the rule scopes collected on the way down
+
+        scopes is a tuple of (base_dir, rules) pairs, outermost first. As with
+        git, the last matching rule wins and deeper .gitignore files override
+        the ones above them.
+        """
+        name = rel_path.rsplit('/', 1)[-1]
+        if is_dir and name in self.ignored_dirs:
+            return True
+
+        ignored = False
+        for base, rules in scopes:
+            if base:
+                if not rel_path.startswith(base + '/'):
+                    continue
+                local = rel_path[len(base) + 1:]
+            else:
+                local = rel_path
+            for rule in rules:
+                if rule.dir_only and not is_dir:
+                    continue
+                if rule.regex.search(local):
+                    ignored = not rule.negate
+        return ignored
+
+
+def top_level_dir(rel_path: str) -> str:
+    """Top-level directory of a repo-relative path, '' for files at the root"""
+    return rel_path.split('/', 1)[0] if '/' in rel_path else ''
+
+
+class FileInventory:
+    """Single-pass, cached listing of the files in a repository
+
+    Iterating the inventory walks lazily the first time (so callers can stop
+    early) and caches the entries once a walk runs to completion.
+    """
+
+    def __init__(self, repo_path: str, ignore_policy: Optional[IgnorePolicy] = None):
+        self.repo_path = Path(repo_path)
+        self.ignore_policy = ignore_policy or IgnorePolicy()
+        self._files: Optional[List[FileEntry]] = None
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        if self._files is not None:
+            yield from self._files
+            return
+
+        collected = []
+        for entry in self._walk():
+            collected.append(entry)
+            yield entry
+        self._files = collected
+
+    def __len__(self) -> int:
+        return len(self.files())
+
+    def files(self) -> List[FileEntry]:
+        """All files in the repository, walking the tree on first use"""
+        if self._files is None:
+            self._files = list(self._walk())
+        return self._files
+
+    @classmethod
+    def for_paths(cls, repo_path: str, paths: Iterable[str],
+                  ignore_policy: Optional[IgnorePolicy] = None) -> 'FileInventory':
+        """An inventory of just the given repo-relative paths, without a walk
+
+        Paths that don't exist (deleted files) or that the ignore policy
+        would skip are left out, so the result is what a full walk would
+        have found among them. Entries are sorted by path.
+        """
+        inventory = cls(repo_path, ignore_policy)
+        inventory._files = list(inventory._stat_paths(paths))
+        return inventory
+
+    def with_suffixes(self, suffixes: Iterable[str]) -> List[FileEntry]:
+        wanted = frozenset(suffixes)
+        return [entry for entry in self.files() if entry.suffix in wanted]
+
+    def full_path(self, entry: FileEntry) -> str:
+        return os.path.join(self.repo_path, entry.path)
+
+    def subtree(self, top: str) -> Iterator[FileEntry]:
+        """Files under one top-level directory, or the files at the root for ''
+
+        Lets callers redo the part of the work that covers a changed
+        directory without walking the rest of the repository.
+        """
+        if self._files is not None:
+            for entry in self._files:
+                if top_level_dir(entry.path) == top:
+                    yield entry
+            return
+        yield from self._walk(top)
+
+    def refresh(self) -> None:
+        """Drop the cached listing so the next access walks again"""
+        self._files = None
+
+    def _read_gitignore(self, dir_path: str) -> list:
+        try:
+            with open(os.path.join(dir_path, '.gitignore'), 'r', encoding='utf-8', errors='ignore') as f:
+                return parse_gitignore(f.read())
+        except OSError:
+            return []
+
+    def _stat_paths(self, paths: Iterable[str]) -> Iterator[FileEntry]:
+        policy = self.ignore_policy
+        root_scopes: Tuple = (('', policy.extra_rules),) if policy.extra_rules else ()
+        dir_scopes = {}
+
+        def scopes_for(rel_dir: str) -> Optional[Tuple]:
+            """The rule scopes inside a directory, or None if it is ignored"""
+            if rel_dir in dir_scopes:
+                return dir_scopes[rel_dir]
+            if rel_dir:
+                scopes = scopes_for(rel_dir.rpartition('/')[0])
+                if scopes is not None and policy.is_ignored(rel_dir, True, scopes):
+                    scopes = None
+            else:
+                scopes = root_scopes
+            if scopes is not None and policy.use_gitignore:
+                rules = self._read_gitignore(os.path.join(self.repo_path, rel_dir))
+                if rules:
+                    scopes = scopes + ((rel_dir, rules),)
+            dir_scopes[rel_dir] = scopes
+            return scopes
+
+        for rel in sorted(set(paths)):
+            scopes = scopes_for(rel.rpartition('/')[0])
+            if scopes is None or policy.is_ignored(rel, False, scopes):
+                continue
+            try:
+                st = os.stat(os.path.join(self.repo_path, rel))
+            except OSError:
+                continue  # deleted since, or a broken symlink
+            if stat.S_ISREG(st.st_mode):
+                yield FileEntry(rel, st.st_size, st.st_mtime_ns, os.path.splitext(rel)[1])
+
+    def _walk(self, top: Optional[str] = None) -> Iterator[FileEntry]:
+        policy = self.ignore_policy
+        root_scopes: Tuple = ()
+        if policy.extra_rules:
+            root_scopes = (('', policy.extra_rules),)
+
+        # Depth-first with sorted children so the order is stable across runs
+        stack = [('', str(self.repo_path), root_scopes)]
+        while stack:
+            rel_dir, abs_dir, scopes = stack.pop()
+            start = time.perf_counter()
+            try:
+                with os.scandir(abs_dir) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                continue
+
+            if policy.use_gitignore and any(e.name == '.gitignore' for e in entries):
+                rules = self._read_gitignore(abs_dir)
+                if rules:
+                    scopes = scopes + ((rel_dir, rules),)
+
+            # With a top given, the root level keeps only that directory
+            # (or, for '', only its own files)
+            limit = top is not None and not rel_dir
+            subdirs = []
+            found = []
+            for e in entries:
+                rel = f'{rel_dir}/{e.name}' if rel_dir else e.name
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        if limit and e.name != top:
+                            continue
+                        if not policy.is_ignored(rel, True, scopes):
+                            subdirs.append((rel, e.path, scopes))
+                        continue
+                    if not e.is_file() or (limit and top):
+                        continue
+                    if policy.is_ignored(rel, False, scopes):
+                        continue
+                    st = e.stat()
+                except OSError:
+                    continue  # broken symlink or vanished file
+                found.append(FileEntry(rel, st.st_size, st.st_mtime_ns, os.path.splitext(e.name)[1]))
+
+            # timed per directory, so the caller's work between entries isn't counted
+            metrics.observe('inventory.walk', time.perf_counter() - start)
+            metrics.count('inventory.dirs')
+            metrics.count('inventory.files', len(found))
+            yield from found
+            stack.extend(reversed(subdirs))
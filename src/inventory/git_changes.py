@@ -0,0 +1,50 @@
+"""
+Changed files - what a branch touched, according to git
+
+A pull request scan only needs the files the branch changed. changed_paths()
+asks git for them instead of walking and hashing the whole tree: everything
+that differs between the merge base with a ref and the working tree, plus
+untracked files that aren't ignored.
+"""
+
+import os
+import subprocess
+from pathlib import Path
+from typing import FrozenSet
+
+
+def _git(repo_path: Path, *args: str) -> bytes:
+    try:
+        return subprocess.run(
+            ['git', *args], cwd=str(repo_path), capture_output=True, check=True, timeout=60
+        ).stdout
+    except subprocess.CalledProcessError as e:
+        message = e.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise ValueError(f"git {args[0]} failed: {message[-1] if message else e}") from e
+    except (OSError, subprocess.SubprocessError) as e:
+        raise ValueError(f"git {args[0]} failed: {e}") from e
+
+
+def _split(output: bytes) -> FrozenSet[str]:
+    return frozenset(os.fsdecode(path) for path in output.split(b'\0') if path)
+
+
+def changed_paths(repo_path: str, since: str) -> FrozenSet[str]:
+    """Files under repo_path added or modified since the ref since
+
+    Compares against the merge base of since and HEAD, so changes that
+    landed on since after the branch was cut don't count. Paths are posix
+    and relative to repo_path; deleted files are left out. Raises ValueError
+    if repo_path isn't a git checkout or since isn't a known commit.
+    """
+    repo = Path(repo_path)
+    # resolved to a sha first, so a ref like --output=x never reaches git as an option
+    commit = _git(repo, 'rev-parse', '--verify', '--end-of-options', f'{since}^{{commit}}').decode().strip()
+    try:
+        base = _git(repo, 'merge-base', commit, 'HEAD').decode().strip()
+    except ValueError:
+        base = commit  # unrelated histories
+    diffed = _git(repo, 'diff', '--name-only', '-z', '--relative', '--no-renames', '--diff-filter=d',
+                  base, '--', '.')
+    untracked = _git(repo, 'ls-files', '-z', '--others', '--exclude-standard', '--', '.')
+    return _split(diffed) | _split(untracked)
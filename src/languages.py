@@ -0,0 +1,17 @@
+"""
+Source languages and the file suffixes they are detected by
+
+Shared by the repository analyzer and the SAST code masks. It has no
+imports of its own, so SAST pool workers can load it without pulling in
+the analyzers package.
+"""
+
+LANGUAGE_EXTENSIONS = {
+    'python': frozenset({'.py'}),
+    'javascript': frozenset({'.js', '.jsx'}),
+    'typescript': frozenset({'.ts', '.tsx'}),
+    'java': frozenset({'.java'}),
+    'go': frozenset({'.go'}),
+    'ruby': frozenset({'.rb'}),
+    'php': frozenset({'.php'}),
+}
@@ -0,0 +1 @@
+"""Stored security report handling"""
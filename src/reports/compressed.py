@@ -0,0 +1,86 @@
+"""
+Precompressed report siblings
+
+Reports don't change once a scan has written them, so compressing them on
+every download wastes CPU. write_compressed_siblings writes report.json.gz
+(and report.json.br when the optional brotli package is installed) next to
+the report right after the scan; the dashboard then serves whichever
+encoding the client accepts straight from disk.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+from typing import Dict, List
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODING_SUFFIXES: Dict[str, str] = {'br': '.br', 'gzip': '.gz'} if brotli else {'gzip': '.gz'}
+
+_CHUNK = 1024 * 1024
+
+# Read once: os.umask can only be read by setting it, which races with other
+# threads (the watch daemon narrows it while it binds its socket)
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def publish_mode(fd: int) -> None:
+    """Give a mkstemp file (always 0600) the mode open() would have, before it replaces a report"""
+    os.fchmod(fd, 0o666 & ~_UMASK)
+
+
+def _write_atomic(target: str, write) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or '.', prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            publish_mode(fd)
+            write(out)
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _gzip(src, out) -> None:
+    # mtime=0 keeps the output identical for identical reports
+    with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6, mtime=0) as gz:
+        shutil.copyfileobj(src, gz, _CHUNK)
+
+
+def _brotli(src, out) -> None:
+    compressor = brotli.Compressor(quality=5)
+    for chunk in iter(lambda: src.read(_CHUNK), b''):
+        out.write(compressor.process(chunk))
+    out.write(compressor.finish())
+
+
+def write_compressed_siblings(path: str) -> List[str]:
+    """Write the compressed copies of a report, returning their paths"""
+    written = []
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        compress = _brotli if encoding == 'br' else _gzip
+        with open(path, 'rb') as src:
+            _write_atomic(path + suffix, lambda out: compress(src, out))
+        written.append(path + suffix)
+    return written
+
+
+def fresh_sibling(path: str, encoding: str, st: os.stat_result) -> bool:
+    """True if the compressed copy for encoding exists and is not older than the report"""
+    suffix = ENCODING_SUFFIXES.get(encoding)
+    if suffix is None:
+        return False
+    try:
+        return os.stat(path + suffix).st_mtime_ns >= st.st_mtime_ns
+    except OSError:
+        return False
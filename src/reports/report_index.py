@@ -0,0 +1,165 @@
+"""
+Report index - summaries of the stored security reports
+
+The dashboard used to json.load every report on every /api/reports request.
+ReportIndex keeps one small summary per report file (scanner, timestamp,
+issue counts) and only re-reads a file when its size or mtime changes,
+using the streaming parser so even a huge report is summarized in constant
+memory. The directory is re-checked at most once per refresh_interval, so
+a burst of requests costs one scandir.
+"""
+
+import gzip
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..scanners.findings import read_findings
+from ..scanners.json_stream import count_by_field, count_by_severity, iter_events
+from ..scanners.security_scanner import SNYK_VULNERABILITIES, TRIVY_VULNERABILITIES
+
+
+# .jsonl.gz is also the gzip sibling of a .jsonl report; the index lists
+# it only when it is the report itself
+REPORT_SUFFIXES = ('.json', '.jsonl', '.jsonl.gz')
+
+SCANNERS = ('trivy', 'snyk', 'sast')
+
+
+class ReportSummary(NamedTuple):
+    """What the index knows about one report file"""
+    name: str
+    file: str
+    scanner: str            # 'trivy', 'snyk', 'sast' or 'unknown'
+    timestamp: float        # file mtime, seconds since the epoch
+    size: int
+    issues: Optional[int]   # None when the report's layout isn't known
+    counts: Dict[str, int]  # by severity (trivy, snyk) or category (sast)
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+
+def scanner_for(filename: str) -> str:
+    """Scanner that wrote a report, from its name (sast-report.json -> sast)"""
+    for scanner in SCANNERS:
+        if filename.startswith(scanner):
+            return scanner
+    return 'unknown'
+
+
+def report_name(filename: str) -> str:
+    """A report's name without its format suffix (sast-report.jsonl.gz -> sast-report)"""
+    for suffix in sorted(REPORT_SUFFIXES, key=len, reverse=True):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return os.path.splitext(filename)[0]
+
+
+def _count_jsonl(f, field: str) -> Tuple[int, Dict[str, int]]:
+    total, counts = 0, {}
+    for finding in read_findings(f):
+        key = str(finding.get(field, 'UNKNOWN'))
+        counts[key] = counts.get(key, 0) + 1
+        total += 1
+    return total, counts
+
+
+def summarize_report(path: str, filename: str, st: os.stat_result) -> ReportSummary:
+    """Stream through a report and count its issues; raises ValueError if it isn't JSON"""
+    scanner = scanner_for(filename)
+    issues, counts = None, {}
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        if filename.endswith(('.jsonl', '.jsonl.gz')):
+            # SAST findings, one per line
+            issues, counts = _count_jsonl(f, 'category')
+        elif scanner == 'trivy':
+            issues, counts = count_by_severity(f, TRIVY_VULNERABILITIES, 'Severity')
+        elif scanner == 'snyk':
+            issues, counts = count_by_severity(f, SNYK_VULNERABILITIES, 'severity')
+        elif scanner == 'sast':
+            issues, counts = count_by_field(f, ('issues.item',), 'category')
+        else:
+            for _ in iter_events(f):
+                pass  # still check that it parses
+    return ReportSummary(report_name(filename), filename, scanner, st.st_mtime, st.st_size, issues, counts)
+
+
+class ReportIndex:
+    """Summaries of the reports in a directory, refreshed by mtime checks"""
+
+    def __init__(self, reports_dir: str, refresh_interval: float = 1.0):
+        self.reports_dir = str(reports_dir)
+        self.refresh_interval = refresh_interval
+        # filename -> ((size, mtime_ns), summary or None for unreadable files)
+        self._entries: Dict[str, Tuple[Tuple[int, int], Optional[ReportSummary]]] = {}
+        self._checked = None
+        self._lock = threading.Lock()
+        self.stats = {'refreshes': 0, 'parsed': 0}
+
+    def refresh(self, force: bool = False) -> None:
+        """Re-read reports that were added or changed since the last check"""
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked is not None and now - self._checked < self.refresh_interval:
+                return
+            self._checked = now
+            self.stats['refreshes'] += 1
+
+            try:
+                with os.scandir(self.reports_dir) as it:
+                    files = [e for e in it if e.name.endswith(REPORT_SUFFIXES) and e.is_file()]
+            except OSError:
+                files = []
+            names = {e.name for e in files}
+            files = [e for e in files if not (e.name.endswith('.gz') and e.name[:-3] in names)]
+
+            entries = {}
+            for e in files:
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                stamp = (st.st_size, st.st_mtime_ns)
+                known = self._entries.get(e.name)
+                if known and known[0] == stamp:
+                    entries[e.name] = known
+                    continue
+                try:
+                    summary = summarize_report(e.path, e.name, st)
+                except (OSError, ValueError):
+                    summary = None  # skip invalid files until they change
+                self.stats['parsed'] += 1
+                entries[e.name] = (stamp, summary)
+            self._entries = entries
+
+    def get(self, filename: str) -> Optional[ReportSummary]:
+        self.refresh()
+        entry = self._entries.get(filename)
+        return entry[1] if entry else None
+
+    def query(self, scanner: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, min_issues: Optional[int] = None,
+              name: Optional[str] = None, offset: int = 0,
+              limit: int = 50) -> Tuple[int, List[ReportSummary]]:
+        """Matching summaries, newest first: (total matches, one page of them)"""
+        self.refresh()
+        matches = []
+        for _, summary in self._entries.values():
+            if summary is None:
+                continue
+            if scanner and summary.scanner != scanner:
+                continue
+            if since is not None and summary.timestamp < since:
+                continue
+            if until is not None and summary.timestamp >= until:
+                continue
+            if min_issues is not None and (summary.issues or 0) < min_issues:
+                continue
+            if name and name.lower() not in summary.name.lower():
+                continue
+            matches.append(summary)
+        matches.sort(key=lambda s: (-s.timestamp, s.file))
+        return len(matches), matches[offset:offset + limit]
@@ -0,0 +1,221 @@
+"""
+Scan history - every scan's findings, kept in one SQLite database
+
+Reports are overwritten by each scan; the history is append-only. A finding
+is stored once, under a fingerprint built from the repository, rule, file,
+the matched code with whitespace collapsed, and which occurrence of that code
+it is in the file. Line numbers are left out, so a finding keeps its
+fingerprint when code above it moves. Each run then only adds a (run,
+finding, line) row per finding, and new/fixed/unchanged between two runs are
+primary-key lookups in SQL rather than a diff of two report files.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+HISTORY_FILENAME = 'scan-history.sqlite'
+
+DELTA_KINDS = ('new', 'fixed', 'unchanged')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    scanner TEXT NOT NULL,
+    started REAL NOT NULL,
+    issues INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_repo ON runs (repo, scanner, id);
+
+CREATE TABLE IF NOT EXISTS rules (
+    rule TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    repo TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    file TEXT NOT NULL,
+    code TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_repo ON findings (repo);
+CREATE INDEX IF NOT EXISTS findings_rule ON findings (rule);
+CREATE INDEX IF NOT EXISTS findings_file ON findings (file);
+
+CREATE TABLE IF NOT EXISTS run_findings (
+    run_id INTEGER NOT NULL,
+    finding_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    PRIMARY KEY (run_id, finding_id)
+) WITHOUT ROWID;
+"""
+
+_WHITESPACE = re.compile(r'\s+')
+
+_FINDING_COLUMNS = ('f.fingerprint, f.rule, r.category, r.description, f.file, h.line, f.code '
+                    'FROM run_findings h JOIN findings f ON f.id = h.finding_id '
+                    'LEFT JOIN rules r ON r.rule = f.rule')
+
+
+def normalize_code(code: str) -> str:
+    return _WHITESPACE.sub(' ', code).strip()
+
+
+def fingerprints(repo: str, findings: Iterable[Dict]) -> List[str]:
+    """Stable fingerprint for each finding, in the order given
+
+    The occurrence count tells identical matches in one file apart, so the
+    order of findings within a file must follow their position (which is
+    how the SAST scanner reports them).
+    """
+    seen: Dict[Tuple, int] = {}
+    result = []
+    for finding in findings:
+        key = (finding['rule'], finding['file'], normalize_code(finding.get('code', '')))
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        text = '\0'.join((repo, *key, str(occurrence)))
+        result.append(hashlib.blake2b(text.encode('utf-8', errors='surrogateescape'), digest_size=10).hexdigest())
+    return result
+
+
+def _finding_dict(row) -> Dict:
+    fingerprint, rule, category, description, file, line, code = row
+    return {'fingerprint': fingerprint, 'rule': rule, 'category': category, 'description': description,
+            'file': file, 'line': line, 'code': code}
+
+
+def _run_dict(row) -> Dict:
+    run_id, repo, scanner, started, issues = row
+    return {'id': run_id, 'repo': repo, 'scanner': scanner, 'started': started, 'issues': issues}
+
+
+class ScanHistory:
+    """Append-only store of scan runs and their findings"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        # readers (the dashboard) don't block a scan that is writing
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def in_dir(cls, output_dir: str) -> 'ScanHistory':
+        """The history kept next to the reports in output_dir"""
+        return cls(os.path.join(output_dir, HISTORY_FILENAME))
+
+    def record(self, repo: str, scanner: str, findings: List[Dict], started: Optional[float] = None) -> int:
+        """Add a run and its findings, returning the run id"""
+        prints = fingerprints(repo, findings)
+        with self._conn:
+            cur = self._conn.execute(
+                'INSERT INTO runs (repo, scanner, started, issues) VALUES (?, ?, ?, ?)',
+                (repo, scanner, started if started is not None else time.time(), len(findings)),
+            )
+            run_id = cur.lastrowid
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO rules (rule, category, description) VALUES (?, ?, ?)',
+                {(f['rule'], f.get('category', ''), f.get('description', '')) for f in findings},
+            )
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO findings (fingerprint, repo, rule, file, code) VALUES (?, ?, ?, ?, ?)',
+                ((fp, repo, f['rule'], f['file'], f.get('code', '')) for fp, f in zip(prints, findings)),
+            )
+            self._conn.executemany(
+                'INSERT INTO run_findings (run_id, finding_id, line) '
+                'SELECT ?, id, ? FROM findings WHERE fingerprint = ?',
+                ((run_id, f.get('line', 0), fp) for fp, f in zip(prints, findings)),
+            )
+        return run_id
+
+    def run(self, run_id: int) -> Optional[Dict]:
+        row = self._conn.execute(
+            'SELECT id, repo, scanner, started, issues FROM runs WHERE id = ?', (run_id,)
+        ).fetchone()
+        return _run_dict(row) if row else None
+
+    def runs(self, repo: Optional[str] = None, scanner: Optional[str] = None,
+             offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[Dict]]:
+        """(total, page) of runs, newest first"""
+        where, params = self._filters(('repo', repo), ('scanner', scanner))
+        total = self._conn.execute(f'SELECT COUNT(*) FROM runs{where}', params).fetchone()[0]
+        rows = self._conn.execute(
+            f'SELECT id, repo, scanner, started, issues FROM runs{where} ORDER BY id DESC LIMIT ? OFFSET ?',
+            (*params, -1 if limit is None else limit, offset),
+        )
+        return total, [_run_dict(row) for row in rows]
+
+    def previous_run(self, run_id: int) -> Optional[int]:
+        """The run before run_id for the same repository and scanner"""
+        row = self._conn.execute(
+            'SELECT p.id FROM runs r JOIN runs p ON p.repo = r.repo AND p.scanner = r.scanner AND p.id < r.id '
+            'WHERE r.id = ? ORDER BY p.id DESC LIMIT 1', (run_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def findings(self, run_id: int, rule: Optional[str] = None, file: Optional[str] = None,
+                 offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """A run's findings, ordered by file and line"""
+        where, params = self._filters(('h.run_id', run_id), ('f.rule', rule), ('f.file', file))
+        rows = self._conn.execute(
+            f'SELECT {_FINDING_COLUMNS}{where} ORDER BY f.file, h.line LIMIT ? OFFSET ?',
+            (*params, -1 if limit is None else limit, offset),
+        )
+        return [_finding_dict(row) for row in rows]
+
+    def compare(self, base_id: int, head_id: int) -> Dict[str, int]:
+        """How many findings of head_id are new, fixed or unchanged since base_id"""
+        base, head = self.run(base_id), self.run(head_id)
+        if base is None or head is None:
+            raise ValueError(f"Unknown run: {base_id if base is None else head_id}")
+        unchanged = self._conn.execute(
+            'SELECT COUNT(*) FROM run_findings h JOIN run_findings b '
+            'ON b.run_id = ? AND b.finding_id = h.finding_id WHERE h.run_id = ?',
+            (base_id, head_id),
+        ).fetchone()[0]
+        return {'new': head['issues'] - unchanged, 'fixed': base['issues'] - unchanged, 'unchanged': unchanged}
+
+    def delta(self, base_id: int, head_id: int, kind: str = 'new',
+              offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """The new, fixed or unchanged findings between two runs
+
+        Fixed findings carry their line in base_id, the others their line
+        in head_id.
+        """
+        if kind not in DELTA_KINDS:
+            raise ValueError(f"Unknown delta kind: {kind}")
+        this, other = (base_id, head_id) if kind == 'fixed' else (head_id, base_id)
+        exists = 'EXISTS' if kind == 'unchanged' else 'NOT EXISTS'
+        rows = self._conn.execute(
+            f'SELECT {_FINDING_COLUMNS} WHERE h.run_id = ? AND {exists} '
+            '(SELECT 1 FROM run_findings o WHERE o.run_id = ? AND o.finding_id = h.finding_id) '
+            'ORDER BY f.file, h.line LIMIT ? OFFSET ?',
+            (this, other, -1 if limit is None else limit, offset),
+        )
+        return [_finding_dict(row) for row in rows]
+
+    @staticmethod
+    def _filters(*pairs) -> Tuple[str, tuple]:
+        clauses = [(column, value) for column, value in pairs if value is not None]
+        if not clauses:
+            return '', ()
+        return ' WHERE ' + ' AND '.join(f'{column} = ?' for column, _ in clauses), tuple(v for _, v in clauses)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> 'ScanHistory':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,154 @@
+"""
+Code masks - which bytes of a source file are comments or docstrings
+
+SAST rules are plain regexes, so `# password = "hunter2"` in a comment or
+an example in a docstring used to be reported like real code. A CodeMask
+holds the comment (and Python docstring) byte ranges of a file in two
+sorted arrays; the scanner drops a match whose start falls inside one.
+
+Each language family has one lexer regex that finds comments and string
+literals in a single pass (strings have to be lexed too, so that a `//` or
+`#` inside a string doesn't start a comment). The mask is only built for
+files where some rule matched, once however many rules did, and is kept
+per content hash so an unchanged file is never lexed twice in a process.
+
+Languages and their suffixes come from src.languages, as for the analyzer.
+"""
+
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from ..languages import LANGUAGE_EXTENSIONS
+
+
+# Masks kept per process, by (syntax, content hash)
+MASK_CACHE_SIZE = 4096
+
+
+class Syntax(NamedTuple):
+    """How to find comments in one family of languages"""
+    name: str
+    lexer: re.Pattern       # tokens: group 'comment' or 'string'
+    docstrings: bool = False
+
+
+_STRINGS = rb'"(?:\\.|[^"\\\r\n])*"?|\'(?:\\.|[^\'\\\r\n])*\'?'
+
+PYTHON = Syntax('python', re.compile(
+    rb'(?P<comment>\#[^\r\n]*)'
+    rb'|(?P<string>"""(?:\\.|[^\\])*?(?:"""|\Z)|\'\'\'(?:\\.|[^\\])*?(?:\'\'\'|\Z)|' + _STRINGS + rb')',
+    re.DOTALL), docstrings=True)
+
+C_STYLE = Syntax('c-style', re.compile(
+    rb'(?P<comment>//[^\r\n]*|/\*.*?(?:\*/|\Z))'
+    rb'|(?P<string>' + _STRINGS + rb'|`(?:\\.|[^`\\])*`?)',
+    re.DOTALL))
+
+# PHP also has shell-style comments (but #[...] is an attribute)
+PHP = Syntax('php', re.compile(
+    rb'(?P<comment>//[^\r\n]*|\#(?!\[)[^\r\n]*|/\*.*?(?:\*/|\Z))'
+    rb'|(?P<string>' + _STRINGS + rb')',
+    re.DOTALL))
+
+RUBY = Syntax('ruby', re.compile(
+    rb'(?P<comment>\#[^\r\n]*|^=begin\b.*?(?:^=end\b[^\r\n]*|\Z))'
+    rb'|(?P<string>' + _STRINGS + rb')',
+    re.DOTALL | re.MULTILINE))
+
+LANGUAGE_SYNTAX = {
+    'python': PYTHON,
+    'javascript': C_STYLE,
+    'typescript': C_STYLE,
+    'java': C_STYLE,
+    'go': C_STYLE,
+    'php': PHP,
+    'ruby': RUBY,
+}
+
+_SUFFIX_SYNTAX: Dict[str, Syntax] = {
+    suffix: LANGUAGE_SYNTAX[language]
+    for language, suffixes in LANGUAGE_EXTENSIONS.items() if language in LANGUAGE_SYNTAX
+    for suffix in suffixes
+}
+
+# The files SAST scans
+SAST_SUFFIXES = frozenset(_SUFFIX_SYNTAX)
+
+# After a docstring only whitespace, a comment or a ';' may follow on its line
+_STATEMENT_END = re.compile(rb'[ \t]*(?:[\r\n#;]|\Z)')
+
+
+class CodeMask:
+    """Sorted, non-overlapping byte ranges that are not code"""
+
+    __slots__ = ('_starts', '_ends')
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        self._starts = array('Q')
+        self._ends = array('Q')
+        for start, end in ranges:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def covers(self, offset: int) -> bool:
+        """True if the byte at offset is in a comment or docstring"""
+        i = bisect_right(self._starts, offset) - 1
+        return i >= 0 and offset < self._ends[i]
+
+    def ranges(self):
+        return list(zip(self._starts, self._ends))
+
+
+def syntax_for(path: str) -> Optional[Syntax]:
+    """The syntax of a file by its suffix, None for languages SAST doesn't know"""
+    dot = path.rfind('.')
+    return _SUFFIX_SYNTAX.get(path[dot:]) if dot > path.rfind('/') else None
+
+
+def build_mask(content, syntax: Syntax) -> CodeMask:
+    """Lex content (bytes or an mmap) once and collect its comment ranges"""
+    ranges = []
+    last_code = b''  # last code character before the current token ('' at the start)
+    prev_end = 0
+    for token in syntax.lexer.finditer(content):
+        start, end = token.span()
+        gap = content[prev_end:start].rstrip()
+        if gap:
+            last_code = gap[-1:]
+        if token.lastgroup == 'comment':
+            ranges.append((start, end))
+        else:
+            # a docstring opens a module, class or function body on a line of its own
+            opens_body = last_code == b'' or (last_code == b':' and b'\n' in content[prev_end:start])
+            if syntax.docstrings and opens_body and _STATEMENT_END.match(content, end):
+                ranges.append((start, end))
+            last_code = b'"'
+        prev_end = end
+    return CodeMask(ranges)
+
+
+_cache: 'OrderedDict[Tuple[str, str], CodeMask]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def code_mask(syntax: Syntax, content, content_hash: str) -> CodeMask:
+    """build_mask, memoized on the content hash"""
+    key = (syntax.name, content_hash)
+    with _cache_lock:
+        mask = _cache.get(key)
+        if mask is not None:
+            _cache.move_to_end(key)
+            return mask
+    mask = build_mask(content, syntax)
+    with _cache_lock:
+        _cache[key] = mask
+        if len(_cache) > MASK_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return mask
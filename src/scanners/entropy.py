@@ -0,0 +1,109 @@
+"""
+High-entropy string detection - secrets that no keyword rule can name
+
+Keyword rules catch `password = "..."`, but a leaked cloud key usually sits
+in a literal nobody labelled. Random keys use their alphabet almost evenly,
+so their Shannon entropy (bits per character) is close to the maximum for
+the charset: ~4 for hex, ~6 for base64, where words and identifiers score
+well below that.
+
+Candidates are quoted literals of hex or base64/base64url characters
+between EntropyThresholds.min_length and max_length long, found with one
+regex pass over the raw bytes. They are scored in batches: with numpy, every
+candidate of a batch goes into one flat buffer and a single bincount counts
+all their bytes at once; without it, each candidate is counted separately,
+which is slower but gives the same numbers.
+"""
+
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+# Candidates scored per bincount (the count matrix is BATCH_SIZE x 256)
+BATCH_SIZE = 4096
+
+HEX = 'hex'
+BASE64 = 'base64'
+
+_HEX_DIGITS = b'0123456789abcdefABCDEF'
+
+
+class EntropyThresholds(NamedTuple):
+    """Bits per character above which a literal is reported, per charset"""
+    hex: float = 3.0
+    base64: float = 4.5
+    min_length: int = 20
+    max_length: int = 128     # longer runs are usually embedded data, not keys
+
+
+class Secret(NamedTuple):
+    start: int
+    end: int
+    charset: str
+    entropy: float
+
+
+@lru_cache(maxsize=8)
+def _candidate_regex(min_length: int, max_length: int) -> re.Pattern:
+    # the closing quote has to follow the run, so longer runs don't match
+    return re.compile(rb'["\'`]([A-Za-z0-9+/_\-]{%d,%d}={0,2})["\'`]' % (min_length, max_length))
+
+
+def charset(candidate: bytes) -> str:
+    """HEX if candidate is only hex digits, else BASE64"""
+    return HEX if not candidate.translate(None, _HEX_DIGITS) else BASE64
+
+
+def shannon_entropy(candidates: List[bytes]) -> List[float]:
+    """Entropy in bits per byte of each candidate"""
+    if not candidates:
+        return []
+    if np is None:
+        return [_entropy(candidate) for candidate in candidates]
+    lengths = np.fromiter(map(len, candidates), dtype=np.int64, count=len(candidates))
+    flat = np.frombuffer(b''.join(candidates), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(candidates), dtype=np.int64), lengths)
+    counts = np.bincount(rows * 256 + flat, minlength=len(candidates) * 256).reshape(-1, 256)
+    p = counts / np.maximum(lengths, 1)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(counts > 0, p * np.log2(p), 0.0)
+    return (-terms.sum(axis=1)).tolist()
+
+
+def _entropy(candidate: bytes) -> float:
+    size = len(candidate)
+    if not size:
+        return 0.0
+    return -sum(count / size * math.log2(count / size) for count in Counter(candidate).values())
+
+
+def find_secrets(content, start: int = 0, end: Optional[int] = None,
+                 thresholds: EntropyThresholds = EntropyThresholds()) -> Iterator[Secret]:
+    """Yield the high-entropy literals in content[start:end], in order
+
+    Spans are offsets of the literal's characters, without the quotes.
+    """
+    end = len(content) if end is None else end
+    regex = _candidate_regex(thresholds.min_length, thresholds.max_length)
+    batch: List[Tuple[int, int]] = []
+    for match in regex.finditer(content, start, end):
+        batch.append(match.span(1))
+        if len(batch) == BATCH_SIZE:
+            yield from _score(content, batch, thresholds)
+            batch = []
+    yield from _score(content, batch, thresholds)
+
+
+def _score(content, spans: List[Tuple[int, int]], thresholds: EntropyThresholds) -> Iterator[Secret]:
+    candidates = [content[s:e] for s, e in spans]
+    for (s, e), candidate, entropy in zip(spans, candidates, shannon_entropy(candidates)):
+        kind = charset(candidate)
+        if entropy > (thresholds.hex if kind == HEX else thresholds.base64):
+            yield Secret(s, e, kind, entropy)
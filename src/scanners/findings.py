@@ -0,0 +1,163 @@
+"""
+Compact SAST findings - a columnar table and an incremental report writer
+
+A finding used to live as its own dict from the moment it was found until
+the report was written, each one repeating its file, category and
+description strings. FindingTable keeps files and rules (with their
+category and description) in string tables and everything else in typed
+arrays, so a row costs a few dozen bytes plus its matched code.
+
+Reports default to JSON Lines, one finding per line without indentation,
+optionally gzipped. FindingWriter appends rows as the scan produces them
+and moves the file into place when it is closed, so readers never see a
+half-written report. The old {"issues": [...]} JSON is still available.
+"""
+
+import gzip
+import io
+import json
+import os
+import tempfile
+from array import array
+from typing import Dict, IO, Iterable, Iterator, List, Tuple
+
+from ..reports.compressed import publish_mode
+
+
+# --report-format -> report file suffix
+REPORT_FORMATS = {'jsonl': '.jsonl', 'jsonl.gz': '.jsonl.gz', 'json': '.json'}
+
+SEPARATORS = (',', ':')
+
+
+class FindingTable:
+    """SAST findings stored column by column"""
+
+    def __init__(self):
+        self.files: List[str] = []
+        self.rules: List[Tuple[str, str, str]] = []  # (rule, category, description)
+        self._file_ids: Dict[str, int] = {}
+        self._rule_ids: Dict[Tuple[str, str, str], int] = {}
+        self._codes: Dict[str, str] = {}  # the same match text is kept once
+        self._file = array('I')
+        self._rule = array('I')
+        self._line = array('I')
+        self._column = array('I')
+        self._start = array('Q')
+        self._end = array('Q')
+        self._code: List[str] = []
+        # pre-encoded JSON fragments, one per string table entry
+        self._file_json: List[str] = []
+        self._rule_json: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._line)
+
+    def append(self, finding: Dict) -> None:
+        file_id = self._file_ids.get(finding['file'])
+        if file_id is None:
+            file_id = self._file_ids[finding['file']] = len(self.files)
+            self.files.append(finding['file'])
+            self._file_json.append(json.dumps(finding['file']))
+        rule = (finding['rule'], finding['category'], finding['description'])
+        rule_id = self._rule_ids.get(rule)
+        if rule_id is None:
+            rule_id = self._rule_ids[rule] = len(self.rules)
+            self.rules.append(rule)
+            self._rule_json.append(json.dumps(dict(zip(('rule', 'category', 'description'), rule)),
+                                              separators=SEPARATORS)[1:-1])
+        code = finding['code']
+        self._file.append(file_id)
+        self._rule.append(rule_id)
+        self._line.append(finding['line'])
+        self._column.append(finding['column'])
+        self._start.append(finding['span'][0])
+        self._end.append(finding['span'][1])
+        self._code.append(self._codes.setdefault(code, code))
+
+    def extend(self, findings: Iterable[Dict]) -> None:
+        for finding in findings:
+            self.append(finding)
+
+    def __getitem__(self, i: int) -> Dict:
+        rule, category, description = self.rules[self._rule[i]]
+        return {
+            'file': self.files[self._file[i]],
+            'line': self._line[i],
+            'column': self._column[i],
+            'span': [self._start[i], self._end[i]],
+            'rule': rule,
+            'category': category,
+            'description': description,
+            'code': self._code[i],
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self[i] for i in range(len(self)))
+
+    def category_counts(self) -> Dict[str, int]:
+        per_rule = [0] * len(self.rules)
+        for rule_id in self._rule:
+            per_rule[rule_id] += 1
+        counts: Dict[str, int] = {}
+        for (_, category, _), n in zip(self.rules, per_rule):
+            counts[category] = counts.get(category, 0) + n
+        return counts
+
+    def jsonl(self, start: int = 0) -> Iterator[str]:
+        """Rows from start on as JSON Lines, as json.dumps(row, separators=SEPARATORS) would"""
+        for i in range(start, len(self)):
+            yield (f'{{"file":{self._file_json[self._file[i]]},"line":{self._line[i]},'
+                   f'"column":{self._column[i]},"span":[{self._start[i]},{self._end[i]}],'
+                   f'{self._rule_json[self._rule[i]]},"code":{json.dumps(self._code[i])}}}\n')
+
+
+class FindingWriter:
+    """Writes a report incrementally into a temporary file, renamed on close()"""
+
+    def __init__(self, path: str, report_format: str = 'jsonl'):
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format: {report_format}")
+        self.path = path
+        self.format = report_format
+        fd, self._tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.', suffix='.tmp')
+        publish_mode(fd)
+        self._raw = os.fdopen(fd, 'wb')
+        # mtime=0 keeps the output identical for identical reports
+        self._out: IO[bytes] = (gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6, mtime=0)
+                                if report_format == 'jsonl.gz' else self._raw)
+        self._written = 0
+
+    def write_new(self, table: FindingTable) -> None:
+        """Append the table's rows added since the last call (JSON Lines formats)"""
+        if self.format != 'json':
+            self._out.write(''.join(table.jsonl(self._written)).encode('utf-8'))
+        self._written = len(table)
+
+    def close(self, table: FindingTable) -> None:
+        """Finish the report and move it into place"""
+        if self.format == 'json':
+            # the pre-JSON Lines layout, for tools that still expect it
+            text = io.TextIOWrapper(self._out, encoding='utf-8')
+            json.dump({'issues': list(table)}, text, indent=2)
+            text.detach()  # flushes; the file is closed below
+        else:
+            self.write_new(table)
+        if self._out is not self._raw:
+            self._out.close()
+        self._raw.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        self._raw.close()
+        try:
+            os.unlink(self._tmp)
+        except OSError:
+            pass
+
+
+def read_findings(f: IO[str]) -> Iterator[Dict]:
+    """Findings from a JSON Lines report; raises ValueError on a bad line"""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
@@ -0,0 +1,201 @@
+"""
+Streaming JSON parsing for scanner reports
+
+Trivy and Snyk reports for big images run to hundreds of MB. Instead of
+json.load-ing them, iter_events walks the document incrementally and yields
+ijson-style (prefix, event, value) triples, so counting vulnerabilities
+needs only a small read buffer. If the optional ijson package is installed
+its (faster, C-backed) parser is used instead; the events are the same.
+"""
+
+import json
+import re
+from collections import Counter
+from json.decoder import scanstring
+from typing import Callable, Dict, IO, Iterable, Iterator, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:  # optional dependency
+    ijson = None
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?')
+_DELIMITER = re.compile(r'[ \t\n\r,:\]}]')
+_LITERALS = {'true': ('boolean', True), 'false': ('boolean', False), 'null': ('null', None)}
+
+Event = Tuple[str, str, object]
+
+
+class _Reader:
+    """Text buffer over a file that refills on demand"""
+
+    def __init__(self, f: IO[str], chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, more: int = 0) -> bool:
+        """Read another chunk (plus more), dropping what's been consumed"""
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size + more)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at the end of the input"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def string(self) -> str:
+        more = 0
+        while True:
+            try:
+                value, end = scanstring(self.buf, self.pos + 1)
+                self.pos = end
+                return value
+            except json.JSONDecodeError:
+                # Possibly cut off by the buffer end; read more and retry
+                more = more * 2 or self.chunk_size
+                if not self.fill(more):
+                    raise
+
+    def scalar(self) -> Tuple[str, object]:
+        # Numbers and literals end at a delimiter; make sure one is buffered
+        while not _DELIMITER.search(self.buf, self.pos) and self.fill():
+            pass
+        end = _DELIMITER.search(self.buf, self.pos)
+        end = end.start() if end else len(self.buf)
+        text = self.buf[self.pos:end]
+        if text in _LITERALS:
+            self.pos = end
+            return _LITERALS[text]
+        if _NUMBER.fullmatch(text):
+            self.pos = end
+            return 'number', float(text) if any(c in text for c in '.eE') else int(text)
+        raise ValueError(f'Invalid JSON near {text[:20]!r}')
+
+
+def _iter_events_py(f: IO[str], chunk_size: int) -> Iterator[Event]:
+    reader = _Reader(f, chunk_size)
+    # one entry per open container: [prefix, is_map, current_key]
+    stack = []
+
+    def value_prefix() -> str:
+        if not stack:
+            return ''
+        prefix, is_map, key = stack[-1]
+        child = key if is_map else 'item'
+        return f'{prefix}.{child}' if prefix else child
+
+    while True:
+        char = reader.peek()
+        if not char:
+            if stack:
+                raise ValueError('Unexpected end of JSON input')
+            return
+        if char in ',:':
+            reader.pos += 1
+            continue
+
+        if stack and stack[-1][1] and char == '"' and stack[-1][2] is None:
+            key = reader.string()
+            stack[-1][2] = key
+            yield stack[-1][0], 'map_key', key
+            continue
+
+        if char in '}]':
+            reader.pos += 1
+            prefix, is_map, _ = stack.pop()
+            yield prefix, 'end_map' if is_map else 'end_array', None
+            if stack and stack[-1][1]:
+                stack[-1][2] = None  # the parent map wants its next key
+            continue
+
+        prefix = value_prefix()
+        if char in '{[':
+            reader.pos += 1
+            is_map = char == '{'
+            yield prefix, 'start_map' if is_map else 'start_array', None
+            stack.append([prefix, is_map, None])
+            continue
+
+        if char == '"':
+            yield prefix, 'string', reader.string()
+        else:
+            event, value = reader.scalar()
+            yield prefix, event, value
+        if stack and stack[-1][1]:
+            stack[-1][2] = None
+
+
+def iter_events(f: IO, chunk_size: int = 64 * 1024) -> Iterator[Event]:
+    """Yield (prefix, event, value) for a JSON document read from f
+
+    prefix is the dotted path to the value, with 'item' for array elements,
+    e.g. 'Results.item.Vulnerabilities.item.Severity'. Raises ValueError on
+    malformed input.
+    """
+    if ijson is not None:
+        if 'b' not in getattr(f, 'mode', 'b'):
+            f = f.buffer
+        try:
+            yield from ijson.parse(f)
+        except ijson.JSONError as e:
+            raise ValueError(str(e)) from e
+        return
+    if 'b' in getattr(f, 'mode', ''):
+        raise TypeError('open the report in text mode')
+    yield from _iter_events_py(f, chunk_size)
+
+
+def iter_items(f: IO, item_prefixes: Iterable[str], fields: Iterable[str]) -> Iterator[Dict[str, object]]:
+    """Yield each object under item_prefixes as {field: value} for its scalar fields
+
+    Only the named fields directly on the object are kept, so one item at
+    a time is held in memory; nested objects and arrays are skipped.
+    """
+    item_prefixes = frozenset(item_prefixes)
+    field_prefixes = {f'{p}.{field}': field for p in item_prefixes for field in fields}
+    current: Optional[Dict[str, object]] = None
+
+    for prefix, event, value in iter_events(f):
+        if prefix in item_prefixes:
+            if event == 'start_map':
+                current = {}
+            elif event == 'end_map' and current is not None:
+                yield current
+                current = None
+        elif current is not None and prefix in field_prefixes and event in ('string', 'number', 'boolean'):
+            current[field_prefixes[prefix]] = value
+
+
+def count_by_field(f: IO, item_prefixes: Iterable[str], field: str,
+                   normalize: Callable[[str], str] = str) -> Tuple[int, Dict[str, int]]:
+    """Count the items under item_prefixes and tally them by a string field
+
+    Returns (total, {value: count}) while holding only one read buffer in
+    memory. Items without the field count as 'UNKNOWN'.
+    """
+    by_value: Counter = Counter()
+    for item in iter_items(f, item_prefixes, (field,)):
+        value = item.get(field)
+        by_value[normalize(value) if isinstance(value, str) else 'UNKNOWN'] += 1
+    return sum(by_value.values()), dict(by_value)
+
+
+def count_by_severity(f: IO, item_prefixes: Iterable[str], severity_key: str) -> Tuple[int, Dict[str, int]]:
+    """count_by_field for severities, which are upper-cased"""
+    return count_by_field(f, item_prefixes, severity_key, str.upper)
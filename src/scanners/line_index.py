@@ -0,0 +1,44 @@
+"""
+Line index - resolves offsets to line/column without rescanning the text
+
+Counting newlines in content[:offset] for every finding copies and rescans
+the prefix each time, which goes quadratic on big files with many matches.
+LineIndex keeps every resolved offset as a checkpoint in sorted arrays; a
+lookup bisects to the nearest checkpoint below it and counts newlines from
+there with bytes.count, so each lookup only covers the gap since the
+previous one, at C speed, whatever order the offsets arrive in.
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import Tuple
+
+
+class LineIndex:
+    """Line/column lookups for a bytes buffer (or an mmap)"""
+
+    def __init__(self, content):
+        self.content = content
+        # parallel arrays: checkpoint offset, newlines before it, start of its line
+        self._offsets = array('Q', [0])
+        self._lines = array('Q', [0])
+        self._line_starts = array('Q', [0])
+
+    def _count_newlines(self, start: int, end: int) -> int:
+        if isinstance(self.content, bytes):
+            return self.content.count(b'\n', start, end)
+        return self.content[start:end].count(b'\n')  # mmap has no count()
+
+    def line_col(self, offset: int) -> Tuple[int, int]:
+        """1-based (line, column) of an offset; the column counts bytes"""
+        i = bisect_right(self._offsets, offset) - 1
+        base, line, line_start = self._offsets[i], self._lines[i], self._line_starts[i]
+        if offset != base:
+            newlines = self._count_newlines(base, offset)
+            if newlines:
+                line += newlines
+                line_start = self.content.rfind(b'\n', base, offset) + 1
+            self._offsets.insert(i + 1, offset)
+            self._lines.insert(i + 1, line)
+            self._line_starts.insert(i + 1, line_start)
+        return line + 1, offset - line_start + 1
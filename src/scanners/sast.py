@@ -0,0 +1,279 @@
+"""
+SAST engine - per-file pattern matching shared by the serial and parallel paths
+
+Everything here is module level so it can run inside ProcessPoolExecutor
+workers. Each worker compiles the rule engine once in its initializer and
+then scans batches of files; the scanner merges the batches back in inventory
+order so the report does not depend on the number of workers.
+
+Files are matched as bytes and never decoded. Anything bigger than a page
+or two is memory-mapped, and files over ScanLimits.max_file_size are
+skipped, sampled or scanned window by window (with enough overlap that a
+match can't be lost at a window edge), so memory stays flat however big
+the repository's files are.
+
+Besides the keyword rules, quoted literals that look random (see
+entropy.py) are reported as possible keys, unless a rule already
+reported the line they're on.
+"""
+
+import mmap
+import os
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..instrumentation import metrics
+from .code_mask import CodeMask, code_mask, syntax_for
+from .entropy import EntropyThresholds, find_secrets
+from .line_index import LineIndex
+from .sast_cache import content_hash, content_hasher
+from .sast_rules import RuleEngine, SastRule
+
+
+# Bump when the shape of a finding, or what gets reported, changes so cached
+# findings are dropped (4: matches in comments and docstrings are skipped,
+# 5: high-entropy strings are reported)
+FINDINGS_VERSION = 5
+
+ENTROPY_RULE = SastRule('high-entropy-string', 'hardcoded_secrets', '',
+                        'High-entropy string (possible key or token)')
+
+LARGE_FILE_ACTIONS = ('chunk', 'sample', 'skip')
+
+# Smaller files are read() - mapping them costs more than it saves
+MMAP_MIN_SIZE = 64 * 1024
+
+
+class ScanLimits(NamedTuple):
+    """How the SAST engine treats large and binary files, comments and random-looking strings"""
+    max_file_size: int = 10 * 1024 * 1024   # larger files get large_file_action
+    large_file_action: str = 'chunk'        # 'chunk', 'sample' or 'skip'
+    sample_size: int = 1024 * 1024          # bytes scanned from the start when sampling
+    chunk_size: int = 4 * 1024 * 1024
+    chunk_overlap: int = 64 * 1024          # longest match that can straddle a chunk edge
+    binary_check_size: int = 8192           # a NUL byte in this prefix marks a binary file
+    skip_comments: bool = True              # drop matches in comments and docstrings (not when chunked)
+    entropy: Optional[EntropyThresholds] = EntropyThresholds()  # None: no high-entropy string check
+
+
+# Per-process engine, limits and deadline, set by init_worker in each pool worker
+_worker_engine: Optional[RuleEngine] = None
+_worker_limits: Optional[ScanLimits] = None
+_worker_deadline: Optional[float] = None
+
+
+def cache_fingerprint(engine: RuleEngine, limits: ScanLimits) -> str:
+    """Key for cached findings: the rule set, the limits and the finding layout"""
+    return f'{engine.fingerprint()}-{content_hash(repr(tuple(limits)).encode())[:8]}-v{FINDINGS_VERSION}'
+
+
+def _release(buf, start: int, end: int) -> None:
+    """Drop mapped pages we are done with so they don't count toward RSS"""
+    if isinstance(buf, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED'):
+        start -= start % mmap.PAGESIZE
+        end -= end % mmap.PAGESIZE
+        if end > start:
+            buf.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+def scan_windows(rel_path: str, buf, size: int, engine: RuleEngine, window: int, overlap: int = 0,
+                 masker: Optional[Callable[[], CodeMask]] = None,
+                 entropy: Optional[EntropyThresholds] = None) -> List[Dict]:
+    """Match every SAST rule against buf[:size], one window at a time
+
+    A match is kept by the window it starts in. Each rule resumes after its
+    last match, so the result is the same as one pass over the whole buffer
+    as long as no match is longer than the overlap.
+
+    masker builds the buffer's CodeMask. It is called once, on the first
+    match, and matches starting in a masked range are dropped. With entropy
+    set, high-entropy literals are reported too, after the rules' findings.
+    """
+    per_rule: Dict[str, List[Dict]] = {}
+    resume: Dict[str, int] = {}
+    lines_before = 0
+    mask = None
+    masked = 0
+    lines = None
+    rule_lines = set()  # lines a rule reported, where entropy findings would be noise
+
+    def is_masked(offset: int) -> bool:
+        nonlocal mask, masked
+        if masker is None:
+            return False
+        if mask is None:
+            mask = masker()
+        if mask.covers(offset):
+            masked += 1
+            return True
+        return False
+
+    def finding(rule: SastRule, match_start: int, match_end: int, code: bytes) -> Dict:
+        nonlocal lines
+        if lines is None:
+            lines = LineIndex(chunk)
+        line_num, column = lines.line_col(match_start)
+        return {
+            'file': rel_path,
+            'line': line_num + lines_before,
+            'column': column,
+            'span': [start + match_start, start + match_end],
+            'rule': rule.id,
+            'category': rule.category,
+            'description': rule.description,
+            'code': code.decode('utf-8', errors='replace')
+        }
+
+    for start in range(0, size, window):
+        if start == 0 and window >= size:
+            chunk = buf  # whole file in one go, no copy
+        else:
+            chunk = buf[start:min(size, start + window + overlap)]
+        lines = None
+        for rule, regex in engine.triggered(chunk, 0, len(chunk)):
+            pos = max(0, resume.get(rule.id, 0) - start)
+            for match in regex.finditer(chunk, pos, len(chunk)):
+                if match.start() >= window:
+                    break  # belongs to the next window
+                resume[rule.id] = start + match.end()
+                if is_masked(start + match.start()):
+                    continue
+                issue = finding(rule, match.start(), match.end(), match.group(0))
+                rule_lines.add(issue['line'])
+                per_rule.setdefault(rule.id, []).append(issue)
+        if entropy is not None:
+            pos = max(0, resume.get(ENTROPY_RULE.id, 0) - start)
+            for secret in find_secrets(chunk, pos, len(chunk), entropy):
+                if secret.start >= window:
+                    break  # belongs to the next window
+                resume[ENTROPY_RULE.id] = start + secret.end
+                if is_masked(start + secret.start):
+                    continue
+                issue = finding(ENTROPY_RULE, secret.start, secret.end, chunk[secret.start:secret.end])
+                if issue['line'] not in rule_lines:
+                    per_rule.setdefault(ENTROPY_RULE.id, []).append(issue)
+        if chunk is not buf:
+            lines_before += chunk.count(b'\n', 0, window)
+            _release(buf, start, start + window)
+
+    if masked:
+        metrics.count('sast.masked', masked)
+    # grouped by rule, in rule order, then the high-entropy strings
+    return [issue for rule in (*engine.rules, ENTROPY_RULE) for issue in per_rule.get(rule.id, ())]
+
+
+def scan_content(rel_path: str, content: bytes, engine: RuleEngine,
+                 masker: Optional[Callable[[], CodeMask]] = None,
+                 entropy: Optional[EntropyThresholds] = None) -> List[Dict]:
+    """Match every SAST rule against one file's content"""
+    return scan_windows(rel_path, content, len(content), engine, max(len(content), 1), masker=masker,
+                        entropy=entropy)
+
+
+def _masker(rel_path: str, content, digest: str, limits: ScanLimits) -> Optional[Callable[[], CodeMask]]:
+    syntax = syntax_for(rel_path) if limits.skip_comments else None
+    if syntax is None:
+        return None
+    return lambda: code_mask(syntax, content, digest)
+
+
+def _hash_windows(buf, size: int, window: int) -> str:
+    hasher = content_hasher()
+    for start in range(0, size, window):
+        hasher.update(buf[start:start + window])
+        _release(buf, start, start + window)
+    return hasher.hexdigest()
+
+
+def _scan_buffer(rel_path: str, buf, size: int, engine: RuleEngine, known_hash: Optional[str],
+                 limits: ScanLimits) -> Tuple[Optional[str], Optional[List[Dict]], Optional[str]]:
+    if b'\0' in buf[:limits.binary_check_size]:
+        # Binary files have no findings; the size stands in for a content hash
+        return f'binary:{size}', [], 'binary'
+
+    if size <= limits.max_file_size:
+        digest = content_hash(buf)
+        if digest == known_hash:
+            return digest, None, None
+        return digest, scan_content(rel_path, buf, engine, _masker(rel_path, buf, digest, limits), limits.entropy), None
+
+    if limits.large_file_action == 'sample':
+        sample = buf[:limits.sample_size]
+        digest = f'{content_hash(sample)}:{size}'
+        if digest == known_hash:
+            return digest, None, 'sampled'
+        issues = scan_content(rel_path, sample, engine, _masker(rel_path, sample, digest, limits), limits.entropy)
+        return digest, issues, 'sampled'
+
+    # A window can start inside a comment or string, so chunked files aren't masked
+    digest = _hash_windows(buf, size, limits.chunk_size)
+    if digest == known_hash:
+        return digest, None, 'chunked'
+    issues = scan_windows(rel_path, buf, size, engine, limits.chunk_size, limits.chunk_overlap,
+                          entropy=limits.entropy)
+    return digest, issues, 'chunked'
+
+
+def scan_file(rel_path: str, full_path: str, engine: RuleEngine, known_hash: Optional[str] = None,
+              limits: ScanLimits = ScanLimits()) -> Tuple[Optional[str], Optional[List[Dict]], Optional[str]]:
+    """Read, hash and scan one file
+
+    Returns (digest, issues, note). digest is None if the file was not read;
+    issues is None if the content hash equals known_hash, meaning the
+    caller's cached findings are still valid. note is None for a normal
+    scan, or 'binary', 'skipped', 'sampled' or 'chunked'.
+    """
+    start = time.perf_counter()
+    try:
+        with open(full_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > limits.max_file_size and limits.large_file_action == 'skip':
+                return None, None, 'skipped'
+            if size < MMAP_MIN_SIZE:
+                buf = f.read()
+                size = len(buf)
+            else:
+                # pages are read in as matching touches them, so for mapped
+                # files sast.match includes the reading
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            read = time.perf_counter()
+            metrics.observe('sast.read', read - start)
+            try:
+                result = _scan_buffer(rel_path, buf, size, engine, known_hash, limits)
+            finally:
+                if isinstance(buf, mmap.mmap):
+                    buf.close()
+            metrics.observe('sast.match', time.perf_counter() - read)
+            metrics.count('sast.bytes', size)
+            return result
+    except (OSError, ValueError):
+        return None, None, None
+
+
+def init_worker(rules: Sequence[SastRule], limits: ScanLimits, deadline: Optional[float] = None) -> None:
+    """deadline is a time.monotonic() value (the clock is system-wide, so the parent's works here)"""
+    global _worker_engine, _worker_limits, _worker_deadline
+    _worker_engine = RuleEngine(rules)
+    _worker_limits = limits
+    _worker_deadline = deadline
+
+
+def scan_batch(batch: List[Tuple[int, str, str, Optional[str]]]) -> Tuple[List[Tuple], Dict]:
+    """Worker entry point: scan a batch of (index, rel_path, full_path, known_hash)
+
+    Returns the results and the worker's metrics for the batch, which the
+    parent merges into its own. Once the deadline has passed the rest of the
+    batch is left out; the parent is giving up on the scan anyway.
+    """
+    results = []
+    for index, rel_path, full_path, known_hash in batch:
+        if _worker_deadline is not None and time.monotonic() >= _worker_deadline:
+            break
+        results.append((index, *scan_file(rel_path, full_path, _worker_engine, known_hash, _worker_limits)))
+    return results, metrics.take()
+
+
+def make_batches(items: List, jobs: int, max_batch: int = 256) -> List[List]:
+    """Split work into batches small enough to keep every worker busy"""
+    size = max(1, min(max_batch, len(items) // (jobs * 4) or 1))
+    return [items[i:i + size] for i in range(0, len(items), size)]
@@ -0,0 +1,126 @@
+"""
+SAST result cache - remembers per-file findings between runs
+
+Findings are keyed on file path + size/mtime + content hash + rule-set
+fingerprint and stored in a small SQLite database next to the reports.
+Unchanged files are answered from the cache without being read; files
+whose mtime changed but whose content did not (fresh checkouts, touch)
+are answered after a hash check without being re-scanned.
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..inventory.file_inventory import FileEntry
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    ruleset TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    findings TEXT NOT NULL
+)
+"""
+
+
+def content_hasher():
+    """Incremental hasher producing the same digests as content_hash"""
+    return hashlib.blake2b(digest_size=16)
+
+
+def content_hash(data: bytes) -> str:
+    hasher = content_hasher()
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+class SastCache:
+    """Persistent SAST findings cache stored under the report directory"""
+
+    FILENAME = '.sast-cache.sqlite'
+
+    def __init__(self, output_path: Path, ruleset: str):
+        self.path = Path(output_path) / self.FILENAME
+        self.ruleset = ruleset
+        self.stats = {'hits': 0, 'rehash_hits': 0, 'misses': 0, 'pruned': 0}
+        self._conn = self._connect()
+        # Findings for another rule set are useless, drop them up front
+        cur = self._conn.execute('DELETE FROM files WHERE ruleset != ?', (ruleset,))
+        # the previous run used other rules, so unchanged files may have new findings
+        self.ruleset_changed = cur.rowcount > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        try:
+            conn = sqlite3.connect(str(self.path))
+            conn.execute(SCHEMA)
+            return conn
+        except sqlite3.DatabaseError:
+            # Corrupt or foreign file - start over rather than fail the scan
+            self.path.unlink(missing_ok=True)
+            conn = sqlite3.connect(str(self.path))
+            conn.execute(SCHEMA)
+            return conn
+
+    def _row(self, path: str):
+        return self._conn.execute(
+            'SELECT size, mtime_ns, content_hash, findings FROM files WHERE path = ?', (path,)
+        ).fetchone()
+
+    def get(self, entry: FileEntry) -> Optional[List[Dict]]:
+        """Return cached findings if the file's size and mtime are unchanged"""
+        row = self._row(entry.path)
+        if row and row[0] == entry.size and row[1] == entry.mtime_ns:
+            self.stats['hits'] += 1
+            return json.loads(row[3])
+        return None
+
+    def get_by_hash(self, entry: FileEntry, digest: str) -> Optional[List[Dict]]:
+        """Return cached findings if the content is unchanged despite a new mtime"""
+        row = self._row(entry.path)
+        if row and row[2] == digest:
+            self.stats['rehash_hits'] += 1
+            self._conn.execute(
+                'UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?',
+                (entry.size, entry.mtime_ns, entry.path),
+            )
+            return json.loads(row[3])
+        return None
+
+    def stored_hash(self, entry: FileEntry) -> Optional[str]:
+        row = self._row(entry.path)
+        return row[2] if row else None
+
+    def put(self, entry: FileEntry, digest: str, findings: List[Dict]) -> None:
+        """Store freshly scanned findings (every put is a cache miss)"""
+        self.stats['misses'] += 1
+        self._conn.execute(
+            'INSERT OR REPLACE INTO files (path, ruleset, size, mtime_ns, content_hash, findings) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (entry.path, self.ruleset, entry.size, entry.mtime_ns, digest, json.dumps(findings)),
+        )
+
+    def prune(self, seen_paths: Iterable[str]) -> None:
+        """Forget files that are no longer part of the scan"""
+        self._conn.execute('CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)')
+        self._conn.execute('DELETE FROM seen')
+        self._conn.executemany('INSERT OR IGNORE INTO seen (path) VALUES (?)', ((p,) for p in seen_paths))
+        cur = self._conn.execute('DELETE FROM files WHERE path NOT IN (SELECT path FROM seen)')
+        self.stats['pruned'] += cur.rowcount
+
+    def report(self) -> Dict:
+        return {'enabled': True, 'file': str(self.path), **self.stats}
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+    def abort(self) -> None:
+        """Close without keeping anything this run wrote"""
+        self._conn.rollback()
+        self._conn.close()
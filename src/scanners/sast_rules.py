@@ -0,0 +1,255 @@
+"""
+SAST rules and the compiled rule engine
+
+Running every rule's regex over every file makes scan cost grow with the
+number of rules. The RuleEngine extracts a literal keyword each rule needs
+in order to match (``password``, ``os.system``, ...), finds which keywords
+occur in the lowercased content, and only runs the full regexes of the
+rules whose keyword actually occurs in the file. Small keyword sets are
+found with plain substring searches; large ones in a single pass with one
+trie-shaped regex (a poor man's Aho-Corasick: the regex engine walks shared
+prefixes once instead of trying every keyword at every position).
+
+Everything works on bytes-like buffers (bytes or an mmap), so files are
+never decoded; regexes take start/end offsets so callers can scan a window
+of a large file without copying it.
+"""
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class SastRule(NamedTuple):
+    """A single SAST pattern, matched ignoring case unless case_sensitive"""
+    id: str
+    category: str
+    pattern: str
+    description: str
+    case_sensitive: bool = False   # for fixed formats such as cloud key IDs
+
+
+DEFAULT_RULES = [
+    SastRule('hardcoded-password', 'hardcoded_secrets',
+             r'password\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded password'),
+    SastRule('hardcoded-api-key', 'hardcoded_secrets',
+             r'api_key\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded API key'),
+    SastRule('hardcoded-secret', 'hardcoded_secrets',
+             r'secret\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded secret'),
+    SastRule('hardcoded-token', 'hardcoded_secrets',
+             r'token\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded token'),
+    SastRule('aws-access-key-id', 'hardcoded_secrets',
+             r'\bAKIA[0-9A-Z]{16}\b', 'AWS access key ID', case_sensitive=True),
+    SastRule('gcp-api-key', 'hardcoded_secrets',
+             r'\bAIza[0-9A-Za-z_\-]{35}', 'Google Cloud API key', case_sensitive=True),
+    SastRule('private-key', 'hardcoded_secrets',
+             r'-----BEGIN [A-Z ]*PRIVATE KEY-----', 'Private key'),
+    SastRule('sql-injection-execute', 'sql_injection',
+             r'execute\s*\(\s*["\'].*%s.*["\']', 'Potential SQL injection'),
+    SastRule('sql-injection-format', 'sql_injection',
+             r'\.format\s*\(.*SELECT.*\)', 'Potential SQL injection via format'),
+    SastRule('os-system', 'command_injection',
+             r'os\.system\s*\(', 'Use of os.system (potential command injection)'),
+    SastRule('subprocess-shell', 'command_injection',
+             r'subprocess\.call\s*\(.*shell\s*=\s*True', 'subprocess with shell=True'),
+]
+
+_SPECIAL = set('.^$*+?{}[]()|\\')
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """Longest literal string every match of pattern must contain
+
+    Only looks at the top-level sequence of the pattern: groups and
+    character classes break a literal run, and a top-level ``|`` means
+    nothing is required. Returns None when no useful literal is found.
+    """
+    runs = []
+    run = []
+    depth = 0
+    i, n = 0, len(pattern)
+
+    def close_run():
+        if run:
+            runs.append(''.join(run))
+            run.clear()
+
+    while i < n:
+        c = pattern[i]
+        if depth:
+            if c == '\\':
+                i += 2
+                continue
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+            i += 1
+            continue
+
+        literal = None
+        if c == '\\' and i + 1 < n:
+            nxt = pattern[i + 1]
+            if not nxt.isalnum():
+                literal = nxt
+            i += 2
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] == '^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 2 if pattern[j] == '\\' else 1
+            i = j + 1
+        elif c == '(':
+            depth = 1
+            i += 1
+        elif c == '|':
+            return None
+        elif c in _SPECIAL:
+            i += 1
+        else:
+            literal = c
+            i += 1
+
+        if literal is None:
+            close_run()
+            continue
+
+        quant = pattern[i] if i < n else ''
+        if quant in ('?', '*') or pattern.startswith('{0', i):
+            # the char is optional, so the run ends before it
+            close_run()
+        elif quant in ('+', '{'):
+            run.append(literal)
+            close_run()
+        else:
+            run.append(literal)
+    close_run()
+
+    best = max(runs, key=len, default='')
+    return best.lower() if len(best) >= 3 else None
+
+
+def keyword_trie_regex(keywords) -> str:
+    """Build a regex matching any keyword, factored by common prefixes
+
+    At each position the longest keyword wins, since optional tails are greedy.
+    """
+    trie: Dict = {}
+    for word in keywords:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class RuleEngine:
+    """Compiled set of SAST rules with a single-pass keyword prefilter"""
+
+    # The prefilter lowercases this much of a buffer at a time
+    PREFILTER_WINDOW = 1024 * 1024
+    # Up to this many keywords, separate substring searches (memchr speed)
+    # beat one regex pass; past it the trie regex wins
+    SUBSTRING_SEARCH_MAX = 32
+
+    def __init__(self, rules: Sequence[SastRule]):
+        self.rules = list(rules)
+        self._compiled = [
+            re.compile(rule.pattern.encode('utf-8'), 0 if rule.case_sensitive else re.IGNORECASE)
+            for rule in self.rules
+        ]
+        self._keywords = [
+            keyword.encode('utf-8') if keyword else None
+            for keyword in (required_literal(rule.pattern) for rule in self.rules)
+        ]
+
+        keywords = sorted({k for k in self._keywords if k})
+        self._all_keywords = frozenset(keywords)
+        self._max_keyword = max(map(len, keywords), default=0)
+        # Case-sensitive over lowercased bytes: much faster than re.IGNORECASE,
+        # which defeats the regex engine's first-character skip. bytes.lower()
+        # and bytes IGNORECASE both only fold ASCII, so they agree exactly.
+        self._prefilter = (
+            re.compile(keyword_trie_regex([k.decode('utf-8') for k in keywords]).encode('utf-8'))
+            if len(keywords) > self.SUBSTRING_SEARCH_MAX else None
+        )
+        # A keyword found inside a longer one (pass in password) is present too
+        self._implied: Dict[bytes, FrozenSet[bytes]] = {
+            k: frozenset(other for other in keywords if other in k) for k in keywords
+        }
+        # Matches don't overlap, so a keyword that starts inside another one's
+        # match and runs past its end (the "system" in "os.systemd") can hide.
+        # Those few get a direct substring check when the single pass missed them.
+        self._maybe_hidden = tuple(
+            k for k in keywords
+            if any(k not in other and _overlaps(other, k) for other in keywords if other != k)
+        )
+
+    def fingerprint(self) -> str:
+        """Hash of the rule set, so cached findings die with a rule change"""
+        rules = json.dumps([list(rule) for rule in self.rules])
+        return hashlib.sha256(rules.encode('utf-8')).hexdigest()[:16]
+
+    def keywords_in(self, content, start: int = 0, end: Optional[int] = None) -> FrozenSet[bytes]:
+        """Keywords present in content[start:end]"""
+        if not self._all_keywords:
+            return frozenset()
+        end = len(content) if end is None else end
+        # Windows overlap so a keyword can't be cut in half at the edge
+        overlap = self._max_keyword - 1
+        found = set()
+        for window in range(start, max(end, start + 1), self.PREFILTER_WINDOW):
+            folded = content[window:min(end, window + self.PREFILTER_WINDOW + overlap)].lower()
+            if self._prefilter is None:
+                found.update(k for k in self._all_keywords - found if k in folded)
+            else:
+                for match in self._prefilter.finditer(folded):
+                    keyword = match.group(0)
+                    if keyword not in found:
+                        found.update(self._implied[keyword])
+                for keyword in self._maybe_hidden:
+                    if keyword not in found and keyword in folded:
+                        found.add(keyword)
+            if len(found) == len(self._all_keywords):
+                break  # nothing left to look for
+        return frozenset(found)
+
+    def triggered(self, content, start: int = 0, end: Optional[int] = None) -> List[Tuple[SastRule, re.Pattern]]:
+        """Rules worth running on content[start:end], in rule order"""
+        found = self.keywords_in(content, start, end)
+        return [
+            (rule, regex)
+            for rule, regex, keyword in zip(self.rules, self._compiled, self._keywords)
+            if keyword is None or keyword in found
+        ]
+
+    def finditer(self, content, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[SastRule, re.Match]]:
+        """Yield (rule, match) for every match, grouped by rule in rule order"""
+        end = len(content) if end is None else end
+        for rule, regex in self.triggered(content, start, end):
+            for match in regex.finditer(content, start, end):
+                yield rule, match
+
+
+@lru_cache(maxsize=16)
+def compiled_engine(rules: Tuple[SastRule, ...]) -> RuleEngine:
+    """Shared RuleEngine for a rule set, compiled once per process"""
+    return RuleEngine(rules)
+
+
+def _overlaps(first: bytes, second: bytes) -> bool:
+    """True if a proper suffix of first is a proper prefix of second"""
+    return any(first.endswith(second[:size]) for size in range(1, min(len(first), len(second))))
@@ -3,41 +3,229 @@ Security scanner - integrates multiple security scanning tools
 """
 
 import os
-import json
+import sqlite3
 import subprocess
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
-import re
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..events import EventBus, SocketPublisher
+from ..instrumentation import metrics
+from ..inventory.file_inventory import FileInventory
+from ..inventory.git_changes import changed_paths
+from ..reports.compressed import write_compressed_siblings
+from ..reports.scan_history import ScanHistory
+from .code_mask import SAST_SUFFIXES
+from .findings import REPORT_FORMATS, FindingTable, FindingWriter
+from .json_stream import iter_items
+from .sast import (
+    LARGE_FILE_ACTIONS, ScanLimits, cache_fingerprint, init_worker, make_batches, scan_batch,
+    scan_file,
+)
+from .sast_cache import SastCache
+from .sast_rules import DEFAULT_RULES, compiled_engine
+
+
+# Where the vulnerability objects sit in each tool's JSON report. Snyk
+# emits a list of projects instead of a single object with --all-projects.
+TRIVY_VULNERABILITIES = ('Results.item.Vulnerabilities.item',)
+SNYK_VULNERABILITIES = ('vulnerabilities.item', 'item.vulnerabilities.item')
+
+# History finding key -> the vulnerability field it comes from. A package
+# has no line; its name stands in for the file and name@version for the code
+TRIVY_FINDING_FIELDS = {'rule': 'VulnerabilityID', 'package': 'PkgName', 'version': 'InstalledVersion',
+                        'severity': 'Severity', 'description': 'Title'}
+SNYK_FINDING_FIELDS = {'rule': 'id', 'package': 'packageName', 'version': 'version',
+                       'severity': 'severity', 'description': 'title'}
+
+# SAST checks the deadline every this many cache lookups
+DEADLINE_CHECK_INTERVAL = 256
+
+
+class _DeadlineExceeded(Exception):
+    """The run's deadline passed while SAST was still going"""
+
+
+@lru_cache(maxsize=None)
+def tool_available(tool: str) -> bool:
+    """Check once per process whether an external scanner CLI is installed"""
+    try:
+        subprocess.run([tool, '--version'], capture_output=True, check=True, timeout=30)
+        return True
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+
+
+def read_vulnerabilities(report_file: Path, item_prefixes: Sequence[str],
+                         fields: Dict[str, str]) -> Tuple[Dict[str, int], List[Dict]]:
+    """Severity counts and history findings of a Trivy or Snyk report, in one streamed pass"""
+    severities: Counter = Counter()
+    findings = []
+    with open(report_file, 'r', encoding='utf-8') as f:
+        for item in iter_items(f, item_prefixes, fields.values()):
+            vuln = {key: item.get(name) for key, name in fields.items()}
+            severity = vuln['severity'].upper() if isinstance(vuln['severity'], str) else 'UNKNOWN'
+            severities[severity] += 1
+            package = str(vuln['package'] or '')
+            findings.append({
+                'rule': str(vuln['rule'] or 'unknown'),
+                'category': severity,
+                'description': str(vuln['description'] or ''),
+                'file': package,
+                'line': 0,
+                'code': f"{package}@{vuln['version'] or ''}",
+            })
+    return dict(severities), findings
 
 
 class SecurityScanner:
     """Orchestrates security scans using various tools"""
     
-    def __init__(self, repo_path: str):
+    # Security rules the SAST scanner looks for
+    SAST_RULES = DEFAULT_RULES
+    
+    # Below this many files to scan, a process pool costs more than it saves
+    PARALLEL_MIN_FILES = 200
+    
+    # Minimum seconds between two sast.progress events
+    PROGRESS_INTERVAL = 0.25
+    
+    def __init__(self, repo_path: str, inventory: Optional[FileInventory] = None,
+                 sast_limits: Optional[ScanLimits] = None,
+                 events: Optional[Union[EventBus, SocketPublisher]] = None,
+                 report_format: str = 'jsonl'):
         self.repo_path = Path(repo_path)
+        self.events = events
+        self.report_format = report_format
         if not self.repo_path.exists():
             raise ValueError(f"Repository path does not exist: {repo_path}")
+        self.inventory = inventory or FileInventory(repo_path)
+        self.sast_limits = sast_limits or ScanLimits()
+        self._deadline: Optional[float] = None
+        if self.sast_limits.large_file_action not in LARGE_FILE_ACTIONS:
+            raise ValueError(f"Unknown large file action: {self.sast_limits.large_file_action}")
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format: {report_format}")
     
-    def run_scans(self, scanners: List[str], output_dir: str) -> Dict:
-        """Run specified security scanners"""
-        results = {}
+    def run_scans(self, scanners: List[str], output_dir: str, use_cache: bool = True, jobs: int = 1,
+                  parallel: bool = False, deadline: Optional[float] = None,
+                  on_result: Optional[Callable[[str, Dict], None]] = None, history: bool = True,
+                  since: Optional[str] = None) -> Dict:
+        """Run specified security scanners
+        
+        With use_cache the SAST scanner reuses findings for unchanged files
+        from the previous run in the same output_dir. jobs > 1 scans files in
+        that many worker processes (0 means one per CPU).
+        
+        With parallel the scanners run at the same time in threads, so the
+        total wait is the slowest tool rather than the sum of all of them.
+        deadline caps the whole run in seconds; scanners still running (or
+        not started) when it passes report status 'timeout'. on_result is
+        called with (name, result) as each scanner finishes. Every result
+        carries its wall time in 'duration'.
+        
+        With history, each scanner's findings are also appended to the scan
+        history in output_dir, and the result's 'history' compares them with
+        the previous run of that scanner.
         
+        With since (a git ref), SAST only scans the files changed since the
+        ref's merge base with HEAD; see _sast_inventory for when it scans
+        everything anyway. Such a partial scan isn't added to the history.
+        """
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        for scanner in scanners:
-            if scanner == 'trivy':
-                results['trivy'] = self._run_trivy(output_path)
-            elif scanner == 'snyk':
-                results['snyk'] = self._run_snyk(output_path)
-            elif scanner == 'sast':
-                results['sast'] = self._run_sast(output_path)
-            else:
-                results[scanner] = {'status': 'unknown', 'message': f'Unknown scanner: {scanner}'}
+        self._deadline = time.monotonic() + deadline if deadline is not None else None
+        sast_options = {'use_cache': use_cache, 'jobs': jobs, 'history': history, 'since': since}
+        finished = {}
+        
+        def finish(name, result):
+            finished[name] = result
+            self._emit('scanner.state', scanner=name, state=result.get('status'),
+                       issues_found=result.get('issues_found', 0), duration=result.get('duration'))
+            if on_result:
+                on_result(name, result)
+        
+        self._emit('scan.started', scanners=list(scanners))
         
-        return results
+        if parallel and len(scanners) > 1:
+            pool = ThreadPoolExecutor(max_workers=len(scanners), thread_name_prefix='scanner')
+            futures = {pool.submit(self._run_timed, name, output_path, sast_options): name for name in scanners}
+            pending = set(futures)
+            try:
+                while pending:
+                    done, pending = wait(pending, timeout=self._remaining(), return_when=FIRST_COMPLETED)
+                    if not done:
+                        break  # deadline passed
+                    for future in done:
+                        finish(futures[future], future.result())
+            finally:
+                # Threads can't be killed; running tools are bounded by their
+                # own subprocess timeouts, which are capped at the deadline
+                pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            for name in scanners:
+                if self._remaining() == 0:
+                    break
+                finish(name, self._run_timed(name, output_path, sast_options))
+        
+        for name in scanners:
+            if name not in finished:
+                finish(name, {'status': 'timeout', 'message': 'Scan deadline exceeded', 'issues_found': 0})
+        
+        self._emit('scan.finished', issues_found=sum(r.get('issues_found', 0) for r in finished.values()),
+                   states={name: result.get('status') for name, result in finished.items()})
+        # Report in the order asked for, not the order scanners finished
+        return {name: finished[name] for name in scanners}
+    
+    def _emit(self, event_type: str, **data) -> None:
+        """Publish a progress event if we were given a bus or publisher; never blocks"""
+        if self.events is not None:
+            self.events.publish(event_type, repo=str(self.repo_path), **data)
+    
+    def _remaining(self) -> Optional[float]:
+        """Seconds left before the run's deadline (None when there is none)"""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+    
+    def _check_deadline(self) -> None:
+        if self._deadline is not None and time.monotonic() >= self._deadline:
+            raise _DeadlineExceeded()
     
-    def _run_trivy(self, output_path: Path) -> Dict:
+    def _timeout(self, default: float) -> float:
+        """A tool's own timeout, cut short by the run's deadline"""
+        remaining = self._remaining()
+        return default if remaining is None else min(default, max(remaining, 0.1))
+    
+    def _run_timed(self, scanner: str, output_path: Path, sast_options: Dict) -> Dict:
+        start = time.monotonic()
+        self._emit('scanner.state', scanner=scanner, state='running')
+        if scanner == 'trivy':
+            result = self._run_trivy(output_path, sast_options['history'])
+        elif scanner == 'snyk':
+            result = self._run_snyk(output_path, sast_options['history'])
+        elif scanner == 'sast':
+            result = self._run_sast(output_path, **sast_options)
+        else:
+            result = {'status': 'unknown', 'message': f'Unknown scanner: {scanner}'}
+        report_file = result.get('report_file')
+        if report_file and not report_file.endswith('.gz') and os.path.exists(report_file):
+            # compressed once here so the dashboard never compresses per request
+            try:
+                with metrics.span('report.compress'):
+                    write_compressed_siblings(report_file)
+            except OSError:
+                pass
+        duration = time.monotonic() - start
+        metrics.observe(f'scan.{scanner}', duration)
+        result['duration'] = round(duration, 3)
+        return result
+    
+    def _run_trivy(self, output_path: Path, history: bool = True) -> Dict:
         """Run Trivy container scanner"""
         # Check if Dockerfile exists
         dockerfile = self.repo_path / 'Dockerfile'
@@ -50,9 +238,7 @@ class SecurityScanner:
             }
         
         # Check if trivy is installed
-        try:
-            subprocess.run(['trivy', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if not tool_available('trivy'):
             return {
                 'status': 'error',
                 'message': 'Trivy not installed',
@@ -62,28 +248,30 @@ class SecurityScanner:
         # Run trivy scan
         try:
             output_file = output_path / 'trivy-report.json'
-            result = subprocess.run(
-                ['trivy', 'config', str(self.repo_path), '--format', 'json', '--output', str(output_file)],
-                capture_output=True,
-                text=True,
-                timeout=120
-            )
+            with metrics.span('scan.trivy.subprocess'):
+                result = subprocess.run(
+                    ['trivy', 'config', str(self.repo_path), '--format', 'json', '--output', str(output_file)],
+                    capture_output=True,
+                    text=True,
+                    timeout=self._timeout(120)
+                )
             
-            # Parse results
-            issues = 0
-            if output_file.exists():
-                with open(output_file, 'r') as f:
-                    data = json.load(f)
-                    # Count vulnerabilities (this is simplified)
-                    if 'Results' in data:
-                        for result in data['Results']:
-                            issues += len(result.get('Vulnerabilities', []))
+            # Parse results - streamed, the report can be huge
+            if not output_file.exists():
+                return {'status': 'success', 'issues_found': 0, 'severity_counts': {}}
+            with metrics.span('scan.trivy.parse'):
+                severities, findings = read_vulnerabilities(output_file, TRIVY_VULNERABILITIES,
+                                                            TRIVY_FINDING_FIELDS)
             
-            return {
+            result = {
                 'status': 'success',
-                'issues_found': issues,
+                'issues_found': len(findings),
+                'severity_counts': severities,
                 'report_file': str(output_file)
             }
+            if history:
+                result['history'] = self._record_history(output_path, 'trivy', findings)
+            return result
         except Exception as e:
             return {
                 'status': 'error',
@@ -91,7 +279,7 @@ class SecurityScanner:
                 'issues_found': 0
             }
     
-    def _run_snyk(self, output_path: Path) -> Dict:
+    def _run_snyk(self, output_path: Path, history: bool = True) -> Dict:
         """Run Snyk dependency scanner"""
         # Check for SNYK_TOKEN
         snyk_token = os.getenv('SNYK_TOKEN')
@@ -104,9 +292,7 @@ class SecurityScanner:
             }
         
         # Check if snyk is installed
-        try:
-            subprocess.run(['snyk', '--version'], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        if not tool_available('snyk'):
             return {
                 'status': 'error',
                 'message': 'Snyk CLI not installed',
@@ -116,30 +302,33 @@ class SecurityScanner:
         # Run snyk test
         try:
             output_file = output_path / 'snyk-report.json'
-            result = subprocess.run(
-                ['snyk', 'test', '--json'],
-                cwd=str(self.repo_path),
-                capture_output=True,
-                text=True,
-                timeout=180
-            )
-            
-            # Save output
-            with open(output_file, 'w') as f:
-                f.write(result.stdout)
+            # Snyk writes its report straight into the file, never into memory
+            with metrics.span('scan.snyk.subprocess'), open(output_file, 'wb') as f:
+                subprocess.run(
+                    ['snyk', 'test', '--json'],
+                    cwd=str(self.repo_path),
+                    stdout=f,
+                    stderr=subprocess.DEVNULL,
+                    timeout=self._timeout(180)
+                )
             
             # Parse results
             try:
-                data = json.loads(result.stdout)
-                issues = len(data.get('vulnerabilities', []))
-            except json.JSONDecodeError:
-                issues = 0
+                with metrics.span('scan.snyk.parse'):
+                    severities, findings = read_vulnerabilities(output_file, SNYK_VULNERABILITIES,
+                                                                SNYK_FINDING_FIELDS)
+            except ValueError:
+                severities, findings = {}, None  # not a report: nothing to record
             
-            return {
+            result = {
                 'status': 'success',
-                'issues_found': issues,
+                'issues_found': len(findings or ()),
+                'severity_counts': severities,
                 'report_file': str(output_file)
             }
+            if history and findings is not None:
+                result['history'] = self._record_history(output_path, 'snyk', findings)
+            return result
         except Exception as e:
             return {
                 'status': 'error',
@@ -147,65 +336,187 @@ class SecurityScanner:
                 'issues_found': 0
             }
     
-    def _run_sast(self, output_path: Path) -> Dict:
-        """Run basic SAST (Static Application Security Testing)"""
+    def _run_sast(self, output_path: Path, use_cache: bool = True, jobs: int = 1, history: bool = True,
+                  since: Optional[str] = None) -> Dict:
+        """Run basic SAST (Static Application Security Testing)
+        
+        If the run's deadline passes first, the scan stops and returns
+        status 'timeout' leaving the report, the cache and the history as
+        they were: a thread run_scans gave up on must not keep working.
+        """
         # This is a simplified SAST implementation
         # Just scans for common security issues in code
         
-        issues = []
-        
-        # Define security patterns to look for
-        patterns = {
-            'hardcoded_secrets': [
-                (r'password\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded password'),
-                (r'api_key\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded API key'),
-                (r'secret\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded secret'),
-                (r'token\s*=\s*["\'][^"\']+["\']', 'Potential hardcoded token'),
-            ],
-            'sql_injection': [
-                (r'execute\s*\(\s*["\'].*%s.*["\']', 'Potential SQL injection'),
-                (r'\.format\s*\(.*SELECT.*\)', 'Potential SQL injection via format'),
-            ],
-            'command_injection': [
-                (r'os\.system\s*\(', 'Use of os.system (potential command injection)'),
-                (r'subprocess\.call\s*\(.*shell\s*=\s*True', 'subprocess with shell=True'),
-            ],
-        }
+        engine = compiled_engine(tuple(self.SAST_RULES))
+        cache = SastCache(output_path, cache_fingerprint(engine, self.sast_limits)) if use_cache else None
+        inventory, scope = self._sast_inventory(since, cache)
+        partial = scope is not None and scope['mode'] == 'changed'
+        files = inventory.with_suffixes(SAST_SUFFIXES)
+        
+        # Findings go into the table, and out to the report, in inventory
+        # order as soon as every file before them is done
+        table = FindingTable()
+        output_file = output_path / ('sast-report' + REPORT_FORMATS[self.report_format])
+        writer = FindingWriter(str(output_file), self.report_format)
+        cached: Dict[int, List[Dict]] = {}
+        next_file = 0
+        scanned = None
+        completed = False
+        # How many scanned files were binary or over the size limit
+        notes = {'binary': 0, 'skipped': 0, 'sampled': 0, 'chunked': 0}
+        
+        def add_cached(upto):
+            nonlocal next_file
+            for i in range(next_file, upto):
+                table.extend(cached.pop(i, ()))
+            next_file = max(next_file, upto)
         
-        # Scan Python files
-        for root, dirs, files in os.walk(self.repo_path):
-            dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', 'venv', '__pycache__']]
+        try:
+            lookup = time.perf_counter()
+            pending = []
+            for index, entry in enumerate(files):
+                if index % DEADLINE_CHECK_INTERVAL == 0:
+                    self._check_deadline()
+                hit = cache.get(entry) if cache else None
+                if hit is not None:
+                    cached[index] = hit
+                else:
+                    known_hash = cache.stored_hash(entry) if cache else None
+                    pending.append((index, entry.path, self.inventory.full_path(entry), known_hash))
+            if cache:
+                metrics.observe('sast.cache_lookup', time.perf_counter() - lookup)
+            
+            if jobs == 0:
+                jobs = os.cpu_count() or 1
+            if jobs > 1 and len(pending) >= self.PARALLEL_MIN_FILES:
+                scanned = self._scan_parallel(pending, jobs)
+            else:
+                scanned = (
+                    (index, *scan_file(rel_path, full_path, engine, known_hash, self.sast_limits))
+                    for index, rel_path, full_path, known_hash in pending
+                )
+            
+            findings = sum(len(issues) for issues in cached.values())
+            done = len(files) - len(pending)  # answered from the cache
+            last_progress = 0.0
+            for index, digest, file_issues, note in scanned:
+                self._check_deadline()
+                done += 1
+                now = time.monotonic()
+                if self.events is not None and now - last_progress >= self.PROGRESS_INTERVAL:
+                    last_progress = now
+                    self._emit('sast.progress', files_scanned=done, files_total=len(files), findings=findings)
+                if note:
+                    notes[note] += 1
+                if digest is None:
+                    continue  # skip files we can't read
+                entry = files[index]
+                if file_issues is None:
+                    file_issues = cache.get_by_hash(entry, digest)
+                elif cache:
+                    cache.put(entry, digest, file_issues)
+                add_cached(index)
+                table.extend(file_issues)
+                next_file = index + 1
+                if file_issues:
+                    write = time.perf_counter()
+                    writer.write_new(table)
+                    metrics.observe('sast.report_write', time.perf_counter() - write)
+                findings += len(file_issues)
             
-            for file in files:
-                if file.endswith('.py'):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            
-                            for category, pattern_list in patterns.items():
-                                for pattern, description in pattern_list:
-                                    matches = re.finditer(pattern, content, re.IGNORECASE)
-                                    for match in matches:
-                                        # Get line number
-                                        line_num = content[:match.start()].count('\n') + 1
-                                        issues.append({
-                                            'file': str(Path(file_path).relative_to(self.repo_path)),
-                                            'line': line_num,
-                                            'category': category,
-                                            'description': description,
-                                            'code': match.group(0)
-                                        })
-                    except (OSError, UnicodeDecodeError):
-                        pass  # skip files we can't read
-        
-        # Save report
-        output_file = output_path / 'sast-report.json'
-        with open(output_file, 'w') as f:
-            json.dump({'issues': issues}, f, indent=2)
-        
-        return {
+            add_cached(len(files))
+            self._check_deadline()
+            with metrics.span('sast.report_write'):
+                writer.close(table)
+            metrics.count('sast.files', len(files))
+            metrics.count('sast.files_scanned', len(pending))
+            metrics.count('sast.findings', len(table))
+            self._emit('sast.progress', files_scanned=len(files), files_total=len(files), findings=findings)
+            if cache and not partial:
+                cache.prune(entry.path for entry in files)
+            completed = True
+        except _DeadlineExceeded:
+            writer.abort()
+            metrics.count('sast.deadline_exceeded')
+            return {'status': 'timeout', 'message': 'Scan deadline exceeded', 'issues_found': 0}
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            if scanned is not None and hasattr(scanned, 'close'):
+                scanned.close()  # stops the process pool without waiting for queued batches
+            if cache:
+                if completed:
+                    cache.close()
+                else:
+                    cache.abort()
+                for stat in ('hits', 'rehash_hits', 'misses'):
+                    metrics.count(f'sast.cache.{stat}', cache.stats[stat])
+        
+        result = {
             'status': 'success',
-            'issues_found': len(issues),
-            'report_file': str(output_file)
+            'issues_found': len(table),
+            'category_counts': table.category_counts(),
+            'report_file': str(output_file),
+            'cache': cache.report() if cache else {'enabled': False},
+            'files': notes,
         }
+        if scope is not None:
+            result['since'] = scope
+        if history and not partial:
+            result['history'] = self._record_history(output_path, 'sast', table)
+        return result
+    
+    def _sast_inventory(self, since: Optional[str],
+                        cache: Optional[SastCache]) -> Tuple[FileInventory, Optional[Dict]]:
+        """The files SAST should look at, and how they were chosen
+        
+        Only the files changed since the ref when git can say which those
+        are, but the whole repository if the rules changed since the last
+        scan: unchanged files may then have new findings too. Without the
+        cache there is no last scan to compare the rules with.
+        """
+        if since is None:
+            return self.inventory, None
+        if cache is not None and cache.ruleset_changed:
+            reason = 'rules changed since the last scan'
+        else:
+            try:
+                with metrics.span('sast.changed_paths'):
+                    paths = changed_paths(str(self.repo_path), since)
+            except ValueError as e:
+                reason = str(e)
+            else:
+                inventory = FileInventory.for_paths(str(self.repo_path), paths, self.inventory.ignore_policy)
+                return inventory, {'ref': since, 'mode': 'changed', 'changed_files': len(inventory.files())}
+        return self.inventory, {'ref': since, 'mode': 'full', 'reason': reason}
+    
+    def _record_history(self, output_path: Path, scanner: str, issues: Sequence[Dict]) -> Dict:
+        """Append a run to the scan history and compare it with the one before"""
+        try:
+            with metrics.span('history.record'), ScanHistory.in_dir(str(output_path)) as history:
+                run_id = history.record(os.path.realpath(self.repo_path), scanner, issues)
+                previous = history.previous_run(run_id)
+                if previous is None:
+                    delta = {'new': len(issues), 'fixed': 0, 'unchanged': 0}
+                else:
+                    delta = history.compare(previous, run_id)
+        except sqlite3.Error as e:
+            # losing the history must not fail the scan
+            return {'error': str(e)}
+        return {'run_id': run_id, 'previous_run': previous, **delta}
+    
+    def _scan_parallel(self, pending: List, jobs: int):
+        """Fan file batches out over a process pool, yielding results in order"""
+        batches = make_batches(pending, jobs)
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                   initargs=(self.SAST_RULES, self.sast_limits, self._deadline))
+        finished = False
+        try:
+            for batch_results, worker_metrics in pool.map(scan_batch, batches):
+                metrics.merge(worker_metrics)
+                yield from batch_results
+            finished = True
+        finally:
+            # stopped early (deadline, error): drop the batches not started yet
+            pool.shutdown(wait=finished, cancel_futures=not finished)
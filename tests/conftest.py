@@ -3,6 +3,19 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add src to path for imports
 src_path = Path(__file__).parent.parent / 'src'
 sys.path.insert(0, str(src_path))
+
+
+@pytest.fixture
+def write_repo():
+    """Write {relative path: text} files under a directory, creating subdirectories"""
+    def write(root, files):
+        for name, text in files.items():
+            path = Path(root) / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+    return write
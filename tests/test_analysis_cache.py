@@ -0,0 +1,96 @@
+"""Tests for the analysis result cache"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.analyzers.analysis_cache import AnalysisCache, repo_state
+from src.analyzers.repo_analyzer import RepositoryAnalyzer
+from src.inventory.file_inventory import IgnorePolicy
+
+
+def _analyze(repo, cache_dir, **kwargs):
+    cache = AnalysisCache(cache_dir)
+    result = RepositoryAnalyzer(repo, cache=cache).analyze(**kwargs)
+    return result, cache.stats
+
+
+def test_cache_hit_and_partial_invalidation():
+    """Test that only the changed top-level directory is walked again"""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cache_dir:
+        (Path(tmpdir) / 'app').mkdir()
+        (Path(tmpdir) / 'app' / 'main.py').write_text('print("hello")')
+        (Path(tmpdir) / 'web').mkdir()
+        (Path(tmpdir) / 'web' / 'style.css').write_text('body {}')
+        
+        first, stats = _analyze(tmpdir, cache_dir)
+        assert first['languages'] == ['python']
+        assert stats['misses'] == 1
+        
+        second, stats = _analyze(tmpdir, cache_dir)
+        assert second == first
+        assert stats['hits'] == 1
+        
+        (Path(tmpdir) / 'web' / 'app.js').write_text('let x = 1')
+        third, stats = _analyze(tmpdir, cache_dir)
+        assert third['languages'] == ['javascript', 'python']
+        assert stats['partial_hits'] == 1
+        assert stats['subtrees_scanned'] == 1
+        
+        _, stats = _analyze(tmpdir, cache_dir, refresh=True)
+        assert stats['misses'] == 1 and stats['subtrees_reused'] == 0
+
+
+def test_cache_uses_git_state():
+    """Test that a git checkout is keyed on HEAD plus uncommitted changes"""
+    if shutil.which('git') is None:
+        pytest.skip('git not installed')
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cache_dir:
+        git = ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+        (Path(tmpdir) / 'src').mkdir()
+        (Path(tmpdir) / 'src' / 'main.go').write_text('package main')
+        (Path(tmpdir) / 'lib').mkdir()
+        (Path(tmpdir) / 'lib' / 'util.rb').write_text('puts 1')
+        subprocess.run(git + ['init', '-q'], cwd=tmpdir, check=True)
+        subprocess.run(git + ['add', '.'], cwd=tmpdir, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'init'], cwd=tmpdir, check=True)
+        
+        assert repo_state(Path(tmpdir), IgnorePolicy()).source == 'git'
+        first, _ = _analyze(tmpdir, cache_dir)
+        assert first['languages'] == ['go', 'ruby']
+        _, stats = _analyze(tmpdir, cache_dir)
+        assert stats['hits'] == 1
+        
+        # untracked file: only lib/ is walked again
+        (Path(tmpdir) / 'lib' / 'tool.py').write_text('x = 1')
+        second, stats = _analyze(tmpdir, cache_dir)
+        assert second['languages'] == ['go', 'python', 'ruby']
+        assert stats['subtrees_scanned'] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    """Test size-based eviction of the oldest cache entries"""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as cache_dir:
+        repos = []
+        for i in range(3):
+            repo = Path(tmpdir) / f'repo{i}'
+            repo.mkdir()
+            (repo / 'main.py').write_text('x = 1')
+            repos.append(repo)
+        
+        cache = AnalysisCache(cache_dir)
+        RepositoryAnalyzer(str(repos[0]), cache=cache).analyze()
+        entry_size = sum(f.stat().st_size for f in Path(cache_dir).glob('*.json'))
+        os.utime(next(Path(cache_dir).glob('*.json')), ns=(0, 0))
+        
+        cache = AnalysisCache(cache_dir, max_bytes=entry_size * 2 + 10)
+        for repo in repos[1:]:
+            RepositoryAnalyzer(str(repo), cache=cache).analyze()
+        
+        assert cache.stats['evicted'] == 1
+        assert cache.load(repos[0]) is None
+        assert cache.load(repos[2]) is not None
@@ -72,3 +72,39 @@ def test_analyzer_handles_empty_repo():
         assert result['languages'] == []
         assert result['has_docker'] is False
         assert result['has_tests'] is False
+
+
+def test_analyzer_language_stats():
+    """Test per-language file counts and byte totals"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / 'main.py').write_text('x = 1\n')
+        (Path(tmpdir) / 'util.py').write_text('y = 22\n')
+        (Path(tmpdir) / 'app.jsx').write_text('<App />')
+        (Path(tmpdir) / 'README.md').write_text('# readme')
+        
+        result = RepositoryAnalyzer(tmpdir).analyze()
+        
+        assert result['languages'] == ['javascript', 'python']
+        assert result['language_stats'] == {
+            'javascript': {'files': 1, 'bytes': 7},
+            'python': {'files': 2, 'bytes': 13},
+        }
+
+
+def test_analyzer_sampled_mode_stops_early():
+    """Test that sampled mode stops once no new language shows up"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(30):
+            (Path(tmpdir) / f'a{i:02}.py').write_text('x = 1')
+        (Path(tmpdir) / 'z.go').write_text('package main')
+        
+        analyzer = RepositoryAnalyzer(tmpdir)
+        analyzer.SAMPLE_STABLE_FILES = 10
+        result = analyzer.analyze(sample=True)
+        
+        assert result['sampled'] is True
+        assert result['languages'] == ['python']
+        assert result['language_stats']['python']['files'] == 11
+        
+        analyzer.SAMPLE_STABLE_FILES = 100
+        assert analyzer.analyze(sample=True)['languages'] == ['go', 'python']
@@ -0,0 +1,88 @@
+"""Tests for batch mode"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src import batch
+from src.batch import BatchOptions, read_manifest, run_batch
+
+
+_process_repo = batch.process_repo
+
+
+def _crash_on_bad_repo(index, repo_path):
+    if repo_path.endswith('bad'):
+        os._exit(1)
+    return _process_repo(index, repo_path)
+
+
+def _make_repos(root, names):
+    repos = []
+    for name in names:
+        repo = Path(root) / name
+        repo.mkdir()
+        (repo / 'app.py').write_text('password = "hunter2"\n')
+        repos.append(str(repo))
+    return repos
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        monkeypatch.setenv('PIPELINE_GEN_CACHE_DIR', tmpdir)
+        yield tmpdir
+
+
+def test_batch_runs_every_stage_and_isolates_failures():
+    """Test that each repo gets a result and a missing repo doesn't stop the batch"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repos = _make_repos(tmpdir, ['one', 'two'])
+        repos.insert(1, str(Path(tmpdir) / 'missing'))
+        options = BatchOptions(output_dir=str(Path(tmpdir) / 'out'))
+        
+        records = sorted(run_batch(repos, options), key=lambda r: r['index'])
+        
+        assert [r['status'] for r in records] == ['success', 'error', 'success']
+        assert records[1]['stage'] == 'analyze'
+        assert records[0]['analysis']['languages'] == ['python']
+        assert records[0]['scans']['sast']['issues_found'] == 1
+        assert Path(records[2]['pipeline']).exists()
+        assert records[0]['pipeline'] != records[2]['pipeline']
+
+
+def test_batch_parallel_matches_serial():
+    """Test that a worker pool gives the same results as one process"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repos = _make_repos(tmpdir, [f'repo{i}' for i in range(6)])
+        options = BatchOptions(stages=('analyze', 'scan'), output_dir=str(Path(tmpdir) / 'out'), use_cache=False)
+        
+        serial = {r['index']: r['scans']['sast']['issues_found'] for r in run_batch(repos, options)}
+        parallel = {r['index']: r['scans']['sast']['issues_found'] for r in run_batch(repos, options, jobs=3)}
+        
+        assert parallel == serial
+        assert sorted(parallel) == list(range(6))
+
+
+def test_batch_survives_worker_crash(monkeypatch):
+    """Test that only the repo that kills its worker is reported as failed"""
+    monkeypatch.setattr(batch, 'process_repo', _crash_on_bad_repo)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repos = _make_repos(tmpdir, ['a', 'b', 'bad', 'c', 'd'])
+        options = BatchOptions(stages=('analyze',), output_dir=str(Path(tmpdir) / 'out'))
+        
+        records = {r['index']: r for r in run_batch(repos, options, jobs=2)}
+        
+        assert sorted(records) == list(range(5))
+        assert [i for i, r in records.items() if r['status'] != 'success'] == [2]
+
+
+def test_read_manifest_skips_comments():
+    """Test manifest parsing: comments, blank lines and relative paths"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manifest = Path(tmpdir) / 'repos.txt'
+        manifest.write_text('# nightly\nservices/api\n\n/abs/path  # pinned\n')
+        
+        assert read_manifest(str(manifest)) == [str(Path(tmpdir).resolve() / 'services/api'), '/abs/path']
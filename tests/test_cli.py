@@ -0,0 +1,64 @@
+"""Tests for CLI startup cost"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time allowed for src.cli, in ms (about 3x what it takes
+# on a laptop with only click loaded; pulling in jinja2/yaml/scanners blows it)
+IMPORT_BUDGET_MS = float(os.getenv('PIPELINE_GEN_IMPORT_BUDGET_MS', '150'))
+
+HEAVY_MODULES = ['flask', 'flask_cors', 'yaml', 'jinja2', 'src.scanners.security_scanner', 'src.batch']
+
+
+def _run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=str(REPO_ROOT), capture_output=True, text=True, timeout=60)
+
+
+def _modules_loaded_by(command):
+    script = (
+        'import json, sys\n'
+        'from src import cli\n'
+        f'sys.argv = ["pipeline-gen"] + {command!r}\n'
+        'try:\n'
+        '    cli.main()\n'
+        'except SystemExit:\n'
+        '    pass\n'
+        f'print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n'
+    )
+    result = _run_python('-c', script)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cli_import_time_budget():
+    """Test that importing the CLI stays under the cold-start budget"""
+    # warm the bytecode cache so we time imports, not compilation
+    _run_python('-c', 'import src.cli')
+    result = _run_python('-X', 'importtime', '-c', 'import src.cli')
+    
+    for line in result.stderr.splitlines():
+        if line.rstrip().endswith('| src.cli'):
+            cumulative_ms = int(line.split('|')[1]) / 1000
+            break
+    else:
+        pytest.fail(f'src.cli missing from -X importtime output:\n{result.stderr[-2000:]}')
+    
+    assert cumulative_ms < IMPORT_BUDGET_MS, f'src.cli took {cumulative_ms:.1f} ms to import'
+
+
+def test_version_and_analyze_skip_heavy_imports():
+    """Test that version and analyze don't import flask, yaml, jinja2 or the scanners"""
+    assert _modules_loaded_by(['version']) == []
+    assert _modules_loaded_by(['analyze', '--repo-path', str(REPO_ROOT / 'docs'), '--no-cache']) == []
+
+
+def test_sast_engine_skips_analyzers():
+    """Test that the SAST engine pool workers load doesn't import the analyzers package"""
+    result = _run_python('-c', 'import sys, src.scanners.sast; print("src.analyzers" in sys.modules)')
+    assert result.stdout.strip() == 'False'
@@ -0,0 +1,56 @@
+"""Tests for comment and docstring masks"""
+
+from src.scanners.code_mask import C_STYLE, PHP, PYTHON, RUBY, build_mask, code_mask, syntax_for
+
+
+def _masked(content, syntax):
+    """The masked text of content"""
+    return [content[start:end] for start, end in build_mask(content, syntax).ranges()]
+
+
+def test_python_comments_and_docstrings():
+    """Test that comments and docstrings are masked but strings in code are not"""
+    content = (
+        b'"""Module docstring"""\n'
+        b'url = "http://example.com/#anchor"  # a comment\n'
+        b'def f():\n'
+        b'    """Function docstring with password = "x" """\n'
+        b'    return f("""not a docstring""")\n'
+    )
+    
+    assert _masked(content, PYTHON) == [
+        b'"""Module docstring"""',
+        b'# a comment',
+        b'"""Function docstring with password = "x" """',
+    ]
+    mask = build_mask(content, PYTHON)
+    assert mask.covers(content.index(b'password'))
+    assert not mask.covers(content.index(b'url'))
+    assert not mask.covers(content.index(b'not a docstring'))
+
+
+def test_c_style_comments():
+    """Test line and block comments, and comment markers inside strings"""
+    content = b'const url = "http://x"; // trailing\n/* block\n   comment */ let s = `a /* b`;\n'
+    
+    assert _masked(content, C_STYLE) == [b'// trailing', b'/* block\n   comment */']
+
+
+def test_ruby_and_php_comments():
+    """Test Ruby's =begin blocks and PHP's shell-style comments and attributes"""
+    ruby = b'x = "#{y}" # note\n=begin\nsecret = "x"\n=end\nputs x\n'
+    assert _masked(ruby, RUBY) == [b'# note', b'=begin\nsecret = "x"\n=end']
+    
+    php = b'<?php\n#[Attribute]\n$a = 1; # shell comment\n// line\n'
+    assert _masked(php, PHP) == [b'# shell comment', b'// line']
+
+
+def test_syntax_by_suffix_and_cache():
+    """Test that syntax follows the language suffixes and masks are reused by hash"""
+    assert syntax_for('src/app.py') is PYTHON
+    assert syntax_for('web/index.tsx') is C_STYLE
+    assert syntax_for('README.md') is None
+    assert syntax_for('dir.py/Makefile') is None
+    
+    first = code_mask(PYTHON, b'# one\n', 'hash-1')
+    assert code_mask(PYTHON, b'# different\n', 'hash-1') is first
@@ -1,10 +1,12 @@
 """Tests for configuration parser"""
 
+import os
 import pytest
 from pathlib import Path
 import tempfile
 
-from src.config.config_parser import ConfigParser
+from src.config.config_parser import ConfigParser, parse_overrides
+from src.instrumentation import metrics
 
 
 def test_parser_uses_defaults_when_no_config():
@@ -57,3 +59,78 @@ pipeline:
         assert config['pipeline']['name'] == 'My Pipeline'
         # But still have default triggers
         assert 'triggers' in config['pipeline']
+
+
+def test_parse_results_do_not_leak_between_calls():
+    """Test that changing a parsed config changes neither the defaults nor later parses"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / 'pipeline-config.yml').write_text("security:\n  snyk_enabled: true\n")
+        
+        config = ConfigParser(tmpdir).parse()
+        config['security']['trivy_enabled'] = False
+        config['pipeline']['triggers'].append('schedule')
+        
+        assert ConfigParser.DEFAULT_CONFIG['security']['snyk_enabled'] is False
+        assert ConfigParser.DEFAULT_CONFIG['pipeline']['triggers'] == ['push', 'pull_request']
+        again = ConfigParser(tmpdir).parse()
+        assert again['security'] == {'trivy_enabled': True, 'snyk_enabled': True, 'sast_enabled': True}
+        assert again['pipeline']['triggers'] == ['push', 'pull_request']
+
+
+def test_layers_apply_in_order(monkeypatch):
+    """Test defaults < org config < repo config < overrides"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        org = Path(tmpdir) / 'org.yml'
+        org.write_text("runtime:\n  python_version: '3.10'\n  node_version: '18'\nsecurity:\n  snyk_enabled: true\n")
+        (Path(tmpdir) / 'pipeline-config.yml').write_text("runtime:\n  python_version: '3.11'\n")
+        monkeypatch.setenv('PIPELINE_GEN_ORG_CONFIG', str(org))
+        
+        overrides = parse_overrides(['security.snyk_enabled=false', 'pipeline.triggers=[push]'])
+        config = ConfigParser(tmpdir, overrides=overrides).parse()
+        
+        assert config['runtime'] == {'python_version': '3.11', 'node_version': '18'}
+        assert config['security']['snyk_enabled'] is False
+        assert config['pipeline'] == {'name': 'CI/CD Pipeline', 'triggers': ['push']}
+        with pytest.raises(ValueError):
+            ConfigParser(tmpdir, org_config=str(Path(tmpdir) / 'missing.yml')).parse()
+        with pytest.raises(ValueError):
+            parse_overrides(['no-equals-sign'])
+
+
+def test_shared_org_config_is_read_and_merged_once():
+    """Test that repos sharing an org config reuse its parse and merge"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        org = Path(tmpdir) / 'org.yml'
+        org.write_text("pipeline:\n  name: Org Pipeline\n")
+        repos = []
+        for i in range(3):
+            repo = Path(tmpdir) / f'repo{i}'
+            repo.mkdir()
+            (repo / 'pipeline-config.yml').write_text(f"runtime:\n  python_version: '3.{10 + i}'\n")
+            repos.append(repo)
+        before = metrics.snapshot()['counters']
+        
+        for _ in range(2):
+            for repo in repos:
+                assert ConfigParser(str(repo), org_config=str(org)).parse()['pipeline']['name'] == 'Org Pipeline'
+        
+        after = metrics.snapshot()['counters']
+        assert after['config.files_read'] - before.get('config.files_read', 0) == 4  # org + 3 repos
+        assert after['config.merges'] - before.get('config.merges', 0) == 4  # defaults+org, then each repo
+        
+        # an edited file is read again
+        (repos[0] / 'pipeline-config.yml').write_text("runtime:\n  python_version: '3.13'\n")
+        os.utime(repos[0] / 'pipeline-config.yml', (1, 1))
+        assert ConfigParser(str(repos[0]), org_config=str(org)).parse()['runtime']['python_version'] == '3.13'
+
+
+def test_non_string_keys():
+    """Test that a GitHub-style on: key (loaded as True) doesn't break the layer digest"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / 'pipeline-config.yml').write_text("on:\n  push: {}\n'True': string key\n")
+        
+        config = ConfigParser(tmpdir).parse()
+        
+        assert config[True] == {'push': {}}
+        assert config['True'] == 'string key'
+        assert config['pipeline']['name'] == 'CI/CD Pipeline'
@@ -0,0 +1,131 @@
+"""Tests for the watch daemon"""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.daemon import (
+    INotify, InotifyWatcher, PollingWatcher, WatchDaemon, WatchedRepo, default_socket_path, request, subscribe,
+)
+from src.inventory.file_inventory import IgnorePolicy
+
+
+REPO_FILES = {
+    'app.py': 'password = "hunter2"\n',
+    'lib/util.py': 'def helper():\n    return 1\n',
+    'web/main.js': 'console.log(1)\n',
+}
+
+
+def _touch(path, text):
+    path.write_text(text)
+    # make sure the mtime differs even on coarse filesystem clocks
+    later = time.time() + 5
+    os.utime(path, (later, later))
+
+
+def test_watched_repo_applies_changes_incrementally(write_repo):
+    """Test that updates rescan only changed files and keep analysis and findings current"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_repo(tmpdir, REPO_FILES)
+        repo = WatchedRepo(tmpdir)
+        
+        assert repo.update() == {'changed': 3, 'removed': 0}
+        assert repo.analysis()['languages'] == ['javascript', 'python']
+        assert repo.findings()['issues_found'] == 1
+        
+        _touch(Path(tmpdir) / 'lib' / 'util.py', 'os.system(cmd)\n')
+        (Path(tmpdir) / 'web' / 'main.js').unlink()
+        assert repo.update(['lib/util.py', 'web/main.js']) == {'changed': 1, 'removed': 1}
+        
+        result = repo.findings()
+        assert [f['file'] for f in result['findings']] == ['app.py', 'lib/util.py']
+        assert result['category_counts'] == {'hardcoded_secrets': 1, 'command_injection': 1}
+        assert repo.analysis()['languages'] == ['python']
+        assert repo.update() == {'changed': 0, 'removed': 0}
+        assert repo.generation == 2
+
+
+def test_daemon_answers_over_socket(write_repo):
+    """Test the socket protocol, fresh requests and change events"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_repo(tmpdir, REPO_FILES)
+        socket_path = os.path.join(tmpdir, 'd.sock')
+        daemon = WatchDaemon(tmpdir, socket_path, watcher=PollingWatcher(interval=0.05))
+        daemon.start()
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        try:
+            assert request(socket_path, 'status')['files'] == 3
+            assert request(socket_path, 'analyze')['languages'] == ['javascript', 'python']
+            events = subscribe(socket_path)
+            
+            _touch(Path(tmpdir) / 'new.py', 'api_key = "abc"\n')
+            assert request(socket_path, 'scan', fresh=True)['issues_found'] == 2
+            event = next(events)
+            assert event['type'] == 'watch.changed' and event['data']['changed'] == 1
+            events.close()
+            
+            with pytest.raises(ValueError):
+                request(socket_path, 'bogus')
+            for bad in ('x', -1, True, [1]):
+                with pytest.raises(ValueError):
+                    request(socket_path, 'scan', limit=bad)
+            with pytest.raises(ValueError):
+                request(socket_path, 'scan', fresh='yes')
+            assert request(socket_path, 'scan', limit=None)['issues_found'] == 2
+            
+            def vanished(paths=None):
+                raise FileNotFoundError(2, 'No such file or directory', 'lib')
+            daemon.repo.update = vanished
+            with pytest.raises(ValueError, match='No such file'):
+                request(socket_path, 'refresh')
+            with pytest.raises(ValueError, match='No such file'):
+                request(socket_path, 'status', fresh=True)
+            del daemon.repo.update
+            assert request(socket_path, 'status', fresh=True)['files'] == 4
+            with pytest.raises(ValueError):
+                WatchDaemon(tmpdir, socket_path).start()  # already served
+        finally:
+            daemon.shutdown()
+            thread.join(timeout=5)
+        assert not os.path.exists(socket_path)
+
+
+def test_default_socket_path_is_private(monkeypatch):
+    """Test that the socket goes in a 0700 directory of ours and open directories are refused"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        monkeypatch.setenv('XDG_RUNTIME_DIR', tmpdir)
+        
+        path = default_socket_path('.')
+        
+        assert os.path.dirname(path) == os.path.join(tmpdir, 'pipeline-gen')
+        assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+        os.chmod(os.path.dirname(path), 0o777)
+        with pytest.raises(ValueError):
+            default_socket_path('.')
+
+
+@pytest.mark.skipif(INotify is None, reason='inotify_simple is not installed')
+def test_inotify_watcher_reports_changed_paths(write_repo):
+    """Test that inotify events come out as repo-relative paths, and new directories as a re-walk"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_repo(tmpdir, REPO_FILES)
+        watcher = InotifyWatcher(tmpdir, IgnorePolicy())
+        stop = threading.Event()
+        changes = watcher.changes(stop)
+        try:
+            (Path(tmpdir) / 'lib' / 'util.py').write_text('os.system(cmd)\n')
+            assert next(changes) == {'lib/util.py'}
+            
+            (Path(tmpdir) / 'pkg').mkdir()
+            assert next(changes) is None
+            (Path(tmpdir) / 'pkg' / 'mod.py').write_text('x = 1\n')
+            assert next(changes) == {'pkg/mod.py'}
+        finally:
+            stop.set()
+            watcher.close()
@@ -0,0 +1,251 @@
+"""Tests for the dashboard API"""
+
+import gzip
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src import dashboard
+from src.events import EventBus, EventRelay, SocketPublisher, events_socket_path
+from src.reports.compressed import write_compressed_siblings
+from src.reports.report_index import ReportIndex
+from src.reports.scan_history import ScanHistory
+from src.scanners.security_scanner import SecurityScanner
+
+
+def _write_reports(reports_dir):
+    sast = {'issues': [{'category': 'hardcoded_secrets'}, {'category': 'sql_injection'},
+                       {'category': 'hardcoded_secrets'}]}
+    trivy = {'Results': [{'Vulnerabilities': [{'Severity': 'HIGH'}]}]}
+    (reports_dir / 'sast-report.json').write_text(json.dumps(sast))
+    (reports_dir / 'trivy-report.json').write_text(json.dumps(trivy))
+    (reports_dir / 'snyk-report.json').write_text('not json')
+    now = (reports_dir / 'sast-report.json').stat().st_mtime
+    os.utime(reports_dir / 'trivy-report.json', (now, now))
+    for days, name in enumerate(['sast-report-old.json', 'sast-report-older.json'], start=1):
+        path = reports_dir / name
+        path.write_text(json.dumps({'issues': []}))
+        past = path.stat().st_mtime - days * 86400
+        os.utime(path, (past, past))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as runtime_dir:
+        _write_reports(Path(tmpdir))
+        monkeypatch.setattr(dashboard, 'REPORTS_DIR', Path(tmpdir))
+        # the event relay's socket goes here, not in the real runtime directory
+        monkeypatch.setenv('XDG_RUNTIME_DIR', runtime_dir)
+        monkeypatch.setattr(dashboard, 'event_relay', EventRelay(dashboard.default_bus))
+        yield dashboard.app.test_client()
+        dashboard.event_relay.close()
+
+
+def test_reports_are_paginated_summaries(client):
+    """Test that /api/reports returns summaries a page at a time, newest first"""
+    body = client.get('/api/reports?per_page=2').get_json()
+    
+    assert body['total'] == 4  # the invalid snyk report is skipped
+    assert [r['file'] for r in body['reports']] == ['sast-report.json', 'trivy-report.json']
+    assert 'data' not in body['reports'][0]
+    assert body['reports'][0]['issues'] == 3
+    assert body['reports'][0]['counts'] == {'hardcoded_secrets': 2, 'sql_injection': 1}
+    
+    page2 = client.get('/api/reports?per_page=2&page=2').get_json()
+    assert [r['file'] for r in page2['reports']] == ['sast-report-old.json', 'sast-report-older.json']
+
+
+def test_reports_filters(client):
+    """Test scanner, issue count and time filters"""
+    sast = client.get('/api/reports?scanner=sast&min_issues=1').get_json()
+    assert [r['file'] for r in sast['reports']] == ['sast-report.json']
+    
+    trivy = client.get('/api/reports?scanner=trivy').get_json()
+    assert trivy['reports'][0]['counts'] == {'HIGH': 1}
+    
+    cutoff = Path(dashboard.REPORTS_DIR / 'sast-report-old.json').stat().st_mtime - 1
+    recent = client.get(f'/api/reports?since={cutoff}').get_json()
+    assert recent['total'] == 3
+    
+    assert client.get('/api/reports?since=yesterday').status_code == 400
+
+
+def test_full_report_only_from_report_endpoint(client):
+    """Test that the full payload is still available per file"""
+    body = client.get('/api/reports/sast-report.json').get_json()
+    assert len(body['issues']) == 3
+
+
+def test_report_endpoint_serves_only_reports(client):
+    """Test that caches, the history and temp files next to the reports are not served"""
+    for name in ('.sast-cache.sqlite', 'scan-history.sqlite', '.tmpabc123.tmp', 'notes.txt'):
+        (dashboard.REPORTS_DIR / name).write_bytes(b'private')
+        assert client.get(f'/api/reports/{name}').status_code == 404
+    
+    write_compressed_siblings(str(dashboard.REPORTS_DIR / 'sast-report.json'))
+    sibling = client.get('/api/reports/sast-report.json.gz', headers={'Accept-Encoding': 'gzip'})
+    assert sibling.status_code == 200 and len(json.loads(gzip.decompress(sibling.data))['issues']) == 3
+
+
+def test_index_reparses_only_changed_files():
+    """Test that unchanged reports are not read again"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        _write_reports(Path(tmpdir))
+        index = ReportIndex(tmpdir, refresh_interval=0)
+        
+        assert index.query()[0] == 4
+        assert index.stats['parsed'] == 5
+        
+        (Path(tmpdir) / 'trivy-report.json').write_text(json.dumps({'Results': []}))
+        (Path(tmpdir) / 'sast-report-old.json').unlink()
+        total, _ = index.query()
+        
+        assert total == 3
+        assert index.stats['parsed'] == 6
+        assert index.get('trivy-report.json').issues == 0
+
+
+def test_report_revalidates_with_etag(client):
+    """Test ETag/Last-Modified headers and 304 responses"""
+    first = client.get('/api/reports/sast-report.json')
+    assert first.status_code == 200
+    assert first.headers['Content-Type'] == 'application/json'
+    etag = first.headers['ETag']
+    
+    again = client.get('/api/reports/sast-report.json', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    
+    since = client.get('/api/reports/sast-report.json',
+                       headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert since.status_code == 304
+
+
+def test_report_served_precompressed(client):
+    """Test that a fresh gzip sibling is sent to clients that accept gzip"""
+    report = dashboard.REPORTS_DIR / 'sast-report.json'
+    write_compressed_siblings(str(report))
+    
+    plain = client.get('/api/reports/sast-report.json')
+    gzipped = client.get('/api/reports/sast-report.json', headers={'Accept-Encoding': 'gzip'})
+    
+    assert 'Content-Encoding' not in plain.headers
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzipped.headers['ETag'] != plain.headers['ETag']
+    assert 'Accept-Encoding' in gzipped.headers['Vary']
+    assert gzip.decompress(gzipped.data) == report.read_bytes()
+    
+    # a report rewritten after its sibling is served uncompressed
+    report.write_text(json.dumps({'issues': []}))
+    stale = os.stat(report).st_mtime_ns + 10 ** 9
+    os.utime(report, ns=(stale, stale))
+    fresh = client.get('/api/reports/sast-report.json', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in fresh.headers
+    assert fresh.get_json() == {'issues': []}
+
+
+def test_jsonl_reports_are_indexed_and_served(client):
+    """Test JSON Lines reports, stored plain or gzipped"""
+    lines = ''.join(json.dumps({'category': c}) + '\n' for c in ('sql_injection', 'sql_injection', 'xss'))
+    plain = dashboard.REPORTS_DIR / 'sast-report-new.jsonl'
+    plain.write_text(lines)
+    write_compressed_siblings(str(plain))
+    (dashboard.REPORTS_DIR / 'sast-report-gz.jsonl.gz').write_bytes(gzip.compress(lines.encode()))
+    
+    body = client.get('/api/reports?name=-gz&per_page=50').get_json()
+    assert [(r['file'], r['name'], r['counts']) for r in body['reports']] == [
+        ('sast-report-gz.jsonl.gz', 'sast-report-gz', {'sql_injection': 2, 'xss': 1})]
+    # the sibling of a .jsonl report is not listed as a report of its own
+    files = [r['file'] for r in client.get('/api/reports?name=-new').get_json()['reports']]
+    assert files == ['sast-report-new.jsonl']
+    
+    response = client.get('/api/reports/sast-report-new.jsonl')
+    assert response.mimetype == 'application/x-ndjson' and response.data.decode() == lines
+    stored = client.get('/api/reports/sast-report-gz.jsonl.gz', headers={'Accept-Encoding': 'gzip'})
+    assert stored.headers['Content-Encoding'] == 'gzip' and gzip.decompress(stored.data).decode() == lines
+    inflated = client.get('/api/reports/sast-report-gz.jsonl.gz')
+    assert 'Content-Encoding' not in inflated.headers and inflated.data.decode() == lines
+
+
+def test_event_stream_sends_bus_events(client, monkeypatch):
+    """Test that /api/events relays published events as Server-Sent Events"""
+    bus = EventBus()
+    monkeypatch.setattr(dashboard, 'default_bus', bus)
+    bus.publish('scan.started', repo='/r', scanners=['sast'])
+    bus.publish('scan.finished', repo='/r', issues_found=3)
+    
+    response = client.get('/api/events', headers={'Last-Event-ID': '1'}, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    assert next(chunks) == b'id: 2\nevent: scan.finished\ndata: {"repo": "/r", "issues_found": 3}\n\n'
+    assert bus.subscriber_count == 1
+    response.close()
+    assert bus.subscriber_count == 0
+
+
+def test_scans_in_other_processes_stream_their_progress(client, monkeypatch):
+    """Test that a scan publishing to the reports' events socket shows up on /api/events"""
+    bus = EventBus()
+    monkeypatch.setattr(dashboard, 'default_bus', bus)
+    monkeypatch.setattr(dashboard, 'event_relay', EventRelay(bus))
+    
+    response = client.get('/api/events', buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    try:
+        with tempfile.TemporaryDirectory() as repo, \
+                SocketPublisher(events_socket_path(str(dashboard.REPORTS_DIR))) as publisher:
+            (Path(repo) / 'app.py').write_text('password = "hunter2"\n')
+            scanner = SecurityScanner(repo, events=publisher)
+            with tempfile.TemporaryDirectory() as outdir:
+                scanner.run_scans(['sast'], outdir, use_cache=False, history=False)
+        
+        types = []
+        while not types or types[-1] != 'scan.finished':
+            types.append(next(chunks).split(b'\n')[1].decode().split(': ')[1])
+    finally:
+        response.close()
+        dashboard.event_relay.close()
+    
+    assert types[0] == 'scan.started' and 'sast.progress' in types and 'scanner.state' in types
+    assert client.post('/api/scans', json={'repo_path': '.'}).status_code in (404, 405)
+
+
+def test_history_api_lists_runs_and_compares(client):
+    """Test the scan history endpoints"""
+    assert client.get('/api/history/runs').get_json()['total'] == 0
+    
+    finding = {'file': 'a.py', 'line': 1, 'rule': 'hardcoded-password', 'category': 'hardcoded_secrets',
+               'description': 'Potential hardcoded password', 'code': 'password = "a"'}
+    with ScanHistory.in_dir(str(dashboard.REPORTS_DIR)) as history:
+        base = history.record('/repo', 'sast', [finding])
+        head = history.record('/repo', 'sast', [dict(finding, line=4), dict(finding, file='b.py')])
+    
+    runs = client.get('/api/history/runs?repo=/repo').get_json()
+    assert [r['id'] for r in runs['runs']] == [head, base]
+    run = client.get(f'/api/history/runs/{head}?file=b.py').get_json()
+    assert run['run']['issues'] == 2 and [f['file'] for f in run['findings']] == ['b.py']
+    
+    diff = client.get(f'/api/history/compare?head={head}').get_json()
+    assert diff['base'] == base
+    assert diff['counts'] == {'new': 1, 'fixed': 0, 'unchanged': 1}
+    assert [f['file'] for f in diff['findings']] == ['b.py']
+    assert client.get(f'/api/history/compare?head={base}').status_code == 404
+    assert client.get('/api/history/compare?head=1&kind=bogus').status_code == 400
+    assert client.get('/api/history/runs/99').status_code == 404
+
+
+def test_metrics_endpoints(client):
+    """Test that /metrics serves Prometheus text and /api/metrics JSON"""
+    client.get('/api/reports')
+    
+    response = client.get('/metrics')
+    assert response.mimetype == 'text/plain'
+    assert b'pipeline_span_calls_total{span="dashboard.get_reports"}' in response.data
+    assert 'dashboard.get_reports' in client.get('/api/metrics').get_json()['spans']
@@ -0,0 +1,66 @@
+"""Tests for high-entropy string detection"""
+
+import random
+
+import pytest
+
+from src.scanners import entropy
+from src.scanners.entropy import BASE64, HEX, EntropyThresholds, find_secrets, shannon_entropy
+
+AWS_SECRET = b'wJalrXUtnFEMI/K7MDENG/bPxRfiCYEXAMPLEKEY'
+SHA1 = b'da39a3ee5e6b4b0d3255bfef95601890afd80709'
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def scoring(request, monkeypatch):
+    """Run a test with the numpy bincount scoring and with the pure-Python fallback"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(entropy, 'np', None)
+    return request.param
+
+
+def test_shannon_entropy(scoring):
+    """Test entropy in bits per byte"""
+    assert shannon_entropy([b'aaaa', b'abcd', b'aabb', b'a']) == pytest.approx([0.0, 2.0, 1.0, 0.0])
+    assert shannon_entropy([]) == []
+
+
+def test_numpy_and_python_scoring_agree(monkeypatch):
+    """Test that the vectorized scoring gives the fallback's numbers"""
+    pytest.importorskip('numpy')
+    rng = random.Random(7)
+    candidates = [bytes(rng.choices(b'0123456789abcdefXYZ+/', k=rng.randint(1, 128))) for _ in range(500)]
+    
+    vectorized = shannon_entropy(candidates)
+    monkeypatch.setattr(entropy, 'np', None)
+    
+    assert vectorized == pytest.approx(shannon_entropy(candidates))
+
+
+def test_find_secrets_per_charset(scoring):
+    """Test that random hex and base64 literals are found and words are not"""
+    content = b'\n'.join([
+        b'key = "' + AWS_SECRET + b'"',
+        b"digest = '" + SHA1 + b"'",
+        b'name = "this_is_a_long_python_identifier"',
+        b'zeros = "' + b'0' * 40 + b'"',
+        b'unquoted = ' + AWS_SECRET,
+    ])
+    
+    secrets = list(find_secrets(content))
+    
+    assert [(content[s.start:s.end], s.charset) for s in secrets] == [(AWS_SECRET, BASE64), (SHA1, HEX)]
+    assert [s.charset for s in find_secrets(content, thresholds=EntropyThresholds(hex=4.0))] == [BASE64]
+
+
+def test_find_secrets_across_batches(scoring, monkeypatch):
+    """Test that batching doesn't change the result"""
+    content = b' '.join(b'"%s%d"' % (AWS_SECRET, i) for i in range(5))
+    expected = list(find_secrets(content))
+    
+    monkeypatch.setattr(entropy, 'BATCH_SIZE', 2)
+    
+    assert list(find_secrets(content)) == expected
+    assert len(expected) == 5
@@ -0,0 +1,109 @@
+"""Tests for the progress event bus"""
+
+import os
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+from src.events import MAX_EVENT_BYTES, EventBus, EventRelay, SocketPublisher, events_socket_path
+
+
+def test_events_fan_out_to_every_subscriber():
+    """Test that each subscriber gets every event, in order"""
+    bus = EventBus()
+    first, second = bus.subscribe(), bus.subscribe()
+    
+    bus.publish('scan.started', scanners=['sast'])
+    bus.publish('scan.finished', issues_found=2)
+    
+    for sub in (first, second):
+        assert [sub.get(timeout=0).type for _ in range(2)] == ['scan.started', 'scan.finished']
+        assert sub.get(timeout=0) is None
+
+
+def test_slow_subscriber_drops_oldest_without_blocking():
+    """Test that a full queue loses its oldest events instead of blocking publish"""
+    bus = EventBus()
+    slow = bus.subscribe(maxsize=3)
+    
+    start = time.monotonic()
+    for i in range(1000):
+        bus.publish('sast.progress', files_scanned=i)
+    assert time.monotonic() - start < 1
+    
+    assert slow.dropped == 997
+    assert [slow.get(timeout=0).data['files_scanned'] for _ in range(3)] == [997, 998, 999]
+
+
+def test_get_wakes_on_publish_and_close():
+    """Test that a waiting reader is woken by a new event or by close()"""
+    bus = EventBus()
+    sub = bus.subscribe()
+    threading.Timer(0.05, bus.publish, args=('scanner.state',)).start()
+    assert sub.get(timeout=5).type == 'scanner.state'
+    
+    threading.Timer(0.05, sub.close).start()
+    start = time.monotonic()
+    assert sub.get(timeout=5) is None
+    assert time.monotonic() - start < 1
+    assert bus.subscriber_count == 0
+
+
+def test_subscribe_replays_after_last_event_id():
+    """Test that a reconnecting client gets the kept events it missed"""
+    bus = EventBus(history=3)
+    ids = [bus.publish('sast.progress', files_scanned=i).id for i in range(5)]
+    
+    with bus.subscribe(last_event_id=ids[2]) as sub:
+        assert [sub.get(timeout=0).id for _ in range(2)] == ids[3:]
+    with bus.subscribe(last_event_id=0) as sub:
+        # only the last three are kept
+        assert [sub.get(timeout=0).id for _ in range(3)] == ids[2:]
+
+
+def test_relay_publishes_events_from_other_processes(monkeypatch):
+    """Test that published datagrams reach the bus and anything else is ignored"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        monkeypatch.setenv('XDG_RUNTIME_DIR', tmpdir)
+        path = events_socket_path(os.path.join(tmpdir, 'reports'))
+        bus = EventBus()
+        relay = EventRelay(bus)
+        relay.start(path)
+        try:
+            assert os.stat(path).st_mode & 0o777 == 0o600
+            with bus.subscribe() as sub, SocketPublisher(path) as publisher, \
+                    socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as raw:
+                for junk in (b'not json', b'[1]', b'{"type": "x", "data": {"event_type": 1}}'):
+                    raw.sendto(junk, path)
+                publisher.publish('sast.progress', files_scanned=3)
+                publisher.publish('huge', blob='x' * MAX_EVENT_BYTES)
+                
+                event = sub.get(timeout=5)
+                assert (event.type, event.data) == ('sast.progress', {'files_scanned': 3})
+                assert sub.get(timeout=0.2) is None
+                assert (publisher.sent, publisher.dropped) == (1, 1)
+            
+            with pytest.raises(OSError):
+                EventRelay(EventBus()).start(path)  # already relayed
+        finally:
+            relay.close()
+        assert not os.path.exists(path)
+
+
+def test_publisher_without_relay_drops_and_stale_sockets_are_reclaimed(monkeypatch):
+    """Test that publishing with no dashboard never fails, and a crashed relay's socket is reused"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        monkeypatch.setenv('XDG_RUNTIME_DIR', tmpdir)
+        path = events_socket_path(tmpdir)
+        with SocketPublisher(path) as publisher:
+            publisher.publish('scan.started', scanners=['sast'])
+            assert publisher.dropped == 1
+        
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as crashed:
+            crashed.bind(path)  # closed without unlinking
+        relay = EventRelay(EventBus())
+        relay.start(path)
+        relay.close()
@@ -0,0 +1,84 @@
+"""Tests for the columnar finding table and report writer"""
+
+import gzip
+import json
+import os
+import tempfile
+
+import pytest
+
+from src.reports.compressed import write_compressed_siblings
+from src.scanners.findings import SEPARATORS, FindingTable, FindingWriter, read_findings
+
+
+def _findings():
+    return [{
+        'file': f'src/mod_{i % 3}.py',
+        'line': i + 1,
+        'column': 5,
+        'span': [i * 40, i * 40 + 12],
+        'rule': 'hardcoded-password' if i % 2 else 'eval-usage',
+        'category': 'hardcoded_secrets' if i % 2 else 'code_injection',
+        'description': 'Potential hardcoded password' if i % 2 else 'Use of eval() — "dangerous"',
+        'code': f'password = "é{i % 4}"',
+    } for i in range(10)]
+
+
+def test_table_round_trips_findings():
+    """Test that rows come back as the dicts that went in, with shared strings"""
+    table = FindingTable()
+    table.extend(_findings())
+    
+    assert len(table) == 10
+    assert list(table) == _findings()
+    assert len(table.files) == 3 and len(table.rules) == 2
+    assert table.category_counts() == {'code_injection': 5, 'hardcoded_secrets': 5}
+    assert list(table.jsonl()) == [json.dumps(f, separators=SEPARATORS) + '\n' for f in _findings()]
+
+
+@pytest.mark.parametrize('report_format', ['jsonl', 'jsonl.gz', 'json'])
+def test_writer_formats(report_format):
+    """Test that each report format holds the same findings"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'sast-report.' + report_format)
+        table = FindingTable()
+        writer = FindingWriter(path, report_format)
+        for finding in _findings():
+            table.append(finding)
+            writer.write_new(table)
+        assert not os.path.exists(path)  # only moved into place when done
+        writer.close(table)
+        
+        if report_format == 'json':
+            with open(path, encoding='utf-8') as f:
+                assert json.load(f) == {'issues': _findings()}
+        else:
+            opener = gzip.open if report_format.endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                assert list(read_findings(f)) == _findings()
+        assert os.listdir(tmpdir) == ['sast-report.' + report_format]
+
+
+def test_writer_abort_leaves_nothing():
+    """Test that an aborted report leaves neither the report nor a temp file"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        writer = FindingWriter(os.path.join(tmpdir, 'sast-report.jsonl'))
+        writer.abort()
+        assert os.listdir(tmpdir) == []
+        with pytest.raises(ValueError):
+            FindingWriter(os.path.join(tmpdir, 'sast-report.xml'), 'xml')
+
+
+def test_reports_get_the_umask_mode_not_mkstemps():
+    """Test that a report and its compressed sibling are as readable as any new file"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'sast-report.jsonl')
+        writer = FindingWriter(path)
+        writer.close(FindingTable())
+        siblings = write_compressed_siblings(path)
+        
+        with open(os.path.join(tmpdir, 'plain'), 'w'):
+            pass
+        expected = os.stat(os.path.join(tmpdir, 'plain')).st_mode & 0o777
+        for written in [path, *siblings]:
+            assert os.stat(written).st_mode & 0o777 == expected
@@ -2,9 +2,10 @@
 
 import pytest
 from pathlib import Path
+import os
 import tempfile
 
-from src.generators.pipeline_generator import PipelineGenerator
+from src.generators.pipeline_generator import PipelineGenerator, TemplateEngine
 
 
 def test_generator_creates_workflow_file():
@@ -56,3 +57,36 @@ def test_generator_unsupported_platform():
     with pytest.raises(ValueError):
         generator = PipelineGenerator('unsupported')
         generator.generate({}, {}, '/tmp')
+
+
+def test_generator_picks_language_with_most_code():
+    """Test that language_stats decides between templated languages"""
+    generator = PipelineGenerator('github')
+    
+    analysis = {
+        'languages': ['javascript', 'python'],
+        'language_stats': {'javascript': {'files': 40, 'bytes': 90000}, 'python': {'files': 2, 'bytes': 800}},
+        'has_docker': False,
+    }
+    
+    assert generator._select_template(analysis) == 'node-pipeline.yml.j2'
+    assert generator._select_template({'languages': ['go']}) == 'generic-pipeline.yml.j2'
+
+
+def test_generator_reuses_rendered_output():
+    """Test that unchanged input is served from the render cache until the template changes"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        template = Path(tmpdir) / 'generic-pipeline.yml.j2'
+        template.write_text('name: {{ workflow_name }}\n')
+        engine = TemplateEngine(Path(tmpdir), bytecode_dir=tmpdir)
+        generator = PipelineGenerator('github', engine=engine)
+        config = {'pipeline': {'name': 'Cached'}}
+        
+        assert generator.render({'languages': []}, config) == 'name: Cached\n'
+        assert generator.render({'languages': []}, config) == 'name: Cached\n'
+        assert engine.stats == {'hits': 1, 'misses': 1}
+        
+        template.write_text('name: {{ workflow_name }} v2\n')
+        os.utime(template, ns=(0, template.stat().st_mtime_ns + 10 ** 9))
+        assert generator.render({'languages': []}, config) == 'name: Cached v2\n'
+        assert engine.stats['misses'] == 2
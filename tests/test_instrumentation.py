@@ -0,0 +1,85 @@
+"""Tests for timing instrumentation"""
+
+import json
+import tempfile
+from pathlib import Path
+
+from src.instrumentation import Metrics, metrics
+from src.scanners.security_scanner import SecurityScanner
+
+
+def test_spans_and_counters():
+    """Test that spans add up calls and time and counters add up values"""
+    registry = Metrics()
+    with registry.span('stage'):
+        pass
+    registry.observe('stage', 0.5)
+    registry.count('files', 3)
+    registry.count('files')
+    
+    snapshot = registry.snapshot()
+    assert snapshot['spans']['stage']['calls'] == 2
+    assert snapshot['spans']['stage']['max_seconds'] == 0.5
+    assert snapshot['spans']['stage']['seconds'] >= 0.5
+    assert snapshot['counters'] == {'files': 4}
+
+
+def test_take_and_merge():
+    """Test that a worker's take() merges into the parent and resets the worker"""
+    worker, parent = Metrics(), Metrics()
+    worker.observe('sast.read', 0.25)
+    worker.count('sast.bytes', 100)
+    parent.observe('sast.read', 0.5)
+    
+    parent.merge(worker.take())
+    
+    assert worker.snapshot() == {'spans': {}, 'counters': {}}
+    assert parent.snapshot()['spans']['sast.read'] == {'calls': 2, 'seconds': 0.75, 'max_seconds': 0.5}
+    assert parent.snapshot()['counters'] == {'sast.bytes': 100}
+
+
+def test_prometheus_format():
+    """Test the Prometheus text exposition"""
+    registry = Metrics()
+    registry.observe('scan.trivy', 1.5)
+    registry.count('sast.cache.hits', 2)
+    
+    text = registry.to_prometheus()
+    
+    assert '# TYPE pipeline_span_seconds_total counter' in text
+    assert 'pipeline_span_seconds_total{span="scan.trivy"} 1.5' in text
+    assert 'pipeline_span_calls_total{span="scan.trivy"} 1' in text
+    assert 'pipeline_sast_cache_hits_total 2' in text
+    assert text.endswith('\n')
+
+
+def test_scan_records_stage_metrics():
+    """Test that a SAST scan records its spans and counters, including from worker processes"""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as outdir:
+        for i in range(SecurityScanner.PARALLEL_MIN_FILES + 2):
+            (Path(tmpdir) / f'mod{i}.py').write_text('password = "hunter2"\n')
+        metrics.reset()
+        
+        SecurityScanner(tmpdir).run_scans(['sast'], outdir, jobs=2, history=False)
+        
+        snapshot = metrics.snapshot()
+        files = SecurityScanner.PARALLEL_MIN_FILES + 2
+        assert snapshot['counters']['sast.files_scanned'] == files
+        assert snapshot['counters']['sast.findings'] == files
+        assert snapshot['spans']['sast.match']['calls'] == files  # recorded in the workers
+        assert 'scan.sast' in snapshot['spans'] and 'inventory.walk' in snapshot['spans']
+
+
+def test_cli_writes_metrics():
+    """Test that --metrics writes a JSON snapshot after the command"""
+    from click.testing import CliRunner
+    from src.cli import cli
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / 'app.py').write_text('print(1)\n')
+        output = Path(tmpdir) / 'metrics.json'
+        
+        result = CliRunner().invoke(cli, ['--metrics', str(output), 'analyze', '--repo-path', tmpdir, '--no-cache'])
+        
+        assert result.exit_code == 0, result.output
+        assert 'analyze' in json.loads(output.read_text())['spans']
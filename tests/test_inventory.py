@@ -0,0 +1,114 @@
+"""Tests for the shared file inventory"""
+
+import pytest
+from pathlib import Path
+import tempfile
+
+from src.inventory.file_inventory import FileInventory, IgnorePolicy
+from src.analyzers.repo_analyzer import RepositoryAnalyzer
+from src.scanners.security_scanner import SecurityScanner
+
+
+def test_inventory_prunes_default_dirs():
+    """Test that vendored and VCS directories are never walked"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / 'node_modules' / 'lib').mkdir(parents=True)
+        (Path(tmpdir) / 'node_modules' / 'lib' / 'index.js').write_text('x = 1')
+        (Path(tmpdir) / '.git').mkdir()
+        (Path(tmpdir) / '.git' / 'config').write_text('[core]')
+        (Path(tmpdir) / 'main.py').write_text('print("hello")')
+        
+        inventory = FileInventory(tmpdir)
+        paths = [entry.path for entry in inventory]
+        
+        assert paths == ['main.py']
+
+
+def test_inventory_honors_gitignore():
+    """Test .gitignore patterns, negation and nested .gitignore files"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / '.gitignore').write_text('*.log\nbuild/\n!keep.log\n')
+        (root / 'app.log').write_text('log')
+        (root / 'keep.log').write_text('log')
+        (root / 'build').mkdir()
+        (root / 'build' / 'out.py').write_text('x = 1')
+        (root / 'pkg').mkdir()
+        (root / 'pkg' / '.gitignore').write_text('/generated.py\n')
+        (root / 'pkg' / 'generated.py').write_text('x = 1')
+        (root / 'pkg' / 'module.py').write_text('x = 1')
+        
+        paths = {entry.path for entry in FileInventory(tmpdir)}
+        
+        assert paths == {'.gitignore', 'keep.log', 'pkg/.gitignore', 'pkg/module.py'}
+
+
+def test_inventory_for_paths_applies_ignore_policy():
+    """Test that an inventory of given paths skips what a walk would skip"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / '.gitignore').write_text('*.log\nbuild/\n')
+        (root / 'build').mkdir()
+        (root / 'build' / 'out.py').write_text('x = 1')
+        (root / 'node_modules').mkdir()
+        (root / 'node_modules' / 'dep.js').write_text('x')
+        (root / 'pkg').mkdir()
+        (root / 'pkg' / 'module.py').write_text('x = 1')
+        (root / 'app.log').write_text('log')
+        
+        inventory = FileInventory.for_paths(tmpdir, ['pkg/module.py', 'build/out.py', 'node_modules/dep.js',
+                                                     'app.log', 'deleted.py'])
+        
+        assert [entry.path for entry in inventory] == ['pkg/module.py']
+        assert inventory.files()[0] == next(iter(FileInventory(tmpdir).subtree('pkg')))
+
+
+def test_inventory_entries_are_typed():
+    """Test that entries carry size, mtime and suffix"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / 'main.py').write_text('print("hello")')
+        
+        entry = FileInventory(tmpdir).files()[0]
+        
+        assert entry.path == 'main.py'
+        assert entry.size == len('print("hello")')
+        assert entry.suffix == '.py'
+        assert entry.mtime > 0
+
+
+def test_inventory_shared_between_stages():
+    """Test that the analyzer and scanner reuse a single walk"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        (Path(tmpdir) / 'main.py').write_text('password = "hunter2"')
+        
+        inventory = FileInventory(tmpdir, IgnorePolicy(use_gitignore=False))
+        RepositoryAnalyzer(tmpdir, inventory=inventory).analyze()
+        walked = inventory.files()
+        
+        scanner = SecurityScanner(tmpdir, inventory=inventory)
+        
+        with tempfile.TemporaryDirectory() as outdir:
+            result = scanner.run_scans(['sast'], outdir)
+        
+        assert inventory.files() is walked
+        assert result['sast']['issues_found'] == 1
+
+
+def test_inventory_subtree_walks_one_directory():
+    """Test that subtree() lists one top-level directory with root ignores applied"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / '.gitignore').write_text('*.log\n')
+        (root / 'app').mkdir()
+        (root / 'app' / 'main.py').write_text('x = 1')
+        (root / 'app' / 'debug.log').write_text('log')
+        (root / 'docs').mkdir()
+        (root / 'docs' / 'index.md').write_text('# docs')
+        (root / 'setup.py').write_text('')
+        
+        inventory = FileInventory(tmpdir)
+        assert [e.path for e in inventory.subtree('app')] == ['app/main.py']
+        assert [e.path for e in inventory.subtree('')] == ['.gitignore', 'setup.py']
+        
+        inventory.files()
+        assert [e.path for e in inventory.subtree('docs')] == ['docs/index.md']
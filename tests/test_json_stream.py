@@ -0,0 +1,94 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from src.scanners.json_stream import _iter_events_py, count_by_severity, iter_events, iter_items
+
+
+def test_events_match_ijson_prefixes():
+    """Test that events carry dotted prefixes with 'item' for array elements"""
+    doc = '{"a": [1, {"b": "x"}], "c": null, "d": true}'
+    events = list(_iter_events_py(io.StringIO(doc), 64))
+    
+    assert events == [
+        ('', 'start_map', None),
+        ('', 'map_key', 'a'),
+        ('a', 'start_array', None),
+        ('a.item', 'number', 1),
+        ('a.item', 'start_map', None),
+        ('a.item', 'map_key', 'b'),
+        ('a.item.b', 'string', 'x'),
+        ('a.item', 'end_map', None),
+        ('a', 'end_array', None),
+        ('', 'map_key', 'c'),
+        ('c', 'null', None),
+        ('', 'map_key', 'd'),
+        ('d', 'boolean', True),
+        ('', 'end_map', None),
+    ]
+
+
+def test_tiny_chunks_give_same_events():
+    """Test that tokens split across read chunks are reassembled"""
+    doc = json.dumps({'key "quoted"': ['välue\\n', -12.5e3, 123456, False], 'empty': {}})
+    whole = list(_iter_events_py(io.StringIO(doc), len(doc)))
+    
+    for chunk_size in (1, 2, 3, 7):
+        assert list(_iter_events_py(io.StringIO(doc), chunk_size)) == whole
+
+
+def test_malformed_report_raises_value_error():
+    """Test that truncated or invalid JSON raises ValueError"""
+    for doc in ('{"a": [1, 2', '{"a": nope}', '{"a": "unterminated'):
+        try:
+            list(_iter_events_py(io.StringIO(doc), 4))
+            assert False, doc
+        except ValueError:
+            pass
+
+
+def test_count_by_severity_trivy_and_snyk():
+    """Test vulnerability counting for Trivy and Snyk report layouts"""
+    trivy = {'Results': [
+        {'Vulnerabilities': [{'Severity': 'HIGH'}, {'Severity': 'LOW', 'Nested': {'Severity': 'X'}}]},
+        {'Target': 'no-vulns'},
+        {'Vulnerabilities': [{'Severity': 'high'}, {'VulnerabilityID': 'CVE-1'}]},
+    ]}
+    snyk_projects = [
+        {'vulnerabilities': [{'severity': 'medium'}]},
+        {'vulnerabilities': [{'severity': 'critical'}, {'severity': 'medium'}]},
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        trivy_file = Path(tmpdir) / 'trivy-report.json'
+        trivy_file.write_text(json.dumps(trivy))
+        snyk_file = Path(tmpdir) / 'snyk-report.json'
+        snyk_file.write_text(json.dumps(snyk_projects))
+        
+        with open(trivy_file) as f:
+            total, severities = count_by_severity(f, ['Results.item.Vulnerabilities.item'], 'Severity')
+        assert total == 4
+        assert severities == {'HIGH': 2, 'LOW': 1, 'UNKNOWN': 1}
+        
+        with open(snyk_file) as f:
+            total, severities = count_by_severity(
+                f, ['vulnerabilities.item', 'item.vulnerabilities.item'], 'severity')
+        assert total == 3
+        assert severities == {'MEDIUM': 2, 'CRITICAL': 1}
+        
+        with open(snyk_file) as f:
+            assert [e for e in iter_events(f)][0] == ('', 'start_array', None)
+
+
+def test_iter_items_keeps_named_scalar_fields():
+    """Test that items come out one at a time with only their own named fields"""
+    doc = json.dumps({'Results': [{'Vulnerabilities': [
+        {'VulnerabilityID': 'CVE-1', 'PkgName': 'openssl', 'Nested': {'PkgName': 'x'}, 'CVSS': [1]},
+        {'PkgName': 'zlib', 'Score': 7},
+    ]}]})
+    
+    items = list(iter_items(io.StringIO(doc), ['Results.item.Vulnerabilities.item'],
+                            ['VulnerabilityID', 'PkgName', 'Score', 'CVSS']))
+    
+    assert items == [{'VulnerabilityID': 'CVE-1', 'PkgName': 'openssl'}, {'PkgName': 'zlib', 'Score': 7}]
@@ -0,0 +1,44 @@
+"""Tests for the SAST line index"""
+
+import mmap
+import pytest
+import tempfile
+
+from src.scanners.line_index import LineIndex
+
+
+def test_line_col_resolution():
+    """Test offsets on the first line, later lines and right after a newline"""
+    content = b'first\nsecond line\n\nfourth'
+    index = LineIndex(content)
+    
+    assert index.line_col(0) == (1, 1)
+    assert index.line_col(content.index(b'line')) == (2, 8)
+    assert index.line_col(content.index(b'fourth')) == (4, 1)
+    assert index.line_col(len(content)) == (4, 7)
+
+
+def test_line_col_out_of_order_lookups():
+    """Test that checkpoints give the same answers in any lookup order"""
+    content = b'\n'.join(b'line %d' % i for i in range(100))
+    offsets = [content.index(b'line %d\n' % i) + 2 for i in (90, 3, 50, 0, 91, 89)]
+    
+    index = LineIndex(content)
+    
+    assert [index.line_col(o) for o in offsets] == [(91, 3), (4, 3), (51, 3), (1, 3), (92, 3), (90, 3)]
+
+
+def test_columns_count_bytes():
+    """Test that columns are byte based for non-ASCII lines"""
+    content = 'naïve = 1\npassword = "ünïcode"\n'.encode('utf-8')
+    
+    assert LineIndex(content).line_col(content.index(b'"')) == (2, 12)
+
+
+def test_mmap_content():
+    """Test that memory-mapped files index the same way"""
+    with tempfile.TemporaryFile() as f:
+        f.write(b'a\nbb\nccc')
+        f.flush()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            assert LineIndex(buf).line_col(6) == (3, 2)
@@ -0,0 +1,71 @@
+"""Tests for the scan history store"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from src.cli import cli
+from src.reports.scan_history import ScanHistory, fingerprints
+from src.scanners.security_scanner import SecurityScanner
+
+
+def _finding(file, line, code, rule='hardcoded-password'):
+    return {'file': file, 'line': line, 'rule': rule, 'category': 'hardcoded_secrets',
+            'description': 'Potential hardcoded password', 'code': code}
+
+
+def test_fingerprints_survive_line_shifts():
+    """Test that moving code keeps its fingerprint and duplicates stay distinct"""
+    before = [_finding('a.py', 3, 'password = "x"'), _finding('a.py', 9, 'password = "x"')]
+    after = [_finding('a.py', 13, 'password  =  "x"'), _finding('a.py', 19, 'password = "x"')]
+    
+    assert fingerprints('/repo', before) == fingerprints('/repo', after)
+    assert len(set(fingerprints('/repo', before))) == 2
+    assert fingerprints('/repo', before) != fingerprints('/other', before)
+
+
+def test_compare_and_delta_between_runs():
+    """Test new, fixed and unchanged findings between two runs"""
+    with tempfile.TemporaryDirectory() as tmpdir, ScanHistory.in_dir(tmpdir) as history:
+        first = history.record('/repo', 'sast', [_finding('a.py', 1, 'password = "a"'),
+                                                 _finding('b.py', 1, 'password = "b"')])
+        second = history.record('/repo', 'sast', [_finding('a.py', 5, 'password = "a"'),
+                                                  _finding('c.py', 2, 'password = "c"')])
+        
+        assert history.previous_run(second) == first
+        assert history.previous_run(first) is None
+        assert history.compare(first, second) == {'new': 1, 'fixed': 1, 'unchanged': 1}
+        assert [(f['file'], f['line']) for f in history.delta(first, second, 'new')] == [('c.py', 2)]
+        assert [(f['file'], f['line']) for f in history.delta(first, second, 'fixed')] == [('b.py', 1)]
+        # unchanged findings carry their current line
+        assert [(f['file'], f['line']) for f in history.delta(first, second, 'unchanged')] == [('a.py', 5)]
+        assert history.runs(repo='/repo')[0] == 2
+        assert [r['id'] for r in history.runs(limit=1)[1]] == [second]
+        # a finding is stored once however many runs it appears in
+        assert history._conn.execute('SELECT COUNT(*) FROM findings').fetchone()[0] == 3
+
+
+def test_scans_append_to_history_and_cli_diff():
+    """Test that each SAST scan is recorded and `history diff` compares the last two"""
+    with tempfile.TemporaryDirectory() as tmpdir, tempfile.TemporaryDirectory() as outdir:
+        app = Path(tmpdir) / 'app.py'
+        app.write_text('password = "hunter2"\nos.system("ls")\n')
+        first = SecurityScanner(tmpdir).run_scans(['sast'], outdir)['sast']['history']
+        
+        app.write_text('import os\n\npassword = "hunter2"\n')
+        second = SecurityScanner(tmpdir).run_scans(['sast'], outdir)['sast']['history']
+        
+        assert first == {'run_id': 1, 'previous_run': None, 'new': 2, 'fixed': 0, 'unchanged': 0}
+        assert second == {'run_id': 2, 'previous_run': 1, 'new': 0, 'fixed': 1, 'unchanged': 1}
+        
+        result = CliRunner().invoke(cli, ['history', 'diff', '--reports', outdir, '--json'])
+        assert result.exit_code == 0, result.output
+        diff = json.loads(result.output)
+        assert diff['counts'] == {'new': 0, 'fixed': 1, 'unchanged': 1}
+        assert [f['rule'] for f in diff['fixed']] == ['os-system']
+        
+        runs = CliRunner().invoke(cli, ['history', 'runs', '--reports', outdir, '--repo-path', tmpdir])
+        assert runs.exit_code == 0 and os.path.realpath(tmpdir) in runs.output